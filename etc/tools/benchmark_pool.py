@@ -0,0 +1,118 @@
+"""Benchmarks `ShuttleAIPool` against a single `AsyncShuttleAI` event loop, using a local mock server.
+
+Usage: python -m etc.tools.benchmark_pool [--requests N] [--processes 1,2,4] [--choices N]
+
+The mock server answers every chat completion instantly with a canned response of `--choices`
+choices (the larger, the more CPU the clients spend decoding and validating), and runs on several
+processes sharing a port so that it is not the bottleneck. Each response is also post-processed
+(re-serialized) by a handler, as bulk jobs do. Near-linear scaling needs at least as many free
+cores as client processes plus server processes.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+from typing import Any, List
+
+import orjson
+
+from shuttleai._concurrency import async_bounded_map
+from shuttleai.pool import ShuttleAIPool
+from shuttleai.schemas.chat.completions import ChatCompletionResponse
+
+REQUEST = {"model": "shuttle-3.5", "messages": [{"role": "user", "content": "Say something."}]}
+
+
+def mock_response(choices: int) -> bytes:
+    content = "The quick brown fox jumps over the lazy dog. " * 20
+    return orjson.dumps(
+        {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "shuttle-3.5",
+            "choices": [
+                {"index": i, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                for i in range(choices)
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 200 * choices, "total_tokens": 10 + 200 * choices},
+        }
+    )
+
+
+def serve(port: int, body: bytes) -> None:
+    from aiohttp import web
+
+    async def chat(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(body=body, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat)
+    web.run_app(app, host="127.0.0.1", port=port, reuse_port=True, print=None, access_log=None)
+
+
+def handle(response: ChatCompletionResponse) -> int:
+    return len(response.model_dump_json())
+
+
+async def single_loop(count: int, concurrency: int, options: Any) -> float:
+    from shuttleai import AsyncShuttleAI
+
+    started = time.perf_counter()
+    async with AsyncShuttleAI(**options) as client:
+
+        async def run(_: Any) -> int:
+            return handle(await client.chat.completions.create(**REQUEST))
+
+        async for _ in async_bounded_map(run, range(count), concurrency=concurrency, ordered=False):
+            pass
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ShuttleAIPool scaling against a local mock server")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--processes", default=",".join(str(2**i) for i in range(4) if 2**i <= (os.cpu_count() or 1)))
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight per process")
+    parser.add_argument("--choices", type=int, default=8, help="Choices per mock response")
+    parser.add_argument("--server-processes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    context = multiprocessing.get_context("spawn")
+    body = mock_response(args.choices)
+    servers = [context.Process(target=serve, args=(port, body), daemon=True) for _ in range(args.server_processes)]
+    for server in servers:
+        server.start()
+    time.sleep(1.5)
+
+    options = {"api_key": "benchmark", "base_url": f"http://127.0.0.1:{port}/v1", "validate_requests": False}
+    try:
+        elapsed = asyncio.run(single_loop(args.requests, args.concurrency, options))
+        baseline = args.requests / elapsed
+        print(f"{'AsyncShuttleAI':<22} {baseline:10.0f} req/s")
+
+        process_counts: List[int] = [int(p) for p in args.processes.split(",")]
+        for processes in process_counts:
+            with ShuttleAIPool(processes, handler=handle, concurrency=args.concurrency, **options) as pool:
+                pool.map([REQUEST] * processes)  # warm up the workers
+                started = time.perf_counter()
+                failures = sum(not result.ok for result in pool.imap(REQUEST for _ in range(args.requests)))
+                throughput = args.requests / (time.perf_counter() - started)
+            print(
+                f"{f'ShuttleAIPool({processes})':<22} {throughput:10.0f} req/s "
+                f"{throughput / baseline:6.2f}x {failures} failures"
+            )
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
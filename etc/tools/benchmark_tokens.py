@@ -0,0 +1,86 @@
+"""Benchmarks the token counting throughput of `shuttleai.tokens`.
+
+Usage: python -m etc.tools.benchmark_tokens [--size-mb N] [--encoding NAME] [FILE ...]
+
+Without files, the corpus is the project's source and docs, repeated until it is `--size-mb` large.
+The corpus is counted twice per tokenizer: a cold pass, and a warm one that hits the piece caches.
+"""
+
+import argparse
+import os
+import time
+from typing import Callable, List
+
+from shuttleai import tokens
+
+project_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+
+def default_corpus(size: int) -> List[str]:
+    documents = []
+    for dirpath, _, filenames in os.walk(project_path):
+        if "/." in dirpath or "node_modules" in dirpath:
+            continue
+        for filename in filenames:
+            if filename.endswith((".py", ".md")):
+                with open(os.path.join(dirpath, filename), encoding="utf-8", errors="replace") as file:
+                    documents.append(file.read())
+    corpus, total = [], 0
+    while total < size and documents:
+        for document in documents:
+            corpus.append(document)
+            total += len(document)
+    return corpus
+
+
+def measure(name: str, count: Callable[[str], int], corpus: List[str]) -> None:
+    characters = sum(len(document) for document in corpus)
+    tokens.approximate_tokens.cache_clear()
+    for run in ("cold", "warm"):
+        started = time.perf_counter()
+        total = sum(count(document) for document in corpus)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:<12} {run:<5} {total:>12,} tokens {elapsed:8.3f}s "
+            f"{characters / elapsed / 1e6:8.2f} MB/s {total / elapsed / 1e6:8.2f} M tokens/s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark token counting throughput")
+    parser.add_argument("files", nargs="*", help="Text files to count (default: the project's sources)")
+    parser.add_argument("--size-mb", type=float, default=20.0, help="Size of the default corpus")
+    parser.add_argument("--encoding", default=tokens.DEFAULT_ENCODING, help="The BPE encoding to benchmark")
+    args = parser.parse_args()
+
+    if args.files:
+        corpus = []
+        for path in args.files:
+            with open(path, encoding="utf-8", errors="replace") as file:
+                corpus.append(file.read())
+    else:
+        corpus = default_corpus(int(args.size_mb * 1e6))
+    print(f"Corpus: {len(corpus)} documents, {sum(len(d) for d in corpus) / 1e6:.1f} MB")
+
+    measure("approximate", tokens.ApproximateTokenizer().count, corpus)
+
+    started = time.perf_counter()
+    try:
+        bpe = tokens.BPETokenizer(args.encoding)
+        bpe.load()
+    except Exception as e:
+        print(f"{'bpe':<12} skipped: could not load the {args.encoding} merge table ({e})")
+    else:
+        print(f"{'bpe':<12} merge table loaded in {time.perf_counter() - started:.3f}s")
+        measure("bpe", bpe.count, corpus)
+
+    try:
+        tiktoken = tokens.TiktokenTokenizer(args.encoding)
+    except Exception as e:
+        print(f"{'tiktoken':<12} skipped: {e}")
+    else:
+        measure("tiktoken", tiktoken.count, corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+
+
+import asyncio
+
+from shuttleai import AsyncShuttleAI
+from shuttleai.resources.chat.hedging import HedgePolicy
+
+
+async def main() -> None:
+    client = AsyncShuttleAI()
+
+    # Duplicate a request once it is slower than 95% of the model's recent requests (to the next model
+    # of the list), spending at most ~10% extra requests on hedges.
+    policy = HedgePolicy(percentile=0.95, budget=0.1)
+
+    for question in ("what is 5 plus 3", "what is 7 times 6", "what is 9 minus 4"):
+        chat_response = await client.chat.completions.create(
+            messages=[{"role": "user", "content": question}],
+            model=["shuttle-3.5", "gpt-4o-mini"],
+            routing="ordered",
+            hedge=policy,
+        )
+        print(f"[{chat_response.model}] {chat_response.choices[0].message.content}")
+
+    # Be sure to close the client session when not using context managers
+    await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,45 +3,37 @@
 import asyncio
 
 from shuttleai import AsyncShuttleAI
+from shuttleai.exceptions import ShuttleAIException
+from shuttleai.schemas.video.generations import VideoJobResponse
 
 
 async def main() -> None:
     # Initialize the async ShuttleAI client
-    client = AsyncShuttleAI()
-
-    # Create a video generation job
-    prompt = "A serene sunset over a calm ocean with gentle waves"
-    video_response = await client.video.generations.generate(
-        prompt=prompt,
-        model="sora",
-        width=480,
-        height=480,
-        n_seconds=5
-    )
-    print(f"Video generation job created with ID: {video_response.id}")
-    print(f"Initial status: {video_response.status}")
-
-    # Poll for job status until completion or failure
-    job_id = video_response.id
-    while True:
-        status_response = await client.video.generations.get_job_status(job_id)
-        print(f"Job status: {status_response.status}")
-
-        if status_response.is_completed:
-            if status_response.first_video and status_response.first_video.video_url:
-                print(f"Video generated successfully! URL: {status_response.first_video.video_url}")
-                # Save the video to a file
-                status_response.first_video.to_file("output_video.mp4")
-                print("Video saved to output_video.mp4")
-            else:
-                print("No video URL available.")
-            break
-        elif status_response.has_failed:
-            print("Video generation job failed.")
-            break
-        else:
-            print("Job still processing, waiting...")
-            await asyncio.sleep(5)  # Wait before polling again
+    async with AsyncShuttleAI() as client:
+
+        def on_status(job: VideoJobResponse) -> None:
+            print(f"Job {job.id} status: {job.status}")
+
+        # Create a video generation job, wait for it with adaptive polling, and save it as soon as it succeeds
+        prompt = "A serene sunset over a calm ocean with gentle waves"
+        try:
+            job = await client.video.generations.generate_and_wait(
+                prompt=prompt,
+                model="sora",
+                width=480,
+                height=480,
+                n_seconds=5,
+                path="output_video.mp4",
+                timeout=600,
+                on_status=on_status,
+            )
+        except ShuttleAIException as e:
+            print(f"Video generation failed: {e}")
+            return
+
+        if job.first_video:
+            print(f"Video generated successfully! URL: {job.first_video.video_url}")
+        print("Video saved to output_video.mp4")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+
+import asyncio
+
+from shuttleai import AsyncShuttleAI
+from shuttleai.batch import BatchProgress, BatchRunner
+
+
+def report(progress: BatchProgress) -> None:
+    print(progress)
+
+
+async def main() -> None:
+    # Each line of prompts.jsonl is e.g. {"id": "q1", "prompt": "what is 5 plus 3"}.
+    # Running this again after an interruption only sends the prompts without a result yet.
+    runner = BatchRunner(
+        "prompts.jsonl",
+        "results.jsonl",
+        model="shuttle-3.5",
+        concurrency=32,
+        requests_per_second=20,
+        defaults={"max_tokens": 256},
+        on_progress=report,
+    )
+    async with AsyncShuttleAI() as client:
+        await runner.run(client)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
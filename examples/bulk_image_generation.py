@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+
+from shuttleai import ShuttleAI
+
+
+def main() -> None:
+    client = ShuttleAI()
+
+    prompts = [f"A watercolor painting of a {animal}" for animal in ("fox", "owl", "whale", "tiger", "koala")]
+
+    # Runs up to 4 generations at once, retrying rate limits, and downloads each image as soon as it is ready.
+    for result in client.images.generations.generate_many(prompts, concurrency=4, download_dir="images"):
+        if result.ok:
+            print(f"[{result.index}] {result.prompt} -> {result.paths}")
+        else:
+            print(f"[{result.index}] {result.prompt} failed: {result.error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python
+
+from shuttleai import ShuttleAI
+from shuttleai.context import ContextWindow, messages_tokens
+from shuttleai.conversation import Conversation
+
+
+def main() -> None:
+    # Once the history outgrows the model's input limit, its oldest messages are summarized.
+    client = ShuttleAI(context_window=ContextWindow(strategy="summarize"))
+
+    conversation = Conversation([{"role": "system", "content": "You are a helpful assistant."}])
+    for question in ["Tell me a long story about a lighthouse keeper.", "Continue the story.", "How did it end?"]:
+        conversation.add("user", question)
+        print(f"Sending ~{messages_tokens(conversation)} tokens")
+        chat_response = client.chat.completions.create(model="shuttle-3.5", messages=conversation)
+        print(chat_response.choices[0].message.content)
+        conversation.append(chat_response.choices[0].message)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+
+from shuttleai import ShuttleAI
+
+
+def main() -> None:
+    client = ShuttleAI()
+
+    questions = ["what is 5 plus 3", "what is the capital of France", "who wrote Hamlet", "what is 2 to the 10th"]
+    requests = ({"model": "shuttle-3.5", "messages": [{"role": "user", "content": q}]} for q in questions)
+
+    # Up to 4 requests run at once on the client's thread pool; a failed request doesn't stop the others.
+    for result in client.imap_unordered(client.chat.completions.create, requests, concurrency=4, retries=2):
+        if result.ok:
+            print(f"[{result.index}] {result.value.choices[0].message.content}")
+        else:
+            print(f"[{result.index}] failed: {result.error}")
+
+    # Any client method works, e.g. embeddings in input order.
+    for result in client.map(client.embeddings.create, [{"input": q} for q in questions]):
+        print(result.index, len(result.value.data[0].embedding) if result.ok else result.error)
+
+
+if __name__ == "__main__":
+    main()
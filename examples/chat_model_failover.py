@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+from shuttleai import ShuttleAI
+
+
+def main() -> None:
+    client = ShuttleAI()
+
+    for question in ("what is 5 plus 3", "what is 7 times 6"):
+        # Sent to the fastest healthy model of the list, failing over to the others on errors.
+        chat_response = client.chat.completions.create(
+            model=["shuttle-3.5", "shuttle-3", "gpt-4o-mini"],
+            messages=[{"role": "user", "content": question}],
+        )
+        print(f"[{chat_response.model}] {chat_response.choices[0].message.content}")
+
+    # Weighted routing: roughly 3 of 4 requests go to shuttle-3.5 while it is healthy.
+    chat_response = client.chat.completions.create(
+        model={"shuttle-3.5": 3, "gpt-4o-mini": 1},
+        messages=[{"role": "user", "content": "what is 9 minus 4"}],
+    )
+    print(f"[{chat_response.model}] {chat_response.choices[0].message.content}")
+
+    print(client.model_health.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+
+from shuttleai import ShuttleAI
+from shuttleai.cache import SQLiteCache
+from shuttleai.resources.chat.caching import ResponseCache
+
+
+def main() -> None:
+    # Identical requests are answered from disk for a day, also across runs of this script.
+    client = ShuttleAI(response_cache=ResponseCache(SQLiteCache("responses.db"), ttl=86400))
+
+    for _ in range(3):
+        chat_response = client.chat.completions.create(
+            model="shuttle-3.5",
+            messages=[{"role": "user", "content": "what is 5 plus 3"}],
+        )
+        print(chat_response.id, chat_response.choices[0].message.content)
+
+    # Streaming requests are served from the same cache, replayed as a stream.
+    for chunk in client.chat.completions.create(
+        model="shuttle-3.5",
+        messages=[{"role": "user", "content": "what is 5 plus 3"}],
+        stream=True,
+    ):
+        print(chunk.choices[0].delta.content or "", end="")
+    print()
+
+
+if __name__ == "__main__":
+    main()
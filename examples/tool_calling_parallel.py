@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+
+import asyncio
+
+from shuttleai import ShuttleAI
+from shuttleai.helpers import ToolRuntime
+
+tools = ToolRuntime(timeout=10)
+
+
+@tools.register
+def get_current_weather(location: str, unit: str = "fahrenheit") -> str:
+    """
+    Get the current weather in a given location
+
+    :param location: The city and state, e.g. San Francisco, CA
+    :param unit: The unit of temperature to return, either "celsius" or "fahrenheit"
+    """
+    return f"80 degrees {unit[0].upper()} in {location}"
+
+
+@tools.register(timeout=5)
+async def get_local_time(location: str) -> str:
+    """
+    Get the local time in a given location
+
+    :param location: The city and state, e.g. San Francisco, CA
+    """
+    await asyncio.sleep(0.1)  # e.g. an HTTP request
+    return f"It is 2 PM in {location}"
+
+
+def main() -> None:
+    client = ShuttleAI()
+
+    messages = [{"role": "user", "content": "What is the weather and the time in Paris and in Rome?"}]
+
+    # Every tool call of a response runs concurrently (sync tools on threads, async ones as tasks), the
+    # results are appended to the messages, and the loop goes on until the model answers without tools.
+    response = tools.run(client, messages, model="shuttle-3.5")
+
+    for message in messages[1:]:
+        print(message)
+    print(response.first_choice.message.content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+
+import time
+
+from shuttleai import ShuttleAI
+from shuttleai.helpers import ToolRuntime
+from shuttleai.schemas.chat.completions import ChatCompletionStreamResponse
+
+tools = ToolRuntime(timeout=10)
+
+
+@tools.register
+def get_current_weather(location: str) -> str:
+    """
+    Get the current weather in a given location
+
+    :param location: The city and state, e.g. San Francisco, CA
+    """
+    time.sleep(1)  # e.g. a slow API
+    return f"80 degrees F in {location}"
+
+
+def print_content(chunk: ChatCompletionStreamResponse) -> None:
+    if chunk.choices and chunk.first_choice.delta.content:
+        print(chunk.first_choice.delta.content, end="", flush=True)
+
+
+def main() -> None:
+    client = ShuttleAI()
+
+    messages = [{"role": "user", "content": "What is the weather in Paris, Rome and Berlin?"}]
+
+    # Each tool call starts as soon as its arguments have been streamed, while the model is still
+    # writing the next calls, instead of after the whole response.
+    tools.run_streamed(client, messages, model="shuttle-3.5", on_chunk=print_content)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+import asyncio
+
+from shuttleai import AsyncShuttleAI
+from shuttleai.rag import AnswerPipeline
+
+
+async def main() -> None:
+    async with AsyncShuttleAI() as client:
+        # Pages are fetched while the searches are still running, and the answer starts streaming
+        # as soon as three pages are ready.
+        pipeline = AnswerPipeline(client, model="shuttle-3.5", embedding_model="text-embedding-3-small")
+        answer = pipeline.stream(
+            "What are the main new features of Python 3.13?",
+            queries=["python 3.13 new features", "python 3.13 release notes"],
+        )
+        async for text in answer:
+            print(text, end="", flush=True)
+        print("\n")
+
+        for source in answer.sources:
+            print(f"[{source.index}] {source.title} - {source.link}")
+        print(answer.timings)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
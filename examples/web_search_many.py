@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+
+from shuttleai import ShuttleAI
+from shuttleai.cache import SQLiteCache
+from shuttleai.resources.etc.web_search import SearchCache
+
+
+def main() -> None:
+    # Searches are cached on disk for a day: repeated (and near-duplicate) queries cost nothing.
+    client = ShuttleAI(search_cache=SearchCache(SQLiteCache("searches.db"), ttl=86400))
+
+    queries = ["python asyncio tutorial", "Python asyncio tutorial?", "asyncio event loop explained"]
+    # Every query is searched with search-ddg and search-google concurrently, and the results merged.
+    results = client.web.search_many(queries, limit=5, max_results=8)
+    for result in results:
+        print(f"{result.score:.4f} {result.title}\n       {result.link} ({', '.join(result.models)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,14 @@ __title__ = "shuttleai"
 __version__ = "4.8.0"
 
 import json
+import sys
+import threading
 import time
 import typing
 from pathlib import Path
 
-import requests
-from packaging import version
-
-from ._patch import _patch_httpx
-from .client import AsyncShuttleAI, ShuttleAI
+if typing.TYPE_CHECKING:
+    from .client import AsyncShuttleAI, ShuttleAI
 
 CACHE_FILE = Path(f"{__title__}-version.json")
 CACHE_DURATION = 86400  # 24 hours in seconds
@@ -23,7 +22,7 @@ def read_cached_version_info() -> typing.Optional[dict[str, typing.Any]]:
             with open(CACHE_FILE, "r") as file:
                 return json.load(file)  # type: ignore
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Error reading cache file: {e}")
+            print(f"Error reading cache file: {e}", file=sys.stderr)
     return None
 
 
@@ -33,7 +32,7 @@ def write_cached_version_info(version_info: dict[str, typing.Any]) -> None:
         with open(CACHE_FILE, "w") as file:
             json.dump(version_info, file)
     except IOError as e:
-        print(f"Error writing to cache file: {e}")
+        print(f"Error writing to cache file: {e}", file=sys.stderr)
 
 
 def is_cache_valid(cache_time: float) -> bool:
@@ -41,27 +40,45 @@ def is_cache_valid(cache_time: float) -> bool:
     return time.time() - cache_time < CACHE_DURATION
 
 
+def is_newer_version(latest_version: str) -> bool:
+    """Check if a version is newer than the installed one."""
+    from packaging import version
+
+    return version.parse(__version__) < version.parse(latest_version)
+
+
 def check_for_updates() -> None:
-    """Check for updates and notify the user if a newer version is available."""
+    """Check for updates and notify the user if a newer version is available.
+
+    The cached version information is used when it is fresh. Otherwise PyPI is queried on a
+    background thread, so that importing the package never waits on the network.
+    """
     cached_version_info = read_cached_version_info()
 
     if cached_version_info:
         cache_time = cached_version_info.get("time")
         if cache_time and is_cache_valid(cache_time):
             latest_version = cached_version_info.get("version")
-            if latest_version and version.parse(__version__) < version.parse(latest_version):
+            if latest_version and is_newer_version(latest_version):
                 print_update_message(latest_version)
             return
 
+    threading.Thread(target=fetch_latest_version, name=f"{__title__}-update-check", daemon=True).start()
+
+
+def fetch_latest_version() -> None:
+    """Fetch the latest version from PyPI, cache it and notify the user if it is newer."""
+    import requests
+
     try:
-        response = requests.get("https://pypi.org/pypi/shuttleai/json")
+        response = requests.get("https://pypi.org/pypi/shuttleai/json", timeout=10)
         response.raise_for_status()
         latest_version = response.json()["info"]["version"]
         write_cached_version_info({"version": latest_version, "time": time.time()})
-        if version.parse(__version__) < version.parse(latest_version):
+        if is_newer_version(latest_version):
             print_update_message(latest_version)
     except requests.RequestException as e:
-        print(f"Could not check for updates: {e}")
+        print(f"Could not check for updates: {e}", file=sys.stderr)
 
 
 def print_update_message(latest_version: str) -> None:
@@ -69,11 +86,21 @@ def print_update_message(latest_version: str) -> None:
     print(
         f"WARNING: You are using an outdated version of {__title__} ({__version__}). "
         f"The latest version is {latest_version}. It is recommended to upgrade using:\n"
-        f">> pip install -U {__title__}"
+        f">> pip install -U {__title__}",
+        file=sys.stderr,
     )
 
 
-_patch_httpx()
+def __getattr__(name: str) -> typing.Any:
+    # the clients (and their HTTP stacks) are imported on first use, which keeps `import shuttleai`
+    # and the CLI's startup fast
+    if name in __all__:
+        from . import client
+
+        return getattr(client, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 check_for_updates()
 
 
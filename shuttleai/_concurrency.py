@@ -0,0 +1,535 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from shuttleai.exceptions import ShuttleAIAPIStatusException, ShuttleAIConnectionException
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+RETRYABLE_EXCEPTIONS = (ShuttleAIAPIStatusException, ShuttleAIConnectionException)
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Reads the ``Retry-After`` header (seconds) from an API status exception, if present."""
+    headers: Dict[str, str] = getattr(exc, "headers", None) or {}
+    for key, value in headers.items():
+        if key.lower() == "retry-after":
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+def _backoff_delay(exc: BaseException, attempt: int, backoff: float, max_backoff: float) -> float:
+    """Computes how long to wait before retry ``attempt`` (0-based), honouring ``Retry-After``."""
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        return min(retry_after, max_backoff)
+    return min(max_backoff, backoff * (2**attempt)) * (0.5 + random.random() / 2)
+
+
+class RateLimitGate:
+    """Shared cooldown between workers.
+
+    When one worker is rate limited (HTTP 429 / 5xx), every worker sharing the gate
+    waits out the same cooldown instead of hammering the API independently.
+    """
+
+    def __init__(self) -> None:
+        self._not_before = 0.0
+        self._lock = threading.Lock()
+
+    def penalize(self, delay: float) -> None:
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + delay)
+
+    def remaining(self) -> float:
+        return max(0.0, self._not_before - time.monotonic())
+
+    def wait(self) -> None:
+        while (remaining := self.remaining()) > 0:
+            time.sleep(remaining)
+
+    async def async_wait(self) -> None:
+        while (remaining := self.remaining()) > 0:
+            await asyncio.sleep(remaining)
+
+
+class RateLimiter:
+    """Token bucket limiting how fast workers spend a shared budget (requests, tokens, ...).
+
+    ``rate`` units are earned per second, up to ``burst``. Spending reserves units ahead, so a
+    single spend larger than ``burst`` is allowed and simply waits longer.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Spends ``amount`` units, returning how long to wait until they are earned."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, amount: float = 1.0) -> None:
+        if delay := self._reserve(amount):
+            time.sleep(delay)
+
+    async def async_acquire(self, amount: float = 1.0) -> None:
+        if delay := self._reserve(amount):
+            await asyncio.sleep(delay)
+
+
+def call_with_retries(
+    fn: Callable[..., R],
+    *args: Any,
+    retries: int = 3,
+    backoff: float = 0.5,
+    max_backoff: float = 30.0,
+    gate: Optional[RateLimitGate] = None,
+    **kwargs: Any,
+) -> R:
+    """Calls ``fn`` retrying on rate limits, transient server errors and connection errors."""
+    attempt = 0
+    while True:
+        if gate:
+            gate.wait()
+        try:
+            return fn(*args, **kwargs)
+        except RETRYABLE_EXCEPTIONS as e:
+            if attempt >= retries:
+                raise
+            delay = _backoff_delay(e, attempt, backoff, max_backoff)
+            attempt += 1
+            if gate:
+                gate.penalize(delay)
+            else:
+                time.sleep(delay)
+
+
+async def async_call_with_retries(
+    fn: Callable[..., Awaitable[R]],
+    *args: Any,
+    retries: int = 3,
+    backoff: float = 0.5,
+    max_backoff: float = 30.0,
+    gate: Optional[RateLimitGate] = None,
+    **kwargs: Any,
+) -> R:
+    """Async version of :func:`call_with_retries`."""
+    attempt = 0
+    while True:
+        if gate:
+            await gate.async_wait()
+        try:
+            return await fn(*args, **kwargs)
+        except RETRYABLE_EXCEPTIONS as e:
+            if attempt >= retries:
+                raise
+            delay = _backoff_delay(e, attempt, backoff, max_backoff)
+            attempt += 1
+            if gate:
+                gate.penalize(delay)
+            else:
+                await asyncio.sleep(delay)
+
+
+class ItemResult(NamedTuple):
+    """The outcome of one item of a batch: its value, or the exception it raised."""
+
+    index: int
+    """The position of the item in the input iterable."""
+
+    value: Any
+    """The result of the item, None if it failed."""
+
+    error: Optional[BaseException] = None
+    """The exception raised for the item, if any."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def call_item(fn: Callable[..., R], item: Any) -> R:
+    """Calls ``fn`` with an item: mappings are keyword arguments, anything else the only argument."""
+    return fn(**item) if isinstance(item, Mapping) else fn(item)
+
+
+def bounded_map(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    concurrency: int = 8,
+    ordered: bool = True,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Iterator[Tuple[int, "Future[R]"]]:
+    """Runs ``fn`` over ``items`` on a thread pool with at most ``concurrency`` calls in flight.
+
+    ``items`` is consumed lazily, so arbitrarily long (or infinite) iterables are fine. Yields
+    ``(index, future)`` pairs as soon as each future is done, in input order when ``ordered``
+    is true and in completion order otherwise. Callers decide whether to ``.result()`` the
+    future (re-raising) or capture ``.exception()`` per item.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    own_executor = executor is None
+    pool = executor or ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="shuttleai")
+    iterator = enumerate(items)
+    pending: Deque[Tuple[int, "Future[R]"]] = deque()
+    in_flight: Set["Future[R]"] = set()
+    indexes: Dict["Future[R]", int] = {}
+
+    def submit_next() -> bool:
+        try:
+            index, item = next(iterator)
+        except StopIteration:
+            return False
+        future = pool.submit(fn, item)
+        if ordered:
+            pending.append((index, future))
+        in_flight.add(future)
+        indexes[future] = index
+        return True
+
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < concurrency:
+                exhausted = not submit_next()
+            if not in_flight:
+                return
+            if ordered:
+                index, future = pending.popleft()
+                wait([future])
+                in_flight.discard(future)
+                del indexes[future]
+                yield index, future
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.discard(future)
+                    yield indexes.pop(future), future
+    finally:
+        for future in in_flight:
+            future.cancel()
+        if own_executor:
+            pool.shutdown(wait=False)
+
+
+async def async_bounded_map(
+    fn: Callable[[T], Awaitable[R]],
+    items: Union[Iterable[T], AsyncIterable[T]],
+    concurrency: int = 8,
+    ordered: bool = True,
+) -> AsyncIterator[Tuple[int, "asyncio.Task[R]"]]:
+    """Async version of :func:`bounded_map`, running ``fn`` as tasks on the current event loop."""
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    if isinstance(items, AsyncIterable):
+        aiterator = items.__aiter__()
+    else:
+        aiterator = _aiter_sync(items)
+
+    index = 0
+    pending: Deque[Tuple[int, "asyncio.Task[R]"]] = deque()
+    in_flight: Set["asyncio.Task[R]"] = set()
+    indexes: Dict["asyncio.Task[R]", int] = {}
+
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < concurrency:
+                try:
+                    item = await aiterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = asyncio.ensure_future(fn(item))
+                if ordered:
+                    pending.append((index, task))
+                in_flight.add(task)
+                indexes[task] = index
+                index += 1
+            if not in_flight:
+                return
+            if ordered:
+                task_index, task = pending.popleft()
+                await asyncio.wait([task])
+                in_flight.discard(task)
+                del indexes[task]
+                yield task_index, task
+            else:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    in_flight.discard(task)
+                    yield indexes.pop(task), task
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def _aiter_sync(items: Iterable[T]) -> AsyncIterator[T]:
+    for item in items:
+        yield item
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _Broadcast:
+    """One upstream stream read by several subscribers, each receiving every item from the start.
+
+    Whichever subscriber runs out of buffered items pulls the next one from upstream, so the stream
+    advances as fast as its fastest reader and keeps going if the first reader stops. Upstream is
+    closed once every subscriber has left.
+    """
+
+    def __init__(self, upstream: Iterator[Any], cond: threading.Condition, on_done: Callable[[], None]) -> None:
+        self._upstream = upstream
+        self._cond = cond
+        self._on_done = on_done
+        self._items: list = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._pumping = False
+        self.subscribers = 0
+
+    def _pump(self) -> None:
+        item, done, error = None, False, None
+        try:
+            item = next(self._upstream)
+        except StopIteration:
+            done = True
+        except BaseException as e:
+            done, error = True, e
+        with self._cond:
+            if done:
+                self._done, self._error = True, error
+                self._on_done()
+            else:
+                self._items.append(item)
+            self._pumping = False
+            self._cond.notify_all()
+
+    def subscribe(self) -> Iterator[Any]:
+        """Iterates the stream; the caller must have counted itself in `subscribers`."""
+        index = 0
+        try:
+            while True:
+                pump = False
+                with self._cond:
+                    while index >= len(self._items) and not self._done and self._pumping:
+                        self._cond.wait()
+                    if index < len(self._items):
+                        item = self._items[index]
+                    elif self._done:
+                        if self._error is not None:
+                            raise self._error
+                        return
+                    else:
+                        self._pumping = pump = True
+                if pump:
+                    self._pump()
+                    continue
+                index += 1
+                yield item
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+                abandoned = self.subscribers == 0 and not self._done
+                if abandoned:
+                    self._done = True
+                    self._on_done()
+            if abandoned and hasattr(self._upstream, "close"):
+                self._upstream.close()
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls (by key) into one.
+
+    While a call is in flight, callers with the same key wait for it and share its result or
+    exception instead of making their own call. Streams are shared the same way: every caller
+    receives every item of the one upstream stream.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+
+    def do(self, key: str, fn: Callable[[], R]) -> R:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore
+
+        try:
+            call.result = fn()
+            return call.result  # type: ignore
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stream(self, key: str, fn: Callable[[], Iterator[R]]) -> Iterator[R]:
+        """Returns a subscription to the in-flight stream with the key, starting it with `fn` if there is none.
+
+        The stream is started lazily, when the first subscriber iterates it.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is None:
+
+                def on_done() -> None:
+                    # called with the lock held
+                    if self._streams.get(key) is broadcast:
+                        del self._streams[key]
+
+                broadcast = self._streams[key] = _Broadcast(_lazy(fn), self._cond, on_done)
+            broadcast.subscribers += 1
+        return broadcast.subscribe()
+
+
+def _lazy(fn: Callable[[], Iterator[R]]) -> Iterator[R]:
+    yield from fn()
+
+
+class _AsyncBroadcast:
+    """Async version of :class:`_Broadcast`; upstream is read by a task of its own."""
+
+    def __init__(self, upstream: AsyncIterator[Any], on_done: Callable[[], None]) -> None:
+        self._upstream = upstream
+        self._on_done = on_done
+        self._items: list = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.subscribers = 0
+
+    async def _run(self) -> None:
+        try:
+            async for item in self._upstream:
+                self._items.append(item)
+                self._notify()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._on_done()
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Iterates the stream; the caller must have counted itself in `subscribers`."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        index = 0
+        try:
+            while True:
+                if index < len(self._items):
+                    index += 1
+                    yield self._items[index - 1]
+                elif self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                else:
+                    await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self._done and self._task is not None:
+                self._task.cancel()
+
+
+class AsyncSingleFlight:
+    """Async version of :class:`SingleFlight`, for calls made on one event loop.
+
+    The shared call runs as a task of its own, so cancelling one caller does not cancel it for
+    the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, "asyncio.Task[Any]"] = {}
+        self._streams: Dict[str, _AsyncBroadcast] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[R]]) -> R:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+
+            def on_done(done: "asyncio.Task[Any]") -> None:
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+                if not done.cancelled():
+                    done.exception()  # retrieved, even if every caller was cancelled
+
+            task.add_done_callback(on_done)
+        return await asyncio.shield(task)  # type: ignore
+
+    def stream(self, key: str, fn: Callable[[], AsyncIterator[R]]) -> AsyncIterator[R]:
+        """Returns a subscription to the in-flight stream with the key, starting it with `fn` if there is none."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+
+            def on_done() -> None:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+
+            broadcast = self._streams[key] = _AsyncBroadcast(fn(), on_done)
+        broadcast.subscribers += 1
+        return broadcast.subscribe()
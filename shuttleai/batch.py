@@ -0,0 +1,484 @@
+import asyncio
+import logging
+import os
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import orjson
+
+from shuttleai._concurrency import RateLimiter, RateLimitGate, async_bounded_map, async_call_with_retries
+from shuttleai.client import AsyncShuttleAI
+from shuttleai.exceptions import ShuttleAIAPIException
+from shuttleai.schemas.chat.completions import ChatCompletionResponse
+from shuttleai.tokens import messages_tokens
+
+logger = logging.getLogger(__name__)
+
+BatchItem = Tuple[str, Union[Dict[str, Any], Exception]]
+
+ID_FIELDS = ("custom_id", "id")
+
+
+def count_lines(path: str) -> int:
+    """Counts the lines of a file, reading it in large binary chunks."""
+    lines, last = 0, b"\n"
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 20):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (last != b"\n")
+
+
+def parse_record(
+    record: Any,
+    line_number: int,
+    id_field: Optional[str] = None,
+    prompt_field: str = "prompt",
+    system: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Turns a JSONL record into its ID and the keyword arguments of `chat.completions.create`.
+
+    Records can be:
+
+    - in the OpenAI batch format, `{"custom_id": ..., "body": {"model": ..., "messages": [...]}}`;
+    - requests themselves, `{"id": ..., "messages": [...], "max_tokens": ...}`;
+    - anything with a prompt in `prompt_field`, sent as a user message after the `system` message.
+
+    The ID is read from `id_field`, else `custom_id` or `id`, else it is the line number.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Batch records must be JSON objects")
+    id_fields = (id_field,) if id_field else ID_FIELDS
+    record_id = next((record[field] for field in id_fields if record.get(field) is not None), line_number)
+
+    if isinstance(record.get("body"), dict):
+        request = dict(record["body"])
+    elif "messages" in record:
+        request = {key: value for key, value in record.items() if key not in id_fields}
+    elif isinstance(record.get(prompt_field), str):
+        request = {"messages": [{"role": "user", "content": record[prompt_field]}]}
+        if system:
+            request["messages"].insert(0, {"role": "system", "content": system})
+    else:
+        raise ValueError(f"Record has no messages and no {prompt_field!r} prompt")
+    request.pop("stream", None)
+    return str(record_id), request
+
+
+def parse_line(
+    line: bytes,
+    line_number: int,
+    id_field: Optional[str] = None,
+    prompt_field: str = "prompt",
+    system: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Like `parse_record`, for a line that is either a JSON object or a plain text prompt."""
+    text = line.strip()
+    if text.startswith(b"{"):
+        try:
+            return parse_record(orjson.loads(text), line_number, id_field, prompt_field, system)
+        except orjson.JSONDecodeError:
+            pass
+    return parse_record({prompt_field: text.decode("utf-8", "replace")}, line_number, None, prompt_field, system)
+
+
+async def aiter_lines(file: BinaryIO, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    """Reads the lines of a binary file (or stdin) on a thread, so waiting for input never blocks the loop."""
+    loop = asyncio.get_running_loop()
+    read = getattr(file, "read1", file.read)
+    pending = b""
+    while chunk := await loop.run_in_executor(None, read, chunk_size):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+class BatchProgress:
+    """Counters of a batch run, with its throughput and estimated time left."""
+
+    def __init__(self, total: Optional[int] = None) -> None:
+        self.total = total
+        """The number of records of the input, if counted."""
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        """Records already completed by an earlier run."""
+        self.started = time.monotonic()
+
+    @property
+    def completed(self) -> int:
+        """Records completed by this run, successfully or not."""
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Records completed per second by this run."""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.total is None:
+            return None
+        return max(0, self.total - self.skipped - self.completed)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds until the run completes at the current throughput, if the total is known."""
+        remaining = self.remaining
+        if remaining is None or not self.throughput:
+            return None
+        return remaining / self.throughput
+
+    def __str__(self) -> str:
+        done = self.skipped + self.completed
+        total = f"/{self.total:,}" if self.total is not None else ""
+        eta = self.eta
+        eta_text = (
+            f", ETA {int(eta // 3600)}:{int(eta % 3600 // 60):02d}:{int(eta % 60):02d}" if eta is not None else ""
+        )
+        resumed = f", {self.skipped:,} resumed" if self.skipped else ""
+        return (
+            f"{done:,}{total} done ({self.succeeded:,} ok, {self.failed:,} failed{resumed}), "
+            f"{self.throughput:.1f} req/s{eta_text}"
+        )
+
+
+def _error_data(error: BaseException) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"type": type(error).__name__, "message": str(error)}
+    if isinstance(error, ShuttleAIAPIException) and error.http_status is not None:
+        data["http_status"] = error.http_status
+    return data
+
+
+def _result_line(record_id: str, result: Union[ChatCompletionResponse, Exception], content_only: bool = False) -> bytes:
+    """The output line of a result: `{"id", "response"}` (or `{"id", "content"}`), or `{"id", "error"}`."""
+    if isinstance(result, Exception):
+        return orjson.dumps({"id": record_id, "error": _error_data(result)})
+    if content_only:
+        return orjson.dumps({"id": record_id, "content": result.choices[0].message.content if result.choices else None})
+    return b'{"id":%b,"response":%b}' % (orjson.dumps(record_id), result.model_dump_json(exclude_none=True).encode())
+
+
+def _completed_ids(output_path: str) -> Set[str]:
+    """Reads the IDs of the successful results of an output file, truncating a partially written last line."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    valid_size = 0
+    with open(output_path, "rb") as file:
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                result = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                break
+            valid_size += len(line)
+            if "response" in result:
+                done.add(result["id"])
+    if valid_size != os.path.getsize(output_path):
+        logger.warning(f"Truncating the partially written last line of {output_path}")
+        os.truncate(output_path, valid_size)
+    return done
+
+
+class BatchRunner:
+    """Runs the chat completion requests of a JSONL file, writing the results to another JSONL file.
+
+    The input is streamed, so files of millions of requests run in constant memory (apart from the
+    IDs of completed requests). At most `concurrency` requests are in flight; rate limits and
+    transient errors are retried with backoff, and a 429 pauses every worker until its
+    `Retry-After` has passed. `requests_per_second` and `tokens_per_minute` (estimated from the
+    messages and `max_tokens`) throttle the run below the account's limits.
+
+    Every result is a line `{"id": ..., "response": {...}}`, or `{"id": ..., "error": {...}}` if the
+    request failed, in completion order. The output doubles as the checkpoint: it is flushed and
+    fsynced every `checkpoint_every` results, and a new run with the same output skips the requests
+    that already succeeded, retrying the failed ones (the last line of an ID is its final result).
+    IDs must therefore be unique within the input.
+
+    Example:
+        ```python
+        runner = BatchRunner("prompts.jsonl", "results.jsonl", model="shuttle-3.5", concurrency=32)
+        progress = asyncio.run(runner.run(AsyncShuttleAI()))
+        ```
+    """
+
+    def __init__(
+        self,
+        input_path: str,
+        output_path: str,
+        model: Optional[str] = None,
+        concurrency: int = 16,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        retries: int = 3,
+        resume: bool = True,
+        checkpoint_every: int = 100,
+        id_field: Optional[str] = None,
+        prompt_field: str = "prompt",
+        system: Optional[str] = None,
+        defaults: Optional[Dict[str, Any]] = None,
+        count_total: bool = True,
+        progress_interval: float = 1.0,
+        on_progress: Optional[Callable[[BatchProgress], None]] = None,
+    ) -> None:
+        """
+        Args:
+            input_path (str): The JSONL file of requests, see `parse_record` for the accepted records
+            output_path (str): The JSONL file the results are appended to
+            model (str): The model of requests that don't specify one
+            concurrency (int): The maximum number of requests in flight
+            requests_per_second (float): The maximum request rate
+            tokens_per_minute (float): The maximum rate of (estimated) tokens
+            retries (int): The number of retries per request on retryable errors
+            resume (bool): Skip the requests that already succeeded in `output_path`, else overwrite it
+            checkpoint_every (int): How many results to write between two fsyncs of the output
+            id_field (str): The field of the request IDs
+            prompt_field (str): The field of the prompts of records without messages
+            system (str): A system message for records with a prompt
+            defaults (dict): Arguments of `chat.completions.create` for requests that don't set them, e.g. `max_tokens`
+            count_total (bool): Count the input's lines first, for the ETA
+            progress_interval (float): Seconds between two calls of `on_progress`
+            on_progress (Callable): Called with the progress while running, and once at the end
+        """
+        self.input_path = input_path
+        self.output_path = output_path
+        self.model = model
+        self.concurrency = concurrency
+        self.retries = retries
+        self.resume = resume
+        self.checkpoint_every = checkpoint_every
+        self.id_field = id_field
+        self.prompt_field = prompt_field
+        self.system = system
+        self.defaults = defaults or {}
+        self.count_total = count_total
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        self._request_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        self._token_limiter = RateLimiter(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+
+    def _records(self, done: Set[str], progress: BatchProgress) -> Iterator[BatchItem]:
+        with open(self.input_path, "rb") as file:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record_id, request = parse_record(
+                        orjson.loads(line), line_number, self.id_field, self.prompt_field, self.system
+                    )
+                except (ValueError, orjson.JSONDecodeError) as e:
+                    yield str(line_number), e
+                    continue
+                if record_id in done:
+                    progress.skipped += 1
+                    continue
+                if self.model and "model" not in request:
+                    request["model"] = self.model
+                yield record_id, {**self.defaults, **request}
+
+    async def _throttle(self, request: Dict[str, Any]) -> None:
+        if self._request_limiter is not None:
+            await self._request_limiter.async_acquire()
+        if self._token_limiter is not None:
+            tokens = messages_tokens(request.get("messages") or ()) + (request.get("max_tokens") or 0)
+            await self._token_limiter.async_acquire(tokens)
+
+    async def run(self, client: AsyncShuttleAI) -> BatchProgress:
+        """Runs the batch with a client, returning the final progress."""
+        done = _completed_ids(self.output_path) if self.resume else set()
+        progress = BatchProgress(count_lines(self.input_path) if self.count_total else None)
+        gate = RateLimitGate()
+
+        async def execute(item: BatchItem) -> Tuple[str, Any]:
+            record_id, request = item
+            if isinstance(request, Exception):
+                return record_id, request
+            await self._throttle(request)
+            try:
+                response = await async_call_with_retries(
+                    client.chat.completions.create, retries=self.retries, gate=gate, **request
+                )
+            except Exception as e:  # recorded per request, the run goes on
+                return record_id, e
+            return record_id, response
+
+        loop = asyncio.get_running_loop()
+        output = open(self.output_path, "ab" if self.resume else "wb")
+        unsynced = 0
+        last_report = time.monotonic()
+        try:
+            async for _, task in async_bounded_map(
+                execute, self._records(done, progress), concurrency=self.concurrency, ordered=False
+            ):
+                record_id, result = task.result()
+                if isinstance(result, Exception):
+                    progress.failed += 1
+                else:
+                    progress.succeeded += 1
+                output.write(_result_line(record_id, result) + b"\n")
+                unsynced += 1
+                if unsynced >= self.checkpoint_every:
+                    output.flush()
+                    await loop.run_in_executor(None, os.fsync, output.fileno())
+                    unsynced = 0
+                if self.on_progress is not None and time.monotonic() - last_report >= self.progress_interval:
+                    self.on_progress(progress)
+                    last_report = time.monotonic()
+        finally:
+            output.flush()
+            os.fsync(output.fileno())
+            output.close()
+        if self.on_progress is not None:
+            self.on_progress(progress)
+        return progress
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    **options: Any,
+) -> BatchProgress:
+    """Runs a batch (see `BatchRunner`) to completion with a new async client.
+
+    Args:
+        input_path (str): The JSONL file of requests
+        output_path (str): The JSONL file the results are appended to
+        api_key (str): The API key, defaults to the SHUTTLEAI_API_KEY environment variable
+        base_url (str): The API base URL, defaults to the SHUTTLEAI_API_BASE environment variable
+        **options: Options of `BatchRunner`
+
+    Returns:
+        BatchProgress: The final counters of the run
+    """
+    runner = BatchRunner(input_path, output_path, **options)
+
+    async def main() -> BatchProgress:
+        async with AsyncShuttleAI(api_key=api_key, base_url=base_url) as client:
+            return await runner.run(client)
+
+    return asyncio.run(main())
+
+
+async def run_lines(
+    client: AsyncShuttleAI,
+    lines: Union[Iterable[bytes], AsyncIterable[bytes]],
+    output: BinaryIO,
+    model: Optional[str] = None,
+    concurrency: int = 16,
+    ordered: bool = False,
+    requests_per_second: Optional[float] = None,
+    retries: int = 3,
+    id_field: Optional[str] = None,
+    prompt_field: str = "prompt",
+    system: Optional[str] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+    content_only: bool = False,
+    progress: Optional[BatchProgress] = None,
+    progress_interval: float = 0.2,
+    on_progress: Optional[Callable[[BatchProgress], None]] = None,
+) -> BatchProgress:
+    """Runs a stream of prompts (one per line) or JSONL records concurrently, writing each result as it completes.
+
+    Unlike `BatchRunner`, nothing is checkpointed: input is consumed as it arrives (e.g. from a
+    pipe) and every result line is flushed to `output` as soon as it is written, in completion
+    order, or in input order if `ordered`.
+
+    Args:
+        client (AsyncShuttleAI): The client sending the requests
+        lines (Union[Iterable[bytes], AsyncIterable[bytes]]): The input lines, see `parse_line`
+        output (BinaryIO): Where the result lines are written, see `BatchRunner` for their format
+        model (str): The model of requests that don't specify one
+        concurrency (int): The maximum number of requests in flight
+        ordered (bool): Write the results in input order rather than as they complete
+        requests_per_second (float): The maximum request rate
+        retries (int): The number of retries per request on retryable errors
+        id_field (str): The field of the request IDs of JSONL records, the line number by default
+        prompt_field (str): The field of the prompts of records without messages
+        system (str): A system message for the prompts
+        defaults (dict): Arguments of `chat.completions.create` for requests that don't set them
+        content_only (bool): Write `{"id", "content"}` lines with the answer instead of the full responses
+        progress (BatchProgress): The counters to update, e.g. with the total of the input if known
+        progress_interval (float): Seconds between two calls of `on_progress`
+        on_progress (Callable): Called with the progress while running, and once at the end
+
+    Returns:
+        BatchProgress: The final counters of the run
+    """
+    progress = progress or BatchProgress()
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    gate = RateLimitGate()
+    defaults = defaults or {}
+
+    async def records() -> AsyncIterator[BatchItem]:
+        line_number = 0
+        iterator = lines if isinstance(lines, AsyncIterable) else _aiter(lines)
+        async for line in iterator:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                record_id, request = parse_line(line, line_number, id_field, prompt_field, system)
+            except ValueError as e:
+                yield str(line_number), e
+                continue
+            if model and "model" not in request:
+                request["model"] = model
+            yield record_id, {**defaults, **request}
+
+    async def execute(item: BatchItem) -> Tuple[str, Any]:
+        record_id, request = item
+        if isinstance(request, Exception):
+            return record_id, request
+        if limiter is not None:
+            await limiter.async_acquire()
+        try:
+            return record_id, await async_call_with_retries(
+                client.chat.completions.create, retries=retries, gate=gate, **request
+            )
+        except Exception as e:  # written per request, the run goes on
+            return record_id, e
+
+    last_report = time.monotonic()
+    async for _, task in async_bounded_map(execute, records(), concurrency=concurrency, ordered=ordered):
+        record_id, result = task.result()
+        if isinstance(result, Exception):
+            progress.failed += 1
+        else:
+            progress.succeeded += 1
+        output.write(_result_line(record_id, result, content_only) + b"\n")
+        output.flush()
+        if on_progress is not None and time.monotonic() - last_report >= progress_interval:
+            on_progress(progress)
+            last_report = time.monotonic()
+    if on_progress is not None:
+        on_progress(progress)
+    return progress
+
+
+async def _aiter(items: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for item in items:
+        yield item
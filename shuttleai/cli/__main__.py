@@ -1,78 +1,34 @@
 import argparse
-import json
 import logging
 import os
-import readline
+import signal
 import sys
-from typing import Dict, KeysView, List, Optional, Union
-
-import yaml
-
-from shuttleai import ShuttleAI
-from shuttleai.schemas.chat.completions import ChatMessage
-
-MODEL_LIST: List[str] = [
-    "shuttleai/shuttle-3.5",
-    "shuttle-2-turbo",
-    "shuttle-3.5",
-    "shuttleai/shuttle-3.5-mini",
-    "shuttle-3.5-mini",
-    "openai/gpt-4o-mini-2024-07-18",
-    "gpt-4o-mini",
-    "gpt-4o-mini-2024-07-18",
-    "openai/chatgpt-4o-latest",
-    "chatgpt-4o",
-    "chatgpt-4o-latest",
-    "openai/gpt-4o-2024-08-06",
-    "gpt-4o-16k",
-    "gpt-4o-2024-08-06",
-    "openai/gpt-4o-2024-05-13",
-    "gpt-4o",
-    "gpt-4o-2024-05-13",
-    "openai/gpt-4-turbo-2024-04-09",
-    "gpt-4-turbo",
-    "gpt-4-turbo-2024-04-09",
-    "openai/gpt-4-0125-preview",
-    "gpt-4-turbo-preview",
-    "gpt-4-0125-preview",
-    "openai/gpt-4-1106-preview",
-    "gpt-4-1106-preview",
-    "openai/gpt-4-0613",
-    "gpt-4",
-    "gpt-4-0613",
-    "openai/gpt-3.5-turbo-0125",
-    "gpt-3.5-turbo",
-    "gpt-3.5-turbo-16k",
-    "gpt-3.5-turbo-0125",
-    "openai/gpt-3.5-turbo-1106",
-    "gpt-3.5-turbo-1106",
-    "anthropic/claude-3-5-sonnet-20240620",
-    "claude-3-5-sonnet",
-    "claude-3.5-sonnet",
-    "claude-3-5-sonnet-20240620",
-    "anthropic/claude-3-haiku-20240307",
-    "claude-3-haiku",
-    "claude-3-haiku-20240307",
-    "meta-llama/meta-llama-3.1-405b-instruct",
-    "llama-3.1-405b",
-    "meta-llama-3.1-405b-instruct",
-    "meta-llama/meta-llama-3.1-70b-instruct",
-    "llama-3.1-70b",
-    "meta-llama-3.1-70b-instruct",
-    "meta-llama/meta-llama-3.1-8b-instruct",
-    "llama-3.1-8b",
-    "meta-llama-3.1-8b-instruct",
-]
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Dict, KeysView, List, Optional, TextIO, Union
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from shuttleai import AsyncShuttleAI
+    from shuttleai.conversation import Conversation
+    from shuttleai.sessions import SessionStore
+
 DEFAULT_MODEL: str = "shuttle-3.5"
 LOG_FORMAT: str = "%(asctime)s - %(levelname)s - %(message)s"
-# A dictionary of all commands and their arguments, used for tab completion.
+# The formats of `shuttleai.sessions.EXPORT_FORMATS`, repeated here so that building the argument parser
+# does not import the SDK (and its HTTP clients) before a command needs it.
+EXPORT_FORMATS = ("json", "jsonl", "txt", "yaml")
+# A dictionary of all commands and their arguments, used for tab completion. The models of `/model`
+# are filled in from the client's model catalog.
 COMMAND_LIST: Dict[str, Union[Dict[str, Dict], Dict]] = {
     "/new": {},
     "/help": {},
-    "/model": {model: {} for model in MODEL_LIST},  # Nested completions for models
+    "/model": {},
     "/system": {},
     "/config": {},
-    "/download": {"json": {}, "txt": {}, "yaml": {}},
+    "/download": {format: {} for format in EXPORT_FORMATS},
+    "/sessions": {},
+    "/resume": {},
     "/quit": {},
     "/exit": {},
 }
@@ -80,6 +36,29 @@ COMMAND_LIST: Dict[str, Union[Dict[str, Dict], Dict]] = {
 logger = logging.getLogger("chatbot")
 
 
+def model_cache_path() -> str:
+    """The file the CLI persists the model catalog to, so completions are available at startup."""
+    return os.path.join(os.path.expanduser("~"), ".cache", "shuttleai", "models.json")
+
+
+def session_dir() -> str:
+    """The directory the CLI saves chats to, under `$XDG_DATA_HOME` (`~/.local/share` by default)."""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "shuttleai", "sessions")
+
+
+def open_store(args: argparse.Namespace) -> Optional["SessionStore"]:
+    """Opens the session store selected by the arguments, None if chats are not saved."""
+    if args.store == "none":
+        return None
+    from shuttleai.sessions import JSONLSessionStore, SQLiteSessionStore
+
+    if args.store == "sqlite":
+        os.makedirs(args.session_dir, exist_ok=True)
+        return SQLiteSessionStore(os.path.join(args.session_dir, "sessions.db"), fsync=args.fsync)
+    return JSONLSessionStore(args.session_dir, fsync=args.fsync)
+
+
 def find_completions(
     command_dict: Dict[str, Union[Dict[str, Dict], Dict]], parts: list[str]
 ) -> Union[KeysView[str], List[str]]:
@@ -91,40 +70,141 @@ def find_completions(
         return [cmd for cmd in command_dict if cmd.startswith(parts[0])]
 
 
-def completer(text: str, state: int) -> Optional[str]:
-    buffer = readline.get_line_buffer()  # type: ignore
-    line_parts = buffer.lstrip().split(" ")
-    options = find_completions(COMMAND_LIST, line_parts[:-1])
+class TerminalWriter:
+    """Writes streamed text to a terminal in batches, with at most one write and flush per `interval`.
 
-    try:
-        return [option for option in options if option.startswith(line_parts[-1])][state]
-    except IndexError:
-        return None
+    Flushing the terminal on every token costs a system call (and a repaint) per token; batching
+    keeps the output smooth at any token rate, and a pending batch is never delayed by more than
+    `interval` seconds.
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout, interval: float = 0.03) -> None:
+        self.stream = stream
+        self.interval = interval
+        self._parts: List[str] = []
+        self._handle: Optional["asyncio.TimerHandle"] = None
+
+    def write(self, text: str) -> None:
+        import asyncio
 
+        self._parts.append(text)
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self.interval, self.flush)
 
-readline.set_completer(completer)  # type: ignore
-readline.set_completer_delims(" ")  # type: ignore
-# Enable tab completion
-readline.parse_and_bind("tab: complete")  # type: ignore
+    def flush(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts.clear()
+        self.stream.flush()
 
 
 class ChatBot:
-    def __init__(self, api_key: str, model: str, system_message: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        system_message: Optional[str] = None,
+        base_url: Optional[str] = None,
+        store: Optional["SessionStore"] = None,
+    ):
         if not api_key:
             raise ValueError("An API key must be provided to use the ShuttleAI API.")
-        self.client = ShuttleAI(api_key=api_key)
+        self.api_key = api_key
+        self.base_url = base_url
         self.model = model
         self.system_message = system_message
-        self.messages: List[ChatMessage] = []
+        self.messages: Optional["Conversation"] = None
+        """The current chat, created with its first message."""
+        self.store = store
+        """Where chats are saved as they go, if they are."""
+        self.session_id: Optional[str] = None
+        self.writer = TerminalWriter()
+        self._loop: Optional["asyncio.AbstractEventLoop"] = None
+        self._client: Optional["AsyncShuttleAI"] = None
+        self._client_error: Optional[BaseException] = None
+        # asyncio and the SDK are imported, and the client created, while the user types the first message
+        self._loader = threading.Thread(target=self._load_client, name="shuttleai-cli-loader", daemon=True)
+
+    def _load_client(self) -> None:
+        try:
+            import asyncio
+
+            from shuttleai import AsyncShuttleAI
+
+            self._loop = asyncio.new_event_loop()
+
+            cache_path = model_cache_path()
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self._client = AsyncShuttleAI(api_key=self.api_key, base_url=self.base_url, model_cache_path=cache_path)
+        except BaseException as e:
+            self._client_error = e
+
+    @property
+    def client(self) -> "AsyncShuttleAI":
+        self._loader.join()
+        if self._client is None:
+            raise self._client_error or RuntimeError("The client could not be created")
+        return self._client
+
+    @property
+    def loop(self) -> "asyncio.AbstractEventLoop":
+        self._loader.join()
+        if self._loop is None:
+            raise self._client_error or RuntimeError("The event loop could not be created")
+        return self._loop
+
+    @property
+    def model_ids(self) -> List[str]:
+        """The models known to the client's catalog (empty until it is loaded)."""
+        if self._client is None:
+            return []
+        return self._client.model_catalog.model_ids
+
+    def completions(self) -> Dict[str, Union[Dict[str, Dict], Dict]]:
+        session_ids = self.store.ids()[:100] if self.store is not None else []
+        return {
+            **COMMAND_LIST,
+            "/model": {model: {} for model in self.model_ids},
+            "/resume": {session_id: {} for session_id in session_ids},
+        }
+
+    def completer(self, text: str, state: int) -> Optional[str]:
+        import readline
+
+        buffer = readline.get_line_buffer()
+        line_parts = buffer.lstrip().split(" ")
+        options = find_completions(self.completions(), line_parts[:-1])
+
+        try:
+            return [option for option in options if option.startswith(line_parts[-1])][state]
+        except IndexError:
+            return None
+
+    def setup_completion(self) -> None:
+        try:
+            import readline
+        except ImportError:  # e.g. on Windows
+            return
+        readline.set_completer(self.completer)
+        readline.set_completer_delims(" ")
+        # Enable tab completion
+        readline.parse_and_bind("tab: complete")
 
     def opening_instructions(self) -> None:
         print(
             """
 To chat: type your message and hit enter
+To stop a response: hit CTRL+C while it is generated
 To start a new chat: /new
 To switch model: /model <model name>
 To switch system message: /system <message>
 To see current config: /config
+To list saved chats: /sessions
+To resume a saved chat: /resume <id> (the latest without an id)
+To download the chat: /download <json|jsonl|txt|yaml>
 To exit: /exit, /quit, or hit CTRL+C
 To see this help: /help
 HINT: We support TAB autocompletion for commands and model names!
@@ -135,15 +215,86 @@ HINT: We support TAB autocompletion for commands and model names!
         print("")
         print(f"Starting new chat with model: \033[38;5;105m{self.model}\033[0m")
         print("")
-        self.messages = []
+        self.messages = None
+        self.session_id = None
+
+    def start_chat(self) -> "Conversation":
+        from shuttleai.conversation import Conversation
+
+        messages = Conversation()
+        if self.store is not None:
+            try:
+                self.session_id = self.store.create({"model": self.model, "system_message": self.system_message})
+            except Exception as e:
+                logger.error(f"Error saving chat: {e}")
         if self.system_message:
-            self.messages.append(ChatMessage(role="system", content=self.system_message))
+            self.save(messages.add("system", self.system_message))
+        return messages
+
+    def save(self, message: Dict) -> None:
+        """Appends a message of the current chat to its session."""
+        if self.store is None or self.session_id is None:
+            return
+        try:
+            self.store.append(self.session_id, message)
+        except Exception as e:
+            logger.error(f"Error saving chat: {e}")
+
+    def unsave(self) -> None:
+        """Drops the last message of the current chat from its session."""
+        if self.store is None or self.session_id is None:
+            return
+        try:
+            self.store.pop(self.session_id)
+        except Exception as e:
+            logger.error(f"Error saving chat: {e}")
+
+    def list_sessions(self, limit: int = 20) -> None:
+        import time
+
+        if self.store is None:
+            logger.error("Chats are not saved (--store none)")
+            return
+        print("")
+        for info in self.store.sessions(limit):
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(info.updated))
+            print(f"\033[38;5;105m{info.id}\033[0m  {updated}  {info.title}")
+        print("")
+
+    def resume(self, session_id: str = "") -> None:
+        """Continues a saved chat, the latest if no id (or id prefix) is given."""
+        from shuttleai.conversation import Conversation
+
+        if self.store is None:
+            logger.error("Chats are not saved (--store none)")
+            return
+        try:
+            session_id = self.store.resolve(session_id) if session_id else self.store.latest() or ""
+            if not session_id:
+                logger.error("There is no saved chat to resume")
+                return
+            info = self.store.info(session_id)
+            messages = Conversation(self.store.iter_messages(session_id))
+        except Exception as e:
+            logger.error(f"Error resuming chat: {e}")
+            return
+        self.model = info.metadata.get("model") or self.model
+        self.system_message = info.metadata.get("system_message")
+        self.messages, self.session_id = messages, session_id
+        print("")
+        print(f"Resumed chat {session_id} ({len(messages)} messages) with model: \033[38;5;105m{self.model}\033[0m")
+        if len(messages) and messages[-1]["role"] == "assistant":
+            print("")
+            print("\033[38;5;105mSHUTTLEAI\033[0m:")
+            print("")
+            print(messages[-1].get("content") or "")
 
     def switch_model(self, input: str) -> None:
         model = self.get_arguments(input)
-        if model in MODEL_LIST:
+        model_ids = self.model_ids
+        if model and (not model_ids or model in model_ids):
             self.model = model
-            logger.info(f"Switched to model \033[38;5;105m{model}\033[")
+            logger.info(f"Switched to model \033[38;5;105m{model}\033[0m")
         else:
             logger.error(f"Invalid model name: {model}")
 
@@ -167,24 +318,58 @@ HINT: We support TAB autocompletion for commands and model names!
         return input("\033[38;2;50;168;82mUser: \033[0m")
 
     def run_inference(self, content: str) -> None:
+        """Streams a response, until it completes or is cancelled with Ctrl+C."""
+        task = self.loop.create_task(self.generate(content))
+        try:
+            self.loop.add_signal_handler(signal.SIGINT, task.cancel)
+            handles_signal = True
+        except (NotImplementedError, RuntimeError):  # no loop signal handlers on Windows
+            handles_signal = False
+        try:
+            self.loop.run_until_complete(task)
+        except KeyboardInterrupt:
+            task.cancel()
+            self.loop.run_until_complete(task)
+        finally:
+            if handles_signal:
+                self.loop.remove_signal_handler(signal.SIGINT)
+
+    async def generate(self, content: str) -> None:
+        import asyncio
+
         print("")
         print("\033[38;5;105mSHUTTLEAI\033[0m:")
         print("")
 
-        self.messages.append(ChatMessage(role="user", content=content))
+        if self.messages is None:
+            self.messages = self.start_chat()
+        self.save(self.messages.add("user", content))
 
-        assistant_response = ""
+        parts: List[str] = []
         logger.debug(f"Running inference with model: {self.model}")
         logger.debug(f"Sending messages: {self.messages}")
-        for chunk in self.client.chat.completions.create(model=self.model, messages=self.messages, stream=True):
-            if response := chunk.first_choice.delta.content:
-                print(response, end="", flush=True)
-                assistant_response += response
-
+        try:
+            stream = await self.client.chat.completions.create(model=self.model, messages=self.messages, stream=True)
+            async for chunk in stream:
+                if chunk.choices and (response := chunk.first_choice.delta.content):
+                    self.writer.write(response)
+                    parts.append(response)
+        except asyncio.CancelledError:
+            self.writer.flush()
+            print("\n\033[2m[stopped]\033[0m", end="")
+        except Exception as e:
+            self.writer.flush()
+            print("")
+            logger.error(e)
+        self.writer.flush()
         print("", flush=True)
 
-        if assistant_response:
-            self.messages.append(ChatMessage(role="assistant", content=assistant_response))
+        if parts:
+            self.save(self.messages.add("assistant", "".join(parts)))
+        else:
+            # nothing to answer to, the user message is dropped so the roles keep alternating
+            self.messages.pop()
+            self.unsave()
         logger.debug(f"Current messages: {self.messages}")
 
     def get_command(self, input: str) -> str:
@@ -197,7 +382,7 @@ HINT: We support TAB autocompletion for commands and model names!
             return ""
 
     def is_command(self, input: str) -> bool:
-        return self.get_command(input) in COMMAND_LIST
+        return bool(input.strip()) and self.get_command(input) in COMMAND_LIST
 
     def execute_command(self, input: str) -> None:
         command = self.get_command(input)
@@ -215,48 +400,248 @@ HINT: We support TAB autocompletion for commands and model names!
             self.show_config()
         elif command == "/download":
             self.download_conversation(input)
+        elif command == "/sessions":
+            self.list_sessions()
+        elif command == "/resume":
+            self.resume(self.get_arguments(input))
 
     def download_conversation(self, input: str) -> None:
+        from shuttleai.sessions import export_messages
+
         format = self.get_arguments(input).lower()
-        if format not in ["json", "txt", "yaml"]:
-            logger.error("Invalid format. Choose from 'json', 'txt', or 'yaml'.")
+        if format not in EXPORT_FORMATS:
+            logger.error(f"Invalid format. Choose from {', '.join(EXPORT_FORMATS)}.")
             return
 
         filename = f"conversation.{format}"
         try:
-            if format == "json":
-                with open(filename, "w") as f:
-                    json.dump([msg.model_dump(exclude_none=True) for msg in self.messages], f, indent=4)
-            elif format == "txt":
-                with open(filename, "w") as f:
-                    for msg in self.messages:
-                        f.write(f"{msg.role.capitalize()}: {msg.content}\n\n")
-            elif format == "yaml":
-                with open(filename, "w") as f:
-                    yaml.dump([msg.model_dump(exclude_none=True) for msg in self.messages], f, default_flow_style=False)
+            with open(filename, "w", encoding="utf-8") as f:
+                if self.store is not None and self.session_id is not None:
+                    # streamed from the session, so long chats are not serialized in memory at once
+                    self.store.export(self.session_id, f, format)
+                else:
+                    export_messages(self.messages or [], f, format)
             logger.info(f"Conversation saved to {filename}")
         except Exception as e:
             logger.error(f"Error saving conversation: {e}")
 
-    def start(self) -> None:
+    def start(self, resume: Optional[str] = None) -> None:
+        self.setup_completion()
         self.opening_instructions()
         self.new_chat()
+        self._loader.start()
+        if resume is not None:
+            self.resume(resume)
         while True:
             try:
                 input = self.collect_user_input()
-                if self.is_command(input):
-                    self.execute_command(input)
-                else:
-                    self.run_inference(input)
-
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
+                print("")
                 self.exit()
+            if self.is_command(input):
+                self.execute_command(input)
+            elif input.strip():
+                self.run_inference(input)
 
     def exit(self) -> None:
         logger.debug("Exiting chatbot")
+        if self.store is not None:
+            self.store.close()
+        if self._loop is not None:
+            if self._client is not None:
+                self._loop.run_until_complete(self._client.close())
+            self._loop.close()
         sys.exit(0)
 
 
+def run_batch(args: argparse.Namespace) -> None:
+    from shuttleai.batch import BatchProgress
+    from shuttleai.batch import run_batch as run
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}.results.jsonl"
+    defaults = {
+        k: v for k, v in {"max_tokens": args.max_tokens, "temperature": args.temperature}.items() if v is not None
+    }
+
+    def report(progress: BatchProgress) -> None:
+        print(f"\r\033[K{progress}", end="", file=sys.stderr, flush=True)
+
+    try:
+        progress = run(
+            args.input,
+            output,
+            api_key=args.api_key,
+            base_url=args.base_url,
+            model=args.batch_model,
+            concurrency=args.concurrency,
+            requests_per_second=args.rps,
+            tokens_per_minute=args.tpm,
+            retries=args.retries,
+            resume=not args.no_resume,
+            id_field=args.id_field,
+            prompt_field=args.prompt_field,
+            system=args.system,
+            defaults=defaults,
+            on_progress=report,
+        )
+    except KeyboardInterrupt:
+        print("", file=sys.stderr)
+        logger.info("Interrupted. Run the same command again to resume.")
+        sys.exit(130)
+    print("", file=sys.stderr)
+    logger.info(f"Results written to {output}")
+    if progress.failed:
+        sys.exit(1)
+
+
+def add_batch_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    parser = subparsers.add_parser(
+        "batch",
+        help="Run the chat completion requests of a JSONL file",
+        description="Run the chat completion requests of a JSONL file, writing the results to a JSONL file. "
+        "Interrupted runs resume where they stopped.",
+    )
+    parser.add_argument("input", help="JSONL file of requests (OpenAI batch records, requests, or prompts)")
+    parser.add_argument("-o", "--output", help="JSONL file of results. Defaults to <input>.results.jsonl")
+    parser.add_argument(
+        "-m", "--model", dest="batch_model", default=DEFAULT_MODEL, help="Model of requests without one"
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Requests in flight. Defaults to %(default)s")
+    parser.add_argument("--rps", type=float, help="Maximum requests per second")
+    parser.add_argument("--tpm", type=float, help="Maximum (estimated) tokens per minute")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request. Defaults to %(default)s")
+    parser.add_argument("--id-field", help="Field of the request IDs. Defaults to custom_id, id, or the line number")
+    parser.add_argument("--prompt-field", default="prompt", help="Field of the prompts of records without messages")
+    parser.add_argument("--system", help="System message for records with a prompt")
+    parser.add_argument("--max-tokens", type=int, help="max_tokens of requests without one")
+    parser.add_argument("--temperature", type=float, help="temperature of requests without one")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming")
+
+
+def run_pipe(args: argparse.Namespace) -> None:
+    import asyncio
+
+    from shuttleai import AsyncShuttleAI
+    from shuttleai.batch import BatchProgress, aiter_lines, count_lines, run_lines
+
+    inputs = args.inputs or ["-"]
+    defaults = {
+        k: v for k, v in {"max_tokens": args.max_tokens, "temperature": args.temperature}.items() if v is not None
+    }
+    show_progress = not args.quiet and sys.stderr.isatty()
+    total = sum(count_lines(path) for path in inputs) if show_progress and "-" not in inputs else None
+
+    def report(progress: BatchProgress) -> None:
+        print(f"\r\033[K{progress}", end="", file=sys.stderr, flush=True)
+
+    async def lines() -> AsyncIterator[bytes]:
+        for path in inputs:
+            if path == "-":
+                async for line in aiter_lines(sys.stdin.buffer):
+                    yield line
+                continue
+            with open(path, "rb") as file:
+                async for line in aiter_lines(file):
+                    yield line
+
+    async def run() -> BatchProgress:
+        async with AsyncShuttleAI(api_key=args.api_key, base_url=args.base_url) as client:
+            return await run_lines(
+                client,
+                lines(),
+                sys.stdout.buffer,
+                model=args.run_model,
+                concurrency=args.jobs,
+                ordered=args.ordered,
+                requests_per_second=args.rps,
+                retries=args.retries,
+                id_field=args.id_field,
+                prompt_field=args.prompt_field,
+                system=args.system,
+                defaults=defaults,
+                content_only=args.content,
+                progress=BatchProgress(total),
+                on_progress=report if show_progress else None,
+            )
+
+    try:
+        progress = asyncio.run(run())
+    except KeyboardInterrupt:
+        if show_progress:
+            print("", file=sys.stderr)
+        sys.exit(130)
+    except BrokenPipeError:
+        # the reader of stdout went away, e.g. `shuttleai run ... | head`
+        sys.stderr.close()
+        sys.exit(0)
+    if show_progress:
+        print("", file=sys.stderr)
+    if progress.failed:
+        sys.exit(1)
+
+
+def add_run_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    parser = subparsers.add_parser(
+        "run",
+        help="Run prompts or JSONL requests from stdin or files, writing JSONL results to stdout",
+        description="Run prompts (one per line) or JSONL requests concurrently, from files or stdin, "
+        "writing each result to stdout as a JSONL line as soon as it completes. "
+        "Example: cat prompts.jsonl | shuttleai run -j 64 > results.jsonl",
+    )
+    parser.add_argument("inputs", nargs="*", help="Input files, '-' or nothing for stdin")
+    parser.add_argument("-m", "--model", dest="run_model", default=DEFAULT_MODEL, help="Model of requests without one")
+    parser.add_argument("-j", "--jobs", type=int, default=16, help="Requests in flight. Defaults to %(default)s")
+    parser.add_argument("--ordered", action="store_true", help="Write results in input order, not as they complete")
+    parser.add_argument("--content", action="store_true", help="Write only the answers, as {id, content} lines")
+    parser.add_argument("--rps", type=float, help="Maximum requests per second")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per request. Defaults to %(default)s")
+    parser.add_argument("--id-field", help="Field of the request IDs of JSONL records. Defaults to the line number")
+    parser.add_argument("--prompt-field", default="prompt", help="Field of the prompts of records without messages")
+    parser.add_argument("--system", help="System message for prompts")
+    parser.add_argument("--max-tokens", type=int, help="max_tokens of requests without one")
+    parser.add_argument("--temperature", type=float, help="temperature of requests without one")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Don't show the progress line on stderr")
+
+
+def run_sessions(args: argparse.Namespace) -> None:
+    import time
+
+    store = open_store(args)
+    if store is None:
+        logger.error("Chats are not saved (--store none)")
+        sys.exit(1)
+    with store:
+        if args.session is None:
+            for info in store.sessions(args.limit):
+                updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(info.updated))
+                print(f"{info.id}  {updated}  {info.metadata.get('model') or '':<16} {info.title}")
+            return
+        try:
+            session_id = store.resolve(args.session)
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    store.export(session_id, f, args.format)
+            else:
+                store.export(session_id, sys.stdout, args.format)
+        except BrokenPipeError:
+            sys.stderr.close()  # e.g. piped into head
+        except Exception as e:
+            logger.error(e)
+            sys.exit(1)
+
+
+def add_sessions_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    parser = subparsers.add_parser(
+        "sessions",
+        help="List the saved chats, or export one",
+        description="List the saved chats, newest first, or export the chat of a session id (or id prefix).",
+    )
+    parser.add_argument("session", nargs="?", help="The session id (or a unique prefix of it) to export")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="json", help="Export format")
+    parser.add_argument("-o", "--output", help="Export file. Defaults to stdout")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="Sessions listed. Defaults to %(default)s")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="A simple chatbot using the ShuttleAI API")
     parser.add_argument(
@@ -264,15 +649,48 @@ def main() -> None:
         default=os.environ.get("SHUTTLEAI_API_KEY"),
         help="ShuttleAI API key. Defaults to environment variable SHUTTLEAI_API_KEY",
     )
+    parser.add_argument(
+        "--base-url",
+        default=os.environ.get("SHUTTLEAI_API_BASE"),
+        help="API base URL. Defaults to environment variable SHUTTLEAI_API_BASE, else the ShuttleAI API",
+    )
     parser.add_argument(
         "-m",
         "--model",
-        choices=MODEL_LIST,
         default=DEFAULT_MODEL,
-        help="Model for chat inference. Choices are %(choices)s. Defaults to %(default)s",
+        help="Model for chat inference (TAB completes model names in the chat). Defaults to %(default)s",
     )
     parser.add_argument("-s", "--system-message", help="Optional system message to prepend.")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument(
+        "-r",
+        "--resume",
+        nargs="?",
+        const="",
+        metavar="ID",
+        help="Resume a saved chat by id (or id prefix), the latest if no id is given",
+    )
+    parser.add_argument(
+        "--store",
+        choices=["jsonl", "sqlite", "none"],
+        default="jsonl",
+        help="How chats are saved as they go: a JSONL file per chat, a SQLite database, or not at all. "
+        "Defaults to %(default)s",
+    )
+    parser.add_argument(
+        "--fsync",
+        choices=["always", "interval", "never"],
+        default="interval",
+        help="When saved chats are synced to disk: after every message, at most once a second, or when "
+        "the OS decides. Defaults to %(default)s",
+    )
+    parser.add_argument(
+        "--session-dir", default=session_dir(), help="Directory of the saved chats. Defaults to %(default)s"
+    )
+    subparsers = parser.add_subparsers(dest="command", title="commands")
+    add_batch_parser(subparsers)
+    add_run_parser(subparsers)
+    add_sessions_parser(subparsers)
 
     args = parser.parse_args()
 
@@ -287,11 +705,21 @@ def main() -> None:
     ch.setFormatter(formatter)
     logger.addHandler(ch)
 
+    if args.command == "batch":
+        run_batch(args)
+        return
+    if args.command == "run":
+        run_pipe(args)
+        return
+    if args.command == "sessions":
+        run_sessions(args)
+        return
+
     logger.debug(f"Starting chatbot with model: {args.model}, " f"system message: {args.system_message}")
 
     try:
-        bot = ChatBot(args.api_key, args.model, args.system_message)
-        bot.start()
+        bot = ChatBot(args.api_key, args.model, args.system_message, args.base_url, open_store(args))
+        bot.start(args.resume)
     except Exception as e:
         logger.error(e)
         sys.exit(1)
@@ -1,4 +1,8 @@
+from shuttleai._patch import _patch_httpx
+
 from ._async import AsyncShuttleAI
 from ._sync import ShuttleAI
 
+_patch_httpx()
+
 __all__ = ["ShuttleAI", "AsyncShuttleAI"]
@@ -1,4 +1,19 @@
-from typing import Any, AsyncIterable, AsyncIterator, Dict, Literal, Mapping, Optional, Type, Union, overload
+import asyncio
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Type,
+    Union,
+    overload,
+)
 
 import aiohttp
 import orjson
@@ -7,21 +22,21 @@ from aiofiles import open as aopen
 from aiohttp import ClientTimeout
 
 from shuttleai import resources
+from shuttleai._concurrency import AsyncSingleFlight
 from shuttleai._types import DEFAULT_AIOTTP_TIMEOUT, AIOHTTPTimeoutTypes
 from shuttleai.client.base import ClientBase
+from shuttleai.client.catalog import MODELS_ENDPOINT, VERBOSE_MODELS_ENDPOINT
+from shuttleai.context import ContextWindow
 from shuttleai.exceptions import (
     ShuttleAIAPIException,
     ShuttleAIAPIStatusException,
     ShuttleAIConnectionException,
     ShuttleAIException,
 )
+from shuttleai.resources.chat.caching import ResponseCache
+from shuttleai.resources.etc.web_search import SearchCache
 from shuttleai.schemas.chat.completions import ChatCompletionResponse, ChatCompletionStreamResponse
-from shuttleai.schemas.models.models import (
-    BaseModelCard,
-    ListModelsResponse,
-    ListVerboseModelsResponse,
-    ProxyCard,
-)
+from shuttleai.schemas.models.models import BaseModelCard, ListModelsResponse, ListVerboseModelsResponse
 
 
 class AsyncShuttleAI(ClientBase):
@@ -38,8 +53,27 @@ class AsyncShuttleAI(ClientBase):
         timeout: AIOHTTPTimeoutTypes = DEFAULT_AIOTTP_TIMEOUT,
         default_headers: Mapping[str, str] | None = None,
         session: Optional[aiohttp.ClientSession] = None,
+        model_cache_ttl: float = 3600.0,
+        model_cache_path: Optional[str] = None,
+        validate_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce_endpoints: Iterable[str] = (),
+        context_window: Optional[ContextWindow] = None,
+        search_cache: Optional[SearchCache] = None,
     ):
-        super().__init__(base_url, api_key, timeout)
+        super().__init__(
+            base_url,
+            api_key,
+            timeout,
+            model_cache_ttl,
+            model_cache_path,
+            validate_requests,
+            response_cache,
+            coalesce_endpoints,
+            context_window,
+            search_cache,
+        )
+        self._singleflight = AsyncSingleFlight()
 
         if self.api_key is None:
             raise ShuttleAIException(
@@ -56,6 +90,7 @@ class AsyncShuttleAI(ClientBase):
         self._session: Optional[aiohttp.ClientSession] = None
         if session:
             self._session = session
+        self._background_tasks: Set["asyncio.Task[None]"] = set()
 
         self.chat: resources.AsyncChat = resources.AsyncChat(self)
         self.images: resources.AsyncImages = resources.AsyncImages(self)
@@ -81,6 +116,8 @@ class AsyncShuttleAI(ClientBase):
         await self.close()
 
     async def close(self) -> None:
+        for task in self._background_tasks:
+            task.cancel()
         if self._session:
             await self._session.close()
             self._session = None
@@ -108,6 +145,63 @@ class AsyncShuttleAI(ClientBase):
 
         return json_response
 
+    @asynccontextmanager
+    async def _stream_raw(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Dict[str, Any]] = None,
+        accept_header: str = "application/octet-stream",
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Opens a streamed request whose body is not JSON (e.g. video content).
+
+        The response body is not read; callers iterate `response.content` so memory use stays
+        constant regardless of the body size.
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+
+        request_headers = {
+            "Accept": accept_header,
+            "User-Agent": f"shuttleai-python/a-{self._version}",
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        if self.default_headers:
+            request_headers.update(self.default_headers)
+        if headers:
+            request_headers.update(headers)
+
+        url = f"{self._base_url}{path}"
+
+        self._logger.debug(f"Sending raw request: {method} {url} {json}")
+
+        try:
+            async with self._session.request(
+                method,
+                url,
+                headers=request_headers,
+                data=orjson.dumps(json) if json else None,
+            ) as response:
+                await self._check_response_status_codes(response)
+                yield response
+        except aiohttp.ClientConnectorError as e:
+            raise ShuttleAIConnectionException(str(e)) from e
+        except aiohttp.ClientError as e:
+            raise ShuttleAIException(f"Unexpected exception ({e.__class__.__name__}): {e}") from e
+
+    async def _raw_request(
+        self,
+        method: str,
+        json: Optional[Dict[str, Any]],
+        path: str,
+        accept_header: str = "application/json",
+    ) -> bytes:
+        async with self._stream_raw(method, path, json=json, accept_header=accept_header) as response:
+            return await response.read()
+
     async def _request(
         self,
         method: str,
@@ -153,6 +247,7 @@ class AsyncShuttleAI(ClientBase):
                 data=json_bytes,
             ) as response:
                 if stream:
+                    await self._check_response_status_codes(response)
                     async for line in response.content:
                         json_streamed_response = self._process_line(line)
                         if json_streamed_response:
@@ -172,60 +267,127 @@ class AsyncShuttleAI(ClientBase):
         except ShuttleAIAPIStatusException as e:
             raise ShuttleAIAPIStatusException.from_response(response, message=str(e)) from e
 
+    async def _download(self, url: str, path: str, chunk_size: int = 65536) -> int:
+        """Streams a file (e.g. a generated image) to disk through the client's session.
+
+        Args:
+            url (str): The URL of the file to download
+            path (str): The path to write the file to
+            chunk_size (int): The size of the chunks written to disk
+
+        Returns:
+            int: The number of bytes written
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+
+        written = 0
+        try:
+            async with self._session.get(url) as response:
+                await self._check_response_status_codes(response)
+                async with aopen(path, "wb") as file:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        await file.write(chunk)
+                        written += len(chunk)
+        except aiohttp.ClientConnectorError as e:
+            raise ShuttleAIConnectionException(str(e)) from e
+        except aiohttp.ClientError as e:
+            raise ShuttleAIException(f"Unexpected exception ({e.__class__.__name__}): {e}") from e
+        return written
+
     async def fetch_model(self, model_id: str) -> BaseModelCard:
         """Fetches a model by its ID
 
+        Models (and aliases) already in the client's model catalog are returned from the cache.
+
         Args:
             model_id (str): The ID of the model to fetch
 
         Returns:
             BaseModelCard, None]: The model if it exists
         """
+        card = self.model_catalog.resolve(model_id)
+        if card is not None:
+            self._refresh_stale_models()
+            return card
+
         singleton_response = self._request("get", {}, f"/models/{model_id}")
         try:
             return BaseModelCard(**(await singleton_response.__anext__())["data"])
         except (pydantic_core.ValidationError, StopAsyncIteration) as e:
             raise ShuttleAIException("No response received") from e
 
-    async def list_models(self) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
+    async def list_models(self, refresh: bool = False) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
         """Returns a list of the available models
 
+        Args:
+            refresh (bool): Bypass the model catalog cache and fetch the list from the API
+
         Returns:
             ListModelsResponse: A response object containing the list of models.
         """
-        return await self._fetch_and_process_models("/models", ListModelsResponse)
+        return await self._fetch_and_process_models(MODELS_ENDPOINT, refresh)
 
     async def list_models_verbose(
         self,
+        refresh: bool = False,
     ) -> Union[ListVerboseModelsResponse, ListModelsResponse]:
         """Returns a list of the available models with verbose information
 
+        Args:
+            refresh (bool): Bypass the model catalog cache and fetch the list from the API
+
         Returns:
             ListVerboseModelsResponse: A response object containing the list of models.
         """
-        return await self._fetch_and_process_models("/models/verbose", ListVerboseModelsResponse)
+        return await self._fetch_and_process_models(VERBOSE_MODELS_ENDPOINT, refresh)
 
     async def _fetch_and_process_models(
         self,
         endpoint: str,
-        response_class: Type[Union[ListModelsResponse, ListVerboseModelsResponse]],
+        refresh: bool = False,
     ) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
+        cached = self.model_catalog.get(endpoint)
+        if cached is not None and not refresh:
+            response, stale = cached
+            if stale:
+                self._refresh_models_in_background(endpoint)
+            return response
+        return await self._refresh_models(endpoint)
+
+    async def _refresh_models(self, endpoint: str) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
         singleton_response = self._request("get", {}, endpoint)
         try:
-            list_models_response = response_class(**(await singleton_response.__anext__()))
-        except pydantic_core.ValidationError as e:
+            return self.model_catalog.update(endpoint, await singleton_response.__anext__())
+        except StopAsyncIteration as e:
             raise ShuttleAIException("No response received") from e
 
-        models_by_id = {model.id: model for model in list_models_response.data}
-
-        for model in list_models_response.data:
-            if isinstance(model, ProxyCard):
-                model_parent = models_by_id.get(model.proxy_to)
-                assert isinstance(model_parent, BaseModelCard)
-                if model_parent:
-                    model.parent = model_parent
+    def _refresh_stale_models(self) -> None:
+        for endpoint in (MODELS_ENDPOINT, VERBOSE_MODELS_ENDPOINT):
+            cached = self.model_catalog.get(endpoint)
+            if cached is not None and cached[1]:
+                self._refresh_models_in_background(endpoint)
 
-        return list_models_response
+    def _refresh_models_in_background(self, endpoint: str = VERBOSE_MODELS_ENDPOINT) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if not self.model_catalog.claim_refresh(endpoint):
+            return
+
+        async def refresh() -> None:
+            try:
+                await self._refresh_models(endpoint)
+            except ShuttleAIException as e:
+                delay = self.model_catalog.record_failure(endpoint, e)
+                self._logger.warning(f"Background refresh of {endpoint} failed, retrying in {delay:.0f}s: {e}")
+            finally:
+                self.model_catalog.release_refresh(endpoint)
+
+        task = loop.create_task(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
     @overload
     async def ez_chat(
@@ -1,26 +1,29 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from json import JSONDecodeError
-from typing import Any, Dict, Iterable, Iterator, Literal, Mapping, Optional, Type, Union, overload
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Mapping, Optional, Union, overload
 
 import orjson
 import pydantic_core
-from httpx import Client, ConnectError, RequestError, Response
+from httpx import Client, ConnectError, Limits, RequestError, Response
 
 from shuttleai import resources
+from shuttleai._concurrency import ItemResult, RateLimitGate, SingleFlight, bounded_map, call_item, call_with_retries
 from shuttleai._types import DEFAULT_HTTPX_TIMEOUT, HTTPXTimeoutTypes
 from shuttleai.client.base import ClientBase
+from shuttleai.client.catalog import MODELS_ENDPOINT, VERBOSE_MODELS_ENDPOINT
+from shuttleai.context import ContextWindow
 from shuttleai.exceptions import (
     ShuttleAIAPIException,
     ShuttleAIAPIStatusException,
     ShuttleAIConnectionException,
     ShuttleAIException,
 )
+from shuttleai.resources.chat.caching import ResponseCache
+from shuttleai.resources.etc.web_search import SearchCache
 from shuttleai.schemas.chat.completions import ChatCompletionResponse, ChatCompletionStreamResponse
-from shuttleai.schemas.models.models import (
-    BaseModelCard,
-    ListModelsResponse,
-    ListVerboseModelsResponse,
-    ProxyCard,
-)
+from shuttleai.schemas.models.models import BaseModelCard, ListModelsResponse, ListVerboseModelsResponse
 
 
 class ShuttleAI(ClientBase):
@@ -37,8 +40,30 @@ class ShuttleAI(ClientBase):
         timeout: HTTPXTimeoutTypes = DEFAULT_HTTPX_TIMEOUT,
         default_headers: Mapping[str, str] | None = None,
         http_client: Optional[Client] = None,
+        model_cache_ttl: float = 3600.0,
+        model_cache_path: Optional[str] = None,
+        validate_requests: bool = False,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce_endpoints: Iterable[str] = (),
+        context_window: Optional[ContextWindow] = None,
+        search_cache: Optional[SearchCache] = None,
     ):
-        super().__init__(base_url, api_key, timeout)
+        super().__init__(
+            base_url,
+            api_key,
+            timeout,
+            model_cache_ttl,
+            model_cache_path,
+            validate_requests,
+            response_cache,
+            coalesce_endpoints,
+            context_window,
+            search_cache,
+        )
+        self._singleflight = SingleFlight()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_size = 0
+        self._executor_lock = threading.Lock()
 
         if self.api_key is None:
             raise ShuttleAIException(
@@ -54,7 +79,10 @@ class ShuttleAI(ClientBase):
         if http_client:
             self._http_client = http_client
         else:
-            self._http_client = Client(timeout=timeout)
+            # keep as many idle connections as can be in use, so thread pools (see `map`) reuse them
+            self._http_client = Client(
+                timeout=timeout, limits=Limits(max_connections=100, max_keepalive_connections=100)
+            )
 
         self.chat: resources.Chat = resources.Chat(self)
         self.images: resources.Images = resources.Images(self)
@@ -68,23 +96,91 @@ class ShuttleAI(ClientBase):
 
     def __del__(self) -> None:
         self._http_client.close()
+        if getattr(self, "_executor", None) is not None:
+            self._executor.shutdown(wait=False)  # type: ignore
+
+    def _map_executor(self, concurrency: int) -> ThreadPoolExecutor:
+        """Returns the client's thread pool, replaced by a larger one if it has fewer than `concurrency` threads.
+
+        A replaced pool is not shut down, as maps may still be using it; its threads exit once it is unused.
+        """
+        with self._executor_lock:
+            if self._executor is None or self._executor_size < concurrency:
+                self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="shuttleai-map")
+                self._executor_size = concurrency
+            return self._executor
+
+    def imap(
+        self,
+        fn: Callable[..., Any],
+        items: Iterable[Any],
+        concurrency: int = 8,
+        ordered: bool = True,
+        retries: int = 0,
+    ) -> Iterator[ItemResult]:
+        """Calls a client method (or any function) for every item on a thread pool, yielding the results.
+
+        Items are the keyword arguments of `fn` (mappings), or its only argument. They are consumed
+        lazily, and no more than `concurrency` calls run at once; a new call only starts when a
+        result has been consumed, so slow consumers apply backpressure. Calls share the client's
+        connection pool. Errors are captured per item in `ItemResult.error` rather than raised.
+
+        Example:
+            ```python
+            questions = ({"messages": [{"role": "user", "content": q}]} for q in open("questions.txt"))
+            for result in client.imap(client.chat.completions.create, questions, concurrency=16):
+                print(result.index, result.value.first_choice.message.content if result.ok else result.error)
+            ```
+
+        Args:
+            fn (Callable): The function to call, e.g. `client.chat.completions.create` or `client.embeddings.create`
+            items (Iterable): The arguments of the calls
+            concurrency (int): The maximum number of calls running at once
+            ordered (bool): Yield results in input order instead of completion order
+            retries (int): The number of retries of rate limited and transiently failing calls
+
+        Yields:
+            ItemResult: The result (or error) of each item
+        """
+        gate = RateLimitGate()
+
+        def call(item: Any) -> Any:
+            if retries:
+                return call_with_retries(call_item, fn, item, retries=retries, gate=gate)
+            return call_item(fn, item)
+
+        executor = self._map_executor(concurrency)
+        for index, future in bounded_map(call, items, concurrency=concurrency, ordered=ordered, executor=executor):
+            error = future.exception()
+            yield ItemResult(index, None, error) if error is not None else ItemResult(index, future.result())
+
+    def imap_unordered(
+        self, fn: Callable[..., Any], items: Iterable[Any], concurrency: int = 8, retries: int = 0
+    ) -> Iterator[ItemResult]:
+        """Like `imap`, yielding results as soon as they are ready instead of in input order."""
+        return self.imap(fn, items, concurrency=concurrency, ordered=False, retries=retries)
+
+    def map(
+        self, fn: Callable[..., Any], items: Iterable[Any], concurrency: int = 8, retries: int = 0
+    ) -> List[ItemResult]:
+        """Like `imap`, returning every result (in input order) once all calls completed."""
+        return list(self.imap(fn, items, concurrency=concurrency, retries=retries))
 
     def _check_response_status_codes(self, response: Response) -> None:
+        if response.status_code >= 400 and response.stream:
+            # the body of a streamed response must be read before `response.text`
+            response.read()
         if response.status_code in {429, 500, 502, 503, 504}:
             raise ShuttleAIAPIStatusException.from_response(
                 response,
                 message=response.text,
             )
         elif 400 <= response.status_code < 500:
-            if response.stream:
-                response.read()
             raise ShuttleAIAPIException.from_response(
                 response,
                 message=response.text,
             )
         elif response.status_code >= 500:
-            if response.stream:
-                response.read()
             raise ShuttleAIException(
                 message=response.text,
             )
@@ -99,22 +195,21 @@ class ShuttleAI(ClientBase):
 
         return json_response
 
-    def _raw_request(
+    @contextmanager
+    def _stream_raw(
         self,
         method: str,
-        json: Optional[Dict[str, Any]],
         path: str,
-        accept_header: str = "application/json",
-    ) -> Dict[str, Any]:
-        json_bytes: Any | None = None
-        if json and len(json) > 0:
-            if "file" in json:
-                with open(json["file"], "rb") as f:
-                    json_bytes = {"file": f.read()}
-            else:
-                json_bytes = orjson.dumps(json)
-
-        headers = {
+        json: Optional[Dict[str, Any]] = None,
+        accept_header: str = "application/octet-stream",
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Iterator[Response]:
+        """Opens a streamed request whose body is not JSON (e.g. video content).
+
+        The response body is not read; callers iterate it with `iter_bytes` so memory use stays
+        constant regardless of the body size.
+        """
+        request_headers = {
             "Accept": accept_header,
             "User-Agent": f"shuttleai-python/{self._version}",
             "Authorization": f"Bearer {self.api_key}",
@@ -122,20 +217,37 @@ class ShuttleAI(ClientBase):
         }
 
         if self.default_headers:
-            headers.update(self.default_headers)
+            request_headers.update(self.default_headers)
+        if headers:
+            request_headers.update(headers)
 
         url = f"{self._base_url}{path}"
 
-        self._logger.debug(f"Sending request: {method} {url} {json}")
+        self._logger.debug(f"Sending raw request: {method} {url} {json}")
 
-        response = self._http_client.request(
-            method,
-            url,
-            headers=headers,
-            json=json_bytes,
-        )
+        try:
+            with self._http_client.stream(
+                method,
+                url,
+                headers=request_headers,
+                json=orjson.dumps(json) if json else None,
+            ) as response:
+                self._check_streaming_response(response)
+                yield response
+        except ConnectError as e:
+            raise ShuttleAIConnectionException(str(e)) from e
+        except RequestError as e:
+            raise ShuttleAIException(f"Unexpected exception ({e.__class__.__name__}): {e}") from e
 
-        return self._check_response(response)
+    def _raw_request(
+        self,
+        method: str,
+        json: Optional[Dict[str, Any]],
+        path: str,
+        accept_header: str = "application/json",
+    ) -> bytes:
+        with self._stream_raw(method, path, json=json, accept_header=accept_header) as response:
+            return response.read()
 
     def _request(
         self,
@@ -207,60 +319,118 @@ class ShuttleAI(ClientBase):
         except ShuttleAIAPIStatusException as e:
             raise ShuttleAIAPIStatusException.from_response(response, message=str(e)) from e
 
+    def _download(self, url: str, path: str, chunk_size: int = 65536) -> int:
+        """Streams a file (e.g. a generated image) to disk through the client's connection pool.
+
+        Args:
+            url (str): The URL of the file to download
+            path (str): The path to write the file to
+            chunk_size (int): The size of the chunks written to disk
+
+        Returns:
+            int: The number of bytes written
+        """
+        written = 0
+        try:
+            with self._http_client.stream("get", url) as response:
+                self._check_response_status_codes(response)
+                with open(path, "wb") as file:
+                    for chunk in response.iter_bytes(chunk_size):
+                        file.write(chunk)
+                        written += len(chunk)
+        except ConnectError as e:
+            raise ShuttleAIConnectionException(str(e)) from e
+        except RequestError as e:
+            raise ShuttleAIException(f"Unexpected exception ({e.__class__.__name__}): {e}") from e
+        return written
+
     def fetch_model(self, model_id: str) -> BaseModelCard:
         """Fetches a model by its ID
 
+        Models (and aliases) already in the client's model catalog are returned from the cache.
+
         Args:
             model_id (str): The ID of the model to fetch
 
         Returns:
             BaseModelCard, None]: The model if it exists
         """
+        card = self.model_catalog.resolve(model_id)
+        if card is not None:
+            self._refresh_stale_models()
+            return card
+
         singleton_response = self._request("get", {}, f"/models/{model_id}")
         try:
             return BaseModelCard(**next(singleton_response)["data"])
         except (pydantic_core.ValidationError, StopIteration) as e:
             raise ShuttleAIException("No response received") from e
 
-    def list_models(self) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
+    def list_models(self, refresh: bool = False) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
         """Returns a list of the available models
 
+        Args:
+            refresh (bool): Bypass the model catalog cache and fetch the list from the API
+
         Returns:
             ListModelsResponse: A response object containing the list of models.
         """
-        return self._fetch_and_process_models("/models", ListModelsResponse)
+        return self._fetch_and_process_models(MODELS_ENDPOINT, refresh)
 
     def list_models_verbose(
         self,
+        refresh: bool = False,
     ) -> Union[ListVerboseModelsResponse, ListModelsResponse]:
         """Returns a list of the available models with verbose information
 
+        Args:
+            refresh (bool): Bypass the model catalog cache and fetch the list from the API
+
         Returns:
             ListVerboseModelsResponse: A response object containing the list of models.
         """
-        return self._fetch_and_process_models("/models/verbose", ListVerboseModelsResponse)
+        return self._fetch_and_process_models(VERBOSE_MODELS_ENDPOINT, refresh)
 
     def _fetch_and_process_models(
         self,
         endpoint: str,
-        response_class: Type[Union[ListModelsResponse, ListVerboseModelsResponse]],
+        refresh: bool = False,
     ) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
+        cached = self.model_catalog.get(endpoint)
+        if cached is not None and not refresh:
+            response, stale = cached
+            if stale:
+                self._refresh_models_in_background(endpoint)
+            return response
+        return self._refresh_models(endpoint)
+
+    def _refresh_models(self, endpoint: str) -> Union[ListModelsResponse, ListVerboseModelsResponse]:
         singleton_response = self._request("get", {}, endpoint)
         try:
-            list_models_response = response_class(**next(singleton_response))
-        except pydantic_core.ValidationError as e:
+            return self.model_catalog.update(endpoint, next(singleton_response))
+        except StopIteration as e:
             raise ShuttleAIException("No response received") from e
 
-        models_by_id = {model.id: model for model in list_models_response.data}
-
-        for model in list_models_response.data:
-            if isinstance(model, ProxyCard):
-                model_parent = models_by_id.get(model.proxy_to)
-                assert isinstance(model_parent, BaseModelCard)
-                if model_parent:
-                    model.parent = model_parent
-
-        return list_models_response
+    def _refresh_stale_models(self) -> None:
+        for endpoint in (MODELS_ENDPOINT, VERBOSE_MODELS_ENDPOINT):
+            cached = self.model_catalog.get(endpoint)
+            if cached is not None and cached[1]:
+                self._refresh_models_in_background(endpoint)
+
+    def _refresh_models_in_background(self, endpoint: str = VERBOSE_MODELS_ENDPOINT) -> None:
+        if not self.model_catalog.claim_refresh(endpoint):
+            return
+
+        def refresh() -> None:
+            try:
+                self._refresh_models(endpoint)
+            except ShuttleAIException as e:
+                delay = self.model_catalog.record_failure(endpoint, e)
+                self._logger.warning(f"Background refresh of {endpoint} failed, retrying in {delay:.0f}s: {e}")
+            finally:
+                self.model_catalog.release_refresh(endpoint)
+
+        threading.Thread(target=refresh, name="shuttleai-models", daemon=True).start()
 
     @overload
     def ez_chat(  # type: ignore
@@ -1,15 +1,25 @@
 import logging
 import os
 from abc import ABC
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Optional, Union
 
 import orjson
 
 from shuttleai import __version__
 from shuttleai._types import TimeoutTypes
+from shuttleai.client.catalog import VERBOSE_MODELS_ENDPOINT, ModelCatalog
+from shuttleai.client.health import ModelHealth
+from shuttleai.client.validation import validate_chat_request
+from shuttleai.conversation import Conversation
 from shuttleai.exceptions import ShuttleAIException
+from shuttleai.helpers import SerializedTools
 from shuttleai.schemas.chat.completions import ChatMessage, Function, ToolChoice
 
+if TYPE_CHECKING:
+    from shuttleai.context import ContextWindow
+    from shuttleai.resources.chat.caching import ResponseCache
+    from shuttleai.resources.etc.web_search import SearchCache
+
 
 class ClientBase(ABC):  # noqa: B024
     _timeout: TimeoutTypes
@@ -24,12 +34,25 @@ class ClientBase(ABC):  # noqa: B024
     # client options
     api_key: str
     base_url: str
+    model_catalog: ModelCatalog
+    model_health: ModelHealth
+    response_cache: Optional["ResponseCache"]
+    coalesce_endpoints: FrozenSet[str]
+    context_window: Optional["ContextWindow"]
+    search_cache: Optional["SearchCache"]
 
     def __init__(
         self,
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
         timeout: TimeoutTypes = 120.0,
+        model_cache_ttl: float = 3600.0,
+        model_cache_path: Optional[str] = None,
+        validate_requests: bool = False,
+        response_cache: Optional["ResponseCache"] = None,
+        coalesce_endpoints: Iterable[str] = (),
+        context_window: Optional["ContextWindow"] = None,
+        search_cache: Optional["SearchCache"] = None,
     ):
         self._timeout = timeout
         self._api_key = api_key or os.getenv("SHUTTLEAI_API_KEY")
@@ -49,6 +72,13 @@ class ClientBase(ABC):  # noqa: B024
         self._default_video_model = "sora"
         self._default_audio_speech_model = "eleven_turbo_v2_5"
         self._version = __version__
+        self.model_catalog = ModelCatalog(ttl=model_cache_ttl, cache_path=model_cache_path)
+        self.model_health = ModelHealth(self.model_catalog)
+        self._validate_requests = validate_requests
+        self.response_cache = response_cache
+        self.coalesce_endpoints = frozenset(coalesce_endpoints)
+        self.context_window = context_window
+        self.search_cache = search_cache
 
         if "shuttleai.com" not in self.base_url and "shuttleai.app" not in self.base_url:
             if "api.openai.com" not in self.base_url:
@@ -87,7 +117,9 @@ class ClientBase(ABC):  # noqa: B024
             if v is not None
         }
 
-    def _parse_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _parse_tools(self, tools: List[Dict[str, Any]]) -> Union[List[Dict[str, Any]], orjson.Fragment]:
+        if isinstance(tools, SerializedTools):
+            return tools.fragment
         return [
             {
                 "type": tool["type"],
@@ -104,7 +136,9 @@ class ClientBase(ABC):  # noqa: B024
     def _parse_tool_choice(self, tool_choice: Union[str, ToolChoice]) -> str:
         return tool_choice.value if isinstance(tool_choice, ToolChoice) else tool_choice
 
-    def _parse_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
+    def _parse_messages(self, messages: Union[List[Any], Conversation]) -> List[Any]:
+        if isinstance(messages, Conversation):
+            return messages.serialized()
         return [
             (message.model_dump(exclude_none=True) if isinstance(message, ChatMessage) else message)
             for message in messages
@@ -118,7 +152,7 @@ class ClientBase(ABC):  # noqa: B024
 
     def _make_chat_request(
         self,
-        messages: List[Any],
+        messages: Union[List[Any], Conversation],
         model: Optional[str] = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
@@ -145,7 +179,25 @@ class ClientBase(ABC):  # noqa: B024
         if stream:
             request_data["stream"] = stream
         request_data.update(self._build_sampling_params(max_tokens, temperature, top_p))
-        return self._make_request("chat", request_data)
+        request_data = self._make_request("chat", request_data)
+        if self._validate_requests:
+            self._check_chat_request(request_data)
+        return request_data
+
+    def _check_chat_request(self, request_data: Dict[str, Any]) -> None:
+        """Rejects requests the API would refuse, using only the cached model catalog.
+
+        Opt-in with `validate_requests=True`, since it fetches `/models/verbose`, which custom
+        `base_url`s may not serve. A missing or stale verbose catalog is refreshed in the background
+        (backing off after failed refreshes); until it arrives, requests pass through unchecked rather
+        than waiting on the network.
+        """
+        if self.model_catalog.is_stale(VERBOSE_MODELS_ENDPOINT):
+            self._refresh_models_in_background(VERBOSE_MODELS_ENDPOINT)
+        validate_chat_request(self.model_catalog, request_data)
+
+    def _refresh_models_in_background(self, endpoint: str = VERBOSE_MODELS_ENDPOINT) -> None:  # noqa: B027
+        """Refreshes a model list in the background without blocking (implemented by the clients)."""
 
     def _make_image_request(self, prompt: str, model: Optional[str] = None) -> Dict[str, Any]:
         request_data: Dict[str, Any] = {
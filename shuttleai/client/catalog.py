@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union
+
+import orjson
+import pydantic_core
+
+from shuttleai._concurrency import _backoff_delay
+from shuttleai.exceptions import ShuttleAIException
+from shuttleai.schemas.models.capabilities import Capabilities
+from shuttleai.schemas.models.models import (
+    BaseModelCard,
+    ListModelsResponse,
+    ListVerboseModelsResponse,
+    ProxyCard,
+)
+
+ModelsResponse = Union[ListModelsResponse, ListVerboseModelsResponse]
+
+MODELS_ENDPOINT = "/models"
+VERBOSE_MODELS_ENDPOINT = "/models/verbose"
+
+REFRESH_BACKOFF = 5.0
+"""The delay before a failed background refresh is retried, doubled after every further failure."""
+MAX_REFRESH_BACKOFF = 300.0
+
+_RESPONSE_CLASSES: Dict[str, Type[ModelsResponse]] = {
+    MODELS_ENDPOINT: ListModelsResponse,
+    VERBOSE_MODELS_ENDPOINT: ListVerboseModelsResponse,
+}
+
+
+class ModelCatalog:
+    """Client-level cache of the model list.
+
+    Holds the responses of `/models` and `/models/verbose` for `ttl` seconds and indexes them so
+    that model cards can be looked up by ID or alias (proxy) in O(1) without touching the network.
+    Proxy chains (aliases of aliases) are resolved once, when a response is stored.
+
+    Stale entries keep being served while the client refreshes them in the background. A failed
+    refresh is not retried before an exponential backoff (or the server's `Retry-After`) has passed.
+    When `cache_path` is set, responses are also persisted to disk, so new processes start warm.
+    """
+
+    def __init__(self, ttl: float = 3600.0, cache_path: Optional[str] = None) -> None:
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, ModelsResponse, Dict[str, Any]]] = {}
+        self._cards: Dict[str, BaseModelCard] = {}
+        self._refreshing: Set[str] = set()
+        self._warned_beta: Set[str] = set()
+        # endpoint -> (time of the last failed refresh, when to retry it, consecutive failures)
+        self._failures: Dict[str, Tuple[float, float, int]] = {}
+        if cache_path:
+            self._load()
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self._cards
+
+    @property
+    def empty(self) -> bool:
+        return not self._entries
+
+    @property
+    def model_ids(self) -> List[str]:
+        """The IDs and aliases of the known models, sorted."""
+        return sorted(self._cards)
+
+    @property
+    def is_verbose(self) -> bool:
+        """Whether the index is built from the verbose model list (and thus has capabilities)."""
+        return VERBOSE_MODELS_ENDPOINT in self._entries
+
+    def get(self, endpoint: str) -> Optional[Tuple[ModelsResponse, bool]]:
+        """Returns the cached response for an endpoint and whether it is stale, if cached."""
+        entry = self._entries.get(endpoint)
+        if entry is None:
+            return None
+        fetched_at, response, _ = entry
+        return response, time.time() - fetched_at >= self.ttl
+
+    def is_stale(self, endpoint: str = VERBOSE_MODELS_ENDPOINT) -> bool:
+        entry = self._entries.get(endpoint)
+        return entry is None or time.time() - entry[0] >= self.ttl
+
+    def update(self, endpoint: str, payload: Dict[str, Any], fetched_at: Optional[float] = None) -> ModelsResponse:
+        """Parses and stores a model list payload, rebuilding the lookup index."""
+        try:
+            response = _RESPONSE_CLASSES[endpoint](**payload)
+        except pydantic_core.ValidationError as e:
+            raise ShuttleAIException("No response received") from e
+
+        with self._lock:
+            self._entries[endpoint] = (fetched_at or time.time(), response, payload)
+            if fetched_at is None:
+                self._failures.pop(endpoint, None)
+            self._reindex()
+            if self.cache_path and fetched_at is None:
+                self._save()
+        return response
+
+    def invalidate(self) -> None:
+        """Drops every cached response, forcing the next lookup to hit the network."""
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+            self._cards = {}
+
+    def _reindex(self) -> None:
+        cards: Dict[str, BaseModelCard] = {}
+        proxies: Dict[str, ProxyCard] = {}
+        # the verbose list is a superset of the basic one, so its cards are indexed last and win
+        for endpoint in (MODELS_ENDPOINT, VERBOSE_MODELS_ENDPOINT):
+            if endpoint in self._entries:
+                for card in self._entries[endpoint][1].data:
+                    if isinstance(card, ProxyCard):
+                        proxies[card.id] = card
+                    else:
+                        cards[card.id] = card
+
+        index = dict(cards)
+        for proxy_id, proxy in proxies.items():
+            target, seen = proxy.proxy_to, {proxy_id}
+            while target in proxies and target not in seen:
+                seen.add(target)
+                target = proxies[target].proxy_to
+            if target in cards:
+                index[proxy_id] = cards[target]
+
+        for _, response, _ in self._entries.values():
+            for card in response.data:
+                if isinstance(card, ProxyCard) and card.id in index:
+                    card.parent = index[card.id]
+
+        self._cards = index
+
+    def resolve(self, model_id: str) -> Optional[BaseModelCard]:
+        """Returns the model card for an ID or alias, following proxy chains, if known."""
+        return self._cards.get(model_id)
+
+    def canonical_id(self, model_id: str) -> str:
+        """Returns the ID of the model an alias ultimately points to (the ID itself if unknown)."""
+        card = self._cards.get(model_id)
+        return card.id if card is not None else model_id
+
+    def capabilities(self, model_id: str) -> Optional[Capabilities]:
+        return getattr(self._cards.get(model_id), "capabilities", None)
+
+    def request_multiplier(self, model_id: str) -> Optional[float]:
+        card = self._cards.get(model_id)
+        return card.request_multiplier if card is not None else None
+
+    def claim_beta_warning(self, model_id: str) -> bool:
+        """Returns True the first time it is called for a model, so its beta warning is logged once."""
+        with self._lock:
+            if model_id in self._warned_beta:
+                return False
+            self._warned_beta.add(model_id)
+            return True
+
+    def claim_refresh(self, endpoint: str) -> bool:
+        """Marks a background refresh of an endpoint as running.
+
+        Returns False if one already is, or if the last one failed and its backoff has not passed yet.
+        """
+        with self._lock:
+            if endpoint in self._refreshing:
+                return False
+            failure = self._failures.get(endpoint)
+            if failure is not None and time.time() < failure[1]:
+                return False
+            self._refreshing.add(endpoint)
+            return True
+
+    def release_refresh(self, endpoint: str) -> None:
+        with self._lock:
+            self._refreshing.discard(endpoint)
+
+    def record_failure(self, endpoint: str, error: BaseException) -> float:
+        """Records a failed refresh of an endpoint and returns how long refreshes of it are backed off."""
+        with self._lock:
+            failures = self._failures[endpoint][2] + 1 if endpoint in self._failures else 1
+            delay = _backoff_delay(error, failures - 1, REFRESH_BACKOFF, MAX_REFRESH_BACKOFF)
+            now = time.time()
+            self._failures[endpoint] = (now, now + delay, failures)
+            return delay
+
+    def last_failure(self, endpoint: str) -> Optional[float]:
+        """The time of the last failed refresh of an endpoint, if it has failed since it last succeeded."""
+        failure = self._failures.get(endpoint)
+        return failure[0] if failure is not None else None
+
+    def _save(self) -> None:
+        assert self.cache_path
+        data = {endpoint: {"fetched_at": entry[0], "payload": entry[2]} for endpoint, entry in self._entries.items()}
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(orjson.dumps(data))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self._logger.warning(f"Could not write model cache {self.cache_path}: {e}")
+
+    def _load(self) -> None:
+        assert self.cache_path
+        try:
+            with open(self.cache_path, "rb") as file:
+                data = orjson.loads(file.read())
+            for endpoint, entry in data.items():
+                if endpoint in _RESPONSE_CLASSES:
+                    self.update(endpoint, entry["payload"], fetched_at=entry["fetched_at"])
+        except FileNotFoundError:
+            pass
+        except (OSError, orjson.JSONDecodeError, KeyError, ShuttleAIException) as e:
+            self._logger.warning(f"Ignoring unreadable model cache {self.cache_path}: {e}")
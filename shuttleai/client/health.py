@@ -0,0 +1,158 @@
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Mapping, Optional, Sequence
+
+from shuttleai.client.catalog import ModelCatalog
+
+
+class _ModelStats:
+    __slots__ = ("latency", "error_rate", "samples", "consecutive_failures", "open_until")
+
+    def __init__(self, window: int) -> None:
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+
+class ModelHealth:
+    """Live latency and error statistics of the models used by a client.
+
+    Every chat request records its outcome here, keyed by the model's canonical ID, so aliases
+    (proxies) of the same backend share their statistics. Latency and error rate are exponentially
+    weighted moving averages; the most recent latencies are also kept for percentiles.
+
+    After `failure_threshold` consecutive failures a model is considered unhealthy for `cooldown`
+    seconds, doubling with every further failure up to `max_cooldown`. A single success heals it.
+    """
+
+    def __init__(
+        self,
+        catalog: ModelCatalog,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        max_cooldown: float = 300.0,
+        window: int = 100,
+    ) -> None:
+        self.catalog = catalog
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _ModelStats] = {}
+
+    def _get(self, model: str) -> _ModelStats:
+        key = self.catalog.canonical_id(model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _ModelStats(self.window)
+        return stats
+
+    def record_success(self, model: str, latency: float) -> None:
+        with self._lock:
+            stats = self._get(model)
+            stats.latency = latency if stats.latency is None else stats.latency + self.alpha * (latency - stats.latency)
+            stats.error_rate -= self.alpha * stats.error_rate
+            stats.samples.append(latency)
+            stats.consecutive_failures = 0
+            stats.open_until = 0.0
+
+    def record_failure(self, model: str) -> None:
+        with self._lock:
+            stats = self._get(model)
+            stats.error_rate += self.alpha * (1.0 - stats.error_rate)
+            stats.consecutive_failures += 1
+            excess = stats.consecutive_failures - self.failure_threshold
+            if excess >= 0:
+                stats.open_until = time.monotonic() + min(self.max_cooldown, self.cooldown * 2**excess)
+
+    def is_healthy(self, model: str) -> bool:
+        stats = self._stats.get(self.catalog.canonical_id(model))
+        return stats is None or stats.open_until <= time.monotonic()
+
+    def latency(self, model: str) -> Optional[float]:
+        """Returns the moving average latency of a model, if it has been used."""
+        stats = self._stats.get(self.catalog.canonical_id(model))
+        return stats.latency if stats is not None else None
+
+    def error_rate(self, model: str) -> float:
+        stats = self._stats.get(self.catalog.canonical_id(model))
+        return stats.error_rate if stats is not None else 0.0
+
+    def samples(self, model: str) -> int:
+        """Returns how many recent latencies of a model are kept for percentiles."""
+        stats = self._stats.get(self.catalog.canonical_id(model))
+        return len(stats.samples) if stats is not None else 0
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        """Returns the `q` (0-1) percentile of a model's recent latencies, if it has been used."""
+        stats = self._stats.get(self.catalog.canonical_id(model))
+        if stats is None or not stats.samples:
+            return None
+        with self._lock:
+            samples = sorted(stats.samples)
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Returns the current statistics of every model, keyed by canonical model ID."""
+        with self._lock:
+            return {
+                model: {
+                    "latency": stats.latency,
+                    "error_rate": stats.error_rate,
+                    "consecutive_failures": stats.consecutive_failures,
+                    "healthy": stats.open_until <= time.monotonic(),
+                }
+                for model, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _score(self, model: str) -> float:
+        latency = self.latency(model)
+        if latency is None:
+            return 0.0  # unmeasured models are tried first, so they get measured
+        return latency / max(0.05, 1.0 - self.error_rate(model))
+
+    def rank(
+        self, models: Sequence[str], routing: str = "fastest", weights: Optional[Mapping[str, float]] = None
+    ) -> List[str]:
+        """Orders models by preference: healthy models first, then those cooling down as a last resort.
+
+        Args:
+            models (Sequence[str]): The candidate models, in order of preference
+            routing (str): `fastest` ranks healthy models by latency adjusted for their error rate,
+                `ordered` keeps the given order and `weighted` shuffles them by `weights`
+            weights (Mapping[str, float]): The relative weight of each model for `weighted` routing
+
+        Returns:
+            List[str]: The models, best first
+        """
+        healthy = [model for model in models if self.is_healthy(model)]
+        unhealthy = [model for model in models if not self.is_healthy(model)]
+
+        if routing == "fastest":
+            healthy.sort(key=self._score)
+        elif routing == "weighted":
+            model_weights = weights or {}
+
+            def key(model: str) -> float:
+                # weighted sampling without replacement (Efraimidis-Spirakis), discounted by error rate
+                weight = max(1e-9, model_weights.get(model, 1.0) * (1.0 - self.error_rate(model)))
+                return -(random.random() ** (1.0 / weight))
+
+            healthy.sort(key=key)
+        elif routing != "ordered":
+            raise ValueError(f"Unknown routing strategy: {routing}")
+
+        unhealthy.sort(key=lambda model: self._stats[self.catalog.canonical_id(model)].open_until)
+        return healthy + unhealthy
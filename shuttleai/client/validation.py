@@ -0,0 +1,67 @@
+import logging
+from typing import Any, Dict, Iterable, List
+
+from shuttleai.client.catalog import ModelCatalog
+from shuttleai.conversation import message_dicts
+from shuttleai.exceptions import ShuttleAIInvalidRequestException
+from shuttleai.schemas.models.models import VerboseModelCard
+
+logger = logging.getLogger(__name__)
+
+
+def _has_image(messages: Iterable[Any]) -> bool:
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list) and any(
+            (part.get("type") if isinstance(part, dict) else getattr(part, "type", None)) == "image_url"
+            for part in content
+        ):
+            return True
+    return False
+
+
+def chat_request_issues(catalog: ModelCatalog, request_data: Dict[str, Any]) -> List[str]:
+    """Returns why the API would refuse a chat request for its model, based on the cached model catalog.
+
+    Only cached information is used, so this never touches the network. Unknown models, and models
+    without capability information, produce no issues.
+    """
+    model: str = request_data.get("model") or ""
+    card = catalog.resolve(model)
+    if not isinstance(card, VerboseModelCard):
+        return []
+
+    issues = []
+    if card.maintenance:
+        issues.append(f"model '{model}' is under maintenance")
+    if card.beta and catalog.claim_beta_warning(model):
+        logger.warning(f"Model '{model}' is in beta and may behave unexpectedly.")
+
+    capabilities = card.capabilities
+    if capabilities is None:
+        return issues
+
+    has_image = request_data.get("image") or _has_image(message_dicts(request_data["messages"]))
+    if not capabilities.supports_image_input and has_image:
+        issues.append(f"model '{model}' does not support image input")
+
+    if request_data.get("tools"):
+        tools = capabilities.supports_tools
+        if tools is None or not tools.regular:
+            issues.append(f"model '{model}' does not support tools")
+        elif request_data.get("stream") and not tools.streamed:
+            issues.append(f"model '{model}' does not support streamed tool calls")
+
+    max_tokens = request_data.get("max_tokens")
+    limits = capabilities.supports_max_tokens
+    if max_tokens is not None and limits is not None and max_tokens > limits.output:
+        issues.append(f"max_tokens={max_tokens} exceeds the {limits.output} output tokens of model '{model}'")
+
+    return issues
+
+
+def validate_chat_request(catalog: ModelCatalog, request_data: Dict[str, Any]) -> None:
+    """Raises `ShuttleAIInvalidRequestException` if the API would refuse a chat request for its model."""
+    issues = chat_request_issues(catalog, request_data)
+    if issues:
+        raise ShuttleAIInvalidRequestException(f"Request rejected locally: {'; '.join(issues)}")
@@ -0,0 +1,202 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, TypeVar, Union
+
+from shuttleai.cache import cache_key
+from shuttleai.conversation import Conversation
+from shuttleai.exceptions import ShuttleAIInvalidRequestException
+from shuttleai.tokens import (
+    MESSAGE_OVERHEAD_TOKENS,
+    REPLY_OVERHEAD_TOKENS,
+    Tokenizer,
+    approximate_tokens,
+    message_tokens,
+    messages_tokens,
+)
+
+if TYPE_CHECKING:
+    from shuttleai.client.base import ClientBase
+
+M = TypeVar("M", List[Any], Conversation)
+
+ContextStrategy = Literal["trim", "window", "summarize"]
+
+SUMMARY_PROMPT = (
+    "Summarize the following conversation in a few sentences. Keep names, numbers, decisions and open "
+    "questions; they are needed to continue the conversation."
+)
+
+
+class ContextWindow:
+    """Keeps chat histories within the input token limit of the model they are sent to.
+
+    Token counts are estimated locally with `tokenizer` (see `shuttleai.tokens.get_tokenizer`), or
+    with `approximate_tokens` by default. The limit is `max_input_tokens`
+    or, by default, `Capabilities.supports_max_tokens.input` of the model from the client's model
+    catalog, scaled by `safety_margin` to absorb estimation errors; like request validation, a
+    missing catalog is fetched in the background and histories pass through until it arrives.
+    Histories within the limit are sent untouched. Otherwise, leading system messages are always kept, and:
+
+    - `trim` drops the oldest messages until the history fits;
+    - `window` keeps at most the last `window` messages, then trims;
+    - `summarize` replaces the oldest messages with a summary written by `summary_model`, dropped
+      in blocks of `summary_block` messages so summaries can be reused across turns.
+
+    Example:
+        ```python
+        client = ShuttleAI(context_window=ContextWindow(strategy="summarize"))
+        ```
+    """
+
+    def __init__(
+        self,
+        strategy: ContextStrategy = "trim",
+        max_input_tokens: Optional[int] = None,
+        window: Optional[int] = None,
+        safety_margin: float = 0.9,
+        summary_model: str = "gpt-4o-mini",
+        summary_max_tokens: int = 512,
+        summary_block: int = 8,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> None:
+        if strategy not in ("trim", "window", "summarize"):
+            raise ValueError(f"Unknown context strategy: {strategy}")
+        if strategy == "window" and not window:
+            raise ValueError("The window strategy requires a window size")
+        self.strategy = strategy
+        self.max_input_tokens = max_input_tokens
+        self.window = window
+        self.safety_margin = safety_margin
+        self.summary_model = summary_model
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_block = summary_block
+        self.tokenizer = tokenizer
+        self._summaries: Dict[str, str] = {}
+
+    def _count(self, text: str) -> int:
+        return self.tokenizer.count(text) if self.tokenizer is not None else approximate_tokens(text)
+
+    def limit(self, client: "ClientBase", model: Union[str, Sequence[str], Mapping[str, float], None]) -> Optional[int]:
+        """Returns the token budget of a request's messages, the smallest of every routed model if several."""
+        if self.max_input_tokens is not None:
+            return int(self.max_input_tokens * self.safety_margin)
+        # the verbose model list (the default endpoint) carries the token limits
+        if client.model_catalog.is_stale():
+            client._refresh_models_in_background()
+        models = [model or client._default_chat_model] if model is None or isinstance(model, str) else list(model)
+        limits = []
+        for candidate in models:
+            capabilities = client.model_catalog.capabilities(candidate)
+            if capabilities is not None and capabilities.supports_max_tokens is not None:
+                limits.append(capabilities.supports_max_tokens.input)
+        return int(min(limits) * self.safety_margin) if limits else None
+
+    def _plan(self, messages: Sequence[Any], limit: int) -> Tuple[int, int]:
+        """Returns how many leading system messages to pin and where the kept tail starts."""
+        pinned = 0
+        while pinned < len(messages) and messages[pinned].get("role") == "system":
+            pinned += 1
+        budget = limit - messages_tokens(messages[:pinned], self.tokenizer)
+        if self.strategy == "summarize":
+            budget -= self.summary_max_tokens + MESSAGE_OVERHEAD_TOKENS + 10
+
+        start = max(pinned, len(messages) - self.window) if self.window is not None else pinned
+        tail = messages_tokens(messages[start:], self.tokenizer) - REPLY_OVERHEAD_TOKENS
+        while start < len(messages) and tail > budget:
+            tail -= message_tokens(messages[start], self.tokenizer)
+            start += 1
+        # tool results can't be sent without the assistant message that called the tool
+        while start < len(messages) and messages[start].get("role") == "tool":
+            start += 1
+        if start >= len(messages):
+            raise ShuttleAIInvalidRequestException(
+                f"Request rejected locally: the last message alone exceeds the {limit} token budget of the model"
+            )
+        return pinned, start
+
+    def _needs_fitting(self, messages: Sequence[Any], limit: Optional[int]) -> bool:
+        too_long = self.window is not None and len(messages) > self.window
+        return too_long or (limit is not None and messages_tokens(messages, self.tokenizer) > limit)
+
+    def _summary_cut(self, messages: Sequence[Any], pinned: int, start: int) -> int:
+        # round the cut up to a block boundary, so the same summary serves several turns
+        block = max(1, self.summary_block)
+        cut = pinned + -(-(start - pinned) // block) * block
+        while cut < len(messages) and messages[cut].get("role") == "tool":
+            cut += 1
+        return min(cut, len(messages) - 1)
+
+    def _summary_request(self, client: "ClientBase", dropped: Sequence[Any]) -> Tuple[str, List[Dict[str, Any]]]:
+        transcript = "\n".join(f"{m.get('role')}: {m.get('content') or ''}" for m in dropped)
+        limit = self.limit(client, self.summary_model)
+        if limit is not None:
+            # keep the most recent part of the transcript if it is too long for the summary model
+            budget = limit - self._count(SUMMARY_PROMPT) - self.summary_max_tokens - 20
+            tokens = self._count(transcript)
+            if tokens > budget > 0:
+                transcript = transcript[-int(len(transcript) * budget / tokens) :]
+        key = cache_key("summary", [self.summary_model, transcript])
+        return key, [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ]
+
+    def _remember_summary(self, key: str, summary: str) -> None:
+        tokens = self._count(summary)
+        if tokens > self.summary_max_tokens:
+            # the budget reserved for the summary must hold even if the model ignored max_tokens
+            summary = summary[: int(len(summary) * self.summary_max_tokens / tokens)]
+        self._summaries[key] = summary
+        while len(self._summaries) > 256:
+            del self._summaries[next(iter(self._summaries))]
+
+    def _assemble(self, messages: M, pinned: int, cut: int, summary: Optional[str]) -> M:
+        head = messages[:pinned]
+        if isinstance(messages, Conversation):
+            # slicing and extending reuse the cached serialization of the kept messages
+            fitted = head
+            if summary is not None:
+                fitted.add("system", f"Summary of the earlier conversation: {summary}")
+            fitted.extend(messages[cut:])
+            return fitted
+        extra = [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}] if summary else []
+        return head + extra + messages[cut:]  # type: ignore
+
+    def fit(self, client: "ClientBase", messages: M, model: Any = None) -> M:
+        """Returns the messages to send so the request fits the model, the messages themselves if they fit.
+
+        Summaries are written through the (synchronous) client.
+        """
+        dicts = list(messages) if isinstance(messages, Conversation) else client._parse_messages(messages)
+        limit = self.limit(client, model)
+        if not self._needs_fitting(dicts, limit):
+            return messages
+        pinned, start = self._plan(dicts, limit if limit is not None else 1 << 62)
+        if self.strategy != "summarize":
+            return self._assemble(messages, pinned, start, None)
+
+        cut = self._summary_cut(dicts, pinned, start)
+        key, request = self._summary_request(client, dicts[pinned:cut])
+        if key not in self._summaries:
+            response = client.chat.completions.create(  # type: ignore
+                messages=request, model=self.summary_model, max_tokens=self.summary_max_tokens
+            )
+            self._remember_summary(key, response.first_choice.message.content or "")
+        return self._assemble(messages, pinned, cut, self._summaries[key])
+
+    async def async_fit(self, client: "ClientBase", messages: M, model: Any = None) -> M:
+        """Async version of `fit`, writing summaries through the async client."""
+        dicts = list(messages) if isinstance(messages, Conversation) else client._parse_messages(messages)
+        limit = self.limit(client, model)
+        if not self._needs_fitting(dicts, limit):
+            return messages
+        pinned, start = self._plan(dicts, limit if limit is not None else 1 << 62)
+        if self.strategy != "summarize":
+            return self._assemble(messages, pinned, start, None)
+
+        cut = self._summary_cut(dicts, pinned, start)
+        key, request = self._summary_request(client, dicts[pinned:cut])
+        if key not in self._summaries:
+            response = await client.chat.completions.create(  # type: ignore
+                messages=request, model=self.summary_model, max_tokens=self.summary_max_tokens
+            )
+            self._remember_summary(key, response.first_choice.message.content or "")
+        return self._assemble(messages, pinned, cut, self._summaries[key])
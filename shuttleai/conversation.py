@@ -0,0 +1,137 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union, overload
+
+import orjson
+from pydantic import BaseModel
+
+from shuttleai.schemas.chat.completions import ChatMessage
+
+MessageLike = Union[ChatMessage, Dict[str, Any]]
+
+
+def _message_dict(message: Union[MessageLike, BaseModel]) -> Dict[str, Any]:
+    return message.model_dump(exclude_none=True) if isinstance(message, BaseModel) else message
+
+
+class SerializedMessages(List[orjson.Fragment]):
+    """The `messages` of a request, serialized ahead of time.
+
+    orjson splices the fragments into the request body as-is. The message dicts are kept in
+    `messages` for code that inspects the request (validation, caching, token counting).
+    """
+
+    def __init__(self, fragments: Iterable[orjson.Fragment], messages: List[Dict[str, Any]]) -> None:
+        super().__init__(fragments)
+        self.messages = messages
+
+
+def message_dicts(messages: Sequence[Any]) -> Sequence[Any]:
+    """Returns the message dicts of a request's `messages`, whether they are serialized or not."""
+    return messages.messages if isinstance(messages, SerializedMessages) else messages
+
+
+class Conversation:
+    """A chat history that serializes every message only once.
+
+    Each message is converted to a dict and serialized when it is added. Requests made with a
+    conversation splice the cached bytes into the request body, so the cost of a request grows
+    with the new messages rather than with the length of the history.
+
+    Messages must not be modified in place after they are added; replace them instead
+    (`conversation[i] = message`), so their serialization is updated.
+
+    Example:
+        ```python
+        conversation = Conversation([ChatMessage(role="system", content="Be brief.")])
+        conversation.add("user", "what is 5 plus 3")
+        response = client.chat.completions.create(messages=conversation)
+        conversation.append(response.first_choice.message)
+        ```
+    """
+
+    def __init__(self, messages: Iterable[MessageLike] = ()) -> None:
+        self._messages: List[Dict[str, Any]] = []
+        self._fragments: List[orjson.Fragment] = []
+        self._serialized: Optional[SerializedMessages] = None
+        self.extend(messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._messages)
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Conversation": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], "Conversation"]:
+        if isinstance(index, slice):
+            conversation = Conversation()
+            conversation._messages = self._messages[index]
+            conversation._fragments = self._fragments[index]
+            return conversation
+        return self._messages[index]
+
+    def __setitem__(self, index: int, message: Union[MessageLike, BaseModel]) -> None:
+        data = _message_dict(message)
+        self._messages[index] = data
+        self._fragments[index] = orjson.Fragment(orjson.dumps(data))
+        self._serialized = None
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        del self._messages[index]
+        del self._fragments[index]
+        self._serialized = None
+
+    def __repr__(self) -> str:
+        return f"Conversation({self._messages!r})"
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        """The messages, as the dicts sent to the API."""
+        return list(self._messages)
+
+    def append(self, message: Union[MessageLike, BaseModel]) -> None:
+        """Adds a message: a `ChatMessage`, a dict, or any pydantic message such as a response message."""
+        data = _message_dict(message)
+        self._messages.append(data)
+        self._fragments.append(orjson.Fragment(orjson.dumps(data)))
+        self._serialized = None
+
+    def add(self, role: str, content: Any, **fields: Any) -> Dict[str, Any]:
+        """Adds a message from its role, content and other fields, returning it."""
+        data = {"role": role, "content": content, **fields}
+        self.append(data)
+        return data
+
+    def extend(self, messages: Iterable[Union[MessageLike, BaseModel]]) -> None:
+        """Adds messages. The messages of another conversation are added with their cached serialization."""
+        if isinstance(messages, Conversation):
+            self._messages.extend(messages._messages)
+            self._fragments.extend(messages._fragments)
+            self._serialized = None
+            return
+        for message in messages:
+            self.append(message)
+
+    def pop(self, index: int = -1) -> Dict[str, Any]:
+        self._fragments.pop(index)
+        self._serialized = None
+        return self._messages.pop(index)
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._fragments.clear()
+        self._serialized = None
+
+    def serialized(self) -> SerializedMessages:
+        """Returns the messages as pre-serialized fragments for a request body."""
+        if self._serialized is None:
+            self._serialized = SerializedMessages(self._fragments, list(self._messages))
+        return self._serialized
+
+    def to_json(self) -> bytes:
+        """Returns the messages as a JSON array."""
+        return orjson.dumps(self._fragments)
@@ -53,3 +53,11 @@ class ShuttleAIAPIStatusException(ShuttleAIAPIException):
 
 class ShuttleAIConnectionException(ShuttleAIException):
     """Returned when the SDK can not reach the API server for any reason"""
+
+
+class ShuttleAITimeoutException(ShuttleAIException):
+    """Returned when an operation does not complete before its deadline"""
+
+
+class ShuttleAIInvalidRequestException(ShuttleAIException):
+    """Returned when a request is rejected locally, before it is sent, because the API would refuse it"""
@@ -1,39 +1,177 @@
+import asyncio
 import inspect
 import re
-from typing import Callable, Literal, Type, get_type_hints
+import threading
+import time
+from collections import abc
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from enum import Enum
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
 
+import orjson
+from pydantic import BaseModel
 
-def _get_type_name(t: Type) -> str:
-    """Gets the name of a type, handling some edge cases like Literal types
+from shuttleai.conversation import Conversation
+from shuttleai.exceptions import ShuttleAIException, ShuttleAITimeoutException
+from shuttleai.schemas.chat.completions import (
+    ChatCompletionResponse,
+    ChatCompletionStreamResponse,
+    ChatResponseMessage,
+    DeltaToolCall,
+    FunctionCall,
+    ToolCall,
+    ToolType,
+)
 
-    Args:
-        t (Type): The type to get the name of
+if TYPE_CHECKING:
+    from shuttleai.client import AsyncShuttleAI, ShuttleAI
 
-    Returns:
-        str: The name of the type
+try:
+    from types import UnionType
+except ImportError:  # Python < 3.10
+    UnionType = None  # type: ignore
+
+
+SCHEMA_CACHE_SIZE = 4096
+
+_PARAM_DESCRIPTION_PATTERN = re.compile(r":param\s+(\w+)\s*:(.*?)(?=:param|$)", re.DOTALL)
+
+_JSON_TYPES = (
+    (bool, "boolean"),
+    (int, "integer"),
+    (float, "number"),
+    (str, "string"),
+    (bytes, "string"),
+    (list, "array"),
+    (tuple, "array"),
+    (set, "array"),
+    (frozenset, "array"),
+    (dict, "object"),
+    (type(None), "null"),
+)
+
+_PYTHON_TYPES: Dict[str, Any] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+    "null": type(None),
+    # the Python type names of schemas serialized by older versions
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+    "tuple": tuple,
+    "bytes": bytes,
+    "NoneType": type(None),
+    "Any": Any,
+}
+
+SchemaKey = Tuple[str, Any, bool, str, Optional[str]]
+
+_schema_cache: Dict[SchemaKey, bytes] = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_set(cache: Dict[Any, Any], key: Any, value: Any) -> None:
+    """Stores a value in one of the bounded caches of this module, evicting the oldest entry if full.
+
+    Writes are locked, so tools can be serialized from several threads at once.
     """
-    if hasattr(t, "__name__"):
-        return t.__name__
-    if hasattr(t, "_name"):
-        assert isinstance(t._name, str)
-        return t._name
-    return str(t)
+    with _cache_lock:
+        if len(cache) >= SCHEMA_CACHE_SIZE:
+            cache.pop(next(iter(cache)), None)
+        cache[key] = value
 
 
-def serialize_function_to_json(func: Callable) -> dict:
-    """Serializes a python callable function to a function schema JSON spec
+def _json_type(value: Any) -> Optional[str]:
+    return next((name for python_type, name in _JSON_TYPES if isinstance(value, python_type)), None)
+
+
+def _json_schema(annotation: Any) -> Dict[str, Any]:
+    """Converts a type annotation to the JSON schema of its values.
 
     Args:
-        func (Callable): The function to serialize
+        annotation (Any): The annotation, e.g. `int`, `List[str]`, `Optional[float]` or `Literal["a", "b"]`
 
     Returns:
-        dict: The serialized function schema JSON spec
+        Dict[str, Any]: The JSON schema, `{"type": "string"}` for types that have no JSON equivalent
     """
+    if annotation is Any or annotation is inspect.Parameter.empty:
+        return {}
+    origin, args = get_origin(annotation), get_args(annotation)
+
+    if origin is Literal:
+        schema: Dict[str, Any] = {"enum": list(args)}
+        types = {_json_type(arg) for arg in args}
+        if len(types) == 1 and None not in types:
+            schema["type"] = types.pop()
+        return schema
+    if origin is Union or (UnionType is not None and origin is UnionType):
+        options = [arg for arg in args if arg is not type(None)]
+        if len(options) == 1:
+            return _json_schema(options[0])
+        return {"anyOf": [_json_schema(arg) for arg in args]}
+    if origin is not None and isinstance(origin, type):
+        if issubclass(origin, (list, tuple, set, frozenset, abc.Sequence, abc.Set)) and not issubclass(origin, str):
+            schema = {"type": "array"}
+            items = [arg for arg in args if arg is not Ellipsis]
+            if items and len(set(items)) == 1:
+                schema["items"] = _json_schema(items[0])
+            return schema
+        if issubclass(origin, abc.Mapping):
+            return {"type": "object"}
+
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return annotation.model_json_schema()
+        if issubclass(annotation, Enum):
+            return _json_schema(Literal.__getitem__(tuple(member.value for member in annotation)))
+        for python_type, name in _JSON_TYPES:
+            if issubclass(annotation, python_type):
+                return {"type": name}
+    return {"type": "string"}
+
+
+def _schema_key(func: Callable) -> Optional[SchemaKey]:
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return None
+    # functions made by the same factory share their qualified name and code object, but not
+    # necessarily the name and docstring the schema is built from
+    return f"{func.__module__}.{func.__qualname__}", code, inspect.ismethod(func), func.__name__, func.__doc__
+
+
+def _build_function_schema(func: Callable) -> Dict[str, Any]:
     signature = inspect.signature(func)
     type_hints = get_type_hints(func)
     params = signature.parameters
 
-    function_info = {
+    function_info: Dict[str, Any] = {
         "name": func.__name__,
         "description": (func.__doc__ or "Lorem ipsum...").split(":param")[0].strip(),
         "parameters": {
@@ -42,65 +180,189 @@ def serialize_function_to_json(func: Callable) -> dict:
         },
     }
 
-    docstring = func.__doc__ or ""
-    param_desc_pattern = r":param\s+(\w+)\s*:(.*?)(?=:param|$)"
-    param_descriptions = dict(re.findall(param_desc_pattern, docstring, re.DOTALL))
+    param_descriptions = dict(_PARAM_DESCRIPTION_PATTERN.findall(func.__doc__ or ""))
 
     required_params = [name for name, param in params.items() if param.default == inspect.Parameter.empty]
     if required_params:
-        function_info["parameters"]["required"] = required_params  # type: ignore
+        function_info["parameters"]["required"] = required_params
 
-    for name, _ in params.items():
-        param_type = _get_type_name(type_hints.get(name, type(None)))
-        param_desc = param_descriptions.get(name, "Lorem ipsum...").strip()
-        param_info = {"type": param_type, "description": param_desc}
-        if isinstance(type_hints.get(name), type(Literal)):
-            param_info["enum"] = list(type_hints[name].__args__)
-            param_info["type"] = "string"
-        function_info["parameters"]["properties"][name] = param_info  # type: ignore
+    for name, param in params.items():
+        param_info = _json_schema(type_hints.get(name, param.annotation))
+        param_info["description"] = param_descriptions.get(name, "Lorem ipsum...").strip()
+        function_info["parameters"]["properties"][name] = param_info
 
     return function_info
 
 
-def deserialize_function_from_json(json_obj: dict) -> Callable:
-    """Deserializes a function schema JSON spec to a python callable function
+def serialize_function_to_json(func: Callable) -> dict:
+    """Serializes a python callable function to a function schema JSON spec
+
+    Parameter types are converted to JSON schema types (`int` to `integer`, `List[str]` to an
+    array of strings, `Literal` to an `enum`...). Schemas are generated once per function (its
+    qualified name, code object, name and docstring) and then served from a cache.
 
     Args:
-        json_obj (dict): The function schema JSON spec
+        func (Callable): The function to serialize
 
     Returns:
-        Callable: The deserialized python callable function
+        dict: The serialized function schema JSON spec (a new dict, safe to modify)
     """
-    func_name = json_obj["name"]
-    func_docstring = json_obj["description"]
+    key = _schema_key(func)
+    cached = _schema_cache.get(key) if key is not None else None
+    if cached is None:
+        cached = orjson.dumps(_build_function_schema(func))
+        if key is not None:
+            _cache_set(_schema_cache, key, cached)
+    return orjson.loads(cached)  # type: ignore
 
-    param_types = {}
-    param_docstrings = {}
-    for param_name, param_info in json_obj["parameters"]["properties"].items():
-        param_type = param_info["type"]
-        try:
-            if param_type == "string" and "enum" in param_info:
-                param_types[param_name] = Literal.__getitem__(tuple(param_info["enum"]))
-            else:
-                param_types[param_name] = eval(param_type)
-        except NameError:
-            param_types[param_name] = str  # Fallback type if eval fails
-        param_docstrings[param_name] = param_info["description"]
 
-    param_docstring = "\n".join([f":param {name}: {desc}" for name, desc in param_docstrings.items()])
-    full_docstring = f"{func_docstring}\n{param_docstring}"
+class SerializedTools(List[Dict[str, Any]]):
+    """The `tools` of a request, serialized ahead of time.
+
+    Requests splice `fragment`, the JSON of the whole array, into the body as-is instead of
+    re-walking and re-serializing the tool dicts. The tools must not be modified afterwards.
+    """
+
+    def __init__(self, tools: Iterable[Dict[str, Any]]) -> None:
+        super().__init__(tools)
+        self.fragment = orjson.Fragment(orjson.dumps(list(self)))
+
+
+_tools_cache: Dict[Tuple[Any, ...], SerializedTools] = {}
+
+
+def functions_to_tools(functions: Sequence[Callable]) -> SerializedTools:
+    """Converts functions to the serialized `tools` of a request, cached per list of functions.
+
+    Args:
+        functions (Sequence[Callable]): The functions offered as tools
+
+    Returns:
+        SerializedTools: The tool JSON specs, with their pre-serialized JSON
+    """
+    keys = tuple(_schema_key(func) for func in functions)
+    if None in keys:
+        return SerializedTools(convert_function_json_to_tool_json(serialize_function_to_json(f)) for f in functions)
+    tools = _tools_cache.get(keys)
+    if tools is None:
+        tools = SerializedTools(convert_function_json_to_tool_json(serialize_function_to_json(f)) for f in functions)
+        _cache_set(_tools_cache, keys, tools)
+    return tools
+
+
+def _python_type(schema: Dict[str, Any]) -> Any:
+    """Converts a JSON schema to the type annotation of its values, without evaluating anything.
+
+    Args:
+        schema (Dict[str, Any]): The JSON schema of a parameter
+
+    Returns:
+        Any: The annotation, `str` for unknown types
+    """
+    if "enum" in schema:
+        return Literal.__getitem__(tuple(schema["enum"]))
+    if "anyOf" in schema:
+        options = tuple(_python_type(option) for option in schema["anyOf"])
+        return Union[options] if len(options) > 1 else options[0]  # type: ignore
+    json_type = schema.get("type")
+    if json_type is None:
+        return Any
+    if isinstance(json_type, list):
+        return Union[tuple(_python_type({"type": option}) for option in json_type)]  # type: ignore
+    if json_type == "array" and isinstance(schema.get("items"), dict):
+        return List[_python_type(schema["items"])]  # type: ignore
+    return _PYTHON_TYPES.get(json_type, str)
+
+
+def _unbound(name: str) -> Callable[..., Any]:
+    def call(*args: Any, **kwargs: Any) -> Any:
+        raise ShuttleAIException(f"No function is bound to the tool {name!r}")
+
+    return call
+
+
+class _FunctionSpec(NamedTuple):
+    """The parts of a deserialized function that only depend on its schema."""
+
+    name: str
+    doc: str
+    annotations: Dict[str, Any]
+    signature: inspect.Signature
+
+
+def _function_spec(json_obj: Dict[str, Any]) -> _FunctionSpec:
+    parameters = json_obj.get("parameters") or {}
+    required = set(parameters.get("required") or ())
+
+    annotations = {}
+    signature_params = []
+    param_docstrings = []
+    for param_name, param_info in (parameters.get("properties") or {}).items():
+        annotations[param_name] = annotation = _python_type(param_info)
+        signature_params.append(
+            inspect.Parameter(
+                param_name,
+                inspect.Parameter.KEYWORD_ONLY,
+                default=inspect.Parameter.empty if param_name in required else param_info.get("default"),
+                annotation=annotation,
+            )
+        )
+        param_docstrings.append(f":param {param_name}: {param_info.get('description', '')}")
 
-    def func(*args, **kwargs):  # type: ignore
-        real_func = globals()[func_name]
-        return real_func(*args, **kwargs)
+    doc = "\n".join([json_obj.get("description", ""), *param_docstrings])
+    return _FunctionSpec(json_obj["name"], doc, annotations, inspect.Signature(signature_params))
 
-    func.__name__ = func_name
-    func.__doc__ = full_docstring
-    func.__annotations__ = param_types
 
+def _bind(spec: _FunctionSpec, registry: Optional[Mapping[str, Callable[..., Any]]]) -> Callable[..., Any]:
+    func_name = spec.name
+    if registry is None:
+        func = _unbound(func_name)
+    else:
+
+        def func(*args: Any, **kwargs: Any) -> Any:
+            try:
+                real_func = registry[func_name]
+            except KeyError:
+                raise ShuttleAIException(f"No function is bound to the tool {func_name!r}") from None
+            return real_func(*args, **kwargs)
+
+    func.__name__ = func.__qualname__ = func_name
+    func.__doc__ = spec.doc
+    func.__annotations__ = dict(spec.annotations)
+    func.__signature__ = spec.signature  # type: ignore
     return func
 
 
+_spec_cache: Dict[bytes, _FunctionSpec] = {}
+
+
+def deserialize_function_from_json(
+    json_obj: dict, registry: Optional[Mapping[str, Callable[..., Any]]] = None
+) -> Callable:
+    """Deserializes a function schema JSON spec to a python callable function
+
+    The parameter types are resolved from their JSON schema types through a fixed table (no code
+    is evaluated), and the function calls the implementation registered under the same name in
+    `registry`, looked up on every call. The signature of each schema is cached, so rebuilding a
+    tool catalog from JSON is cheap; every call returns a new function, which only references its
+    own registry.
+
+    Args:
+        json_obj (dict): The function schema JSON spec
+        registry (Mapping[str, Callable]): The implementations of the tools by name, e.g. a
+            `ToolRuntime`'s `functions`; without one, calling the function raises
+
+    Returns:
+        Callable: The deserialized python callable function
+    """
+    key = orjson.dumps(json_obj, option=orjson.OPT_SORT_KEYS)
+    spec = _spec_cache.get(key)
+    if spec is None:
+        spec = _function_spec(json_obj)
+        _cache_set(_spec_cache, key, spec)
+    return _bind(spec, registry)
+
+
 def convert_function_json_to_tool_json(json_obj: dict) -> dict:
     """Converts a serialized function JSON object to a tool JSON SPEC
 
@@ -111,3 +373,506 @@ def convert_function_json_to_tool_json(json_obj: dict) -> dict:
         dict: The tool JSON SPEC object
     """
     return {"type": "function", "function": json_obj}
+
+
+def _tool_content(result: Any) -> str:
+    """Converts the return value of a tool to the content of a tool message."""
+    if isinstance(result, str):
+        return result
+    if isinstance(result, BaseModel):
+        return result.model_dump_json(exclude_none=True)
+    return orjson.dumps(result, default=str).decode()
+
+
+def _tool_message(tool_call: ToolCall, content: str) -> Dict[str, Any]:
+    return {"role": "tool", "tool_call_id": tool_call.id, "name": tool_call.function.name, "content": content}
+
+
+def _error_content(error: BaseException) -> str:
+    return f"Error: {type(error).__name__}: {error}" if str(error) else f"Error: {type(error).__name__}"
+
+
+_JSON_STRUCTURE_PATTERN = re.compile(r'[\[\]{}"\\]')
+
+
+class _ArgumentsScanner:
+    """Tracks the nesting of a JSON object streamed in fragments, to tell when it is complete.
+
+    Only the structural characters are visited, so scanning is linear in the size of the arguments.
+    """
+
+    __slots__ = ("depth", "in_string", "escaped", "complete")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+
+    def feed(self, text: str) -> bool:
+        """Scans the next fragment, returning whether the object is complete."""
+        position = 0
+        if self.escaped:
+            position, self.escaped = 1, False
+        while not self.complete and (match := _JSON_STRUCTURE_PATTERN.search(text, position)):
+            char, index = match.group(), match.start()
+            position = index + 1
+            if self.in_string:
+                if char == "\\":
+                    if position >= len(text):
+                        self.escaped = True
+                    position += 1
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                self.complete = self.depth == 0
+        return self.complete
+
+
+class _PartialToolCall:
+    __slots__ = ("id", "type", "name", "arguments", "scanner", "done")
+
+    def __init__(self) -> None:
+        self.id: Optional[str] = None
+        self.type: Optional[ToolType] = None
+        self.name = ""
+        self.arguments: List[str] = []
+        self.scanner = _ArgumentsScanner()
+        self.done = False
+
+    def tool_call(self) -> ToolCall:
+        return ToolCall(
+            id=self.id or "call_null",
+            type=self.type or ToolType.function,
+            function=FunctionCall(name=self.name, arguments="".join(self.arguments)),
+        )
+
+
+class ToolCallStream:
+    """Assembles the tool calls of one choice of a streamed response from their fragments.
+
+    `add` returns the calls whose arguments just became a complete JSON object, so they can be run
+    while the rest of the response is still streaming; `finish` returns the ones that never did
+    (e.g. calls without arguments) once the stream is over.
+
+    Example:
+        ```python
+        calls = ToolCallStream()
+        for chunk in client.chat.completions.create(..., stream=True):
+            for tool_call in calls.add_chunk(chunk):
+                start(tool_call)
+        for tool_call in calls.finish():
+            start(tool_call)
+        ```
+    """
+
+    def __init__(self, choice: int = 0) -> None:
+        """
+        Args:
+            choice (int): The index of the choice whose tool calls are assembled by `add_chunk`
+        """
+        self.choice = choice
+        self._calls: Dict[int, _PartialToolCall] = {}
+
+    def add(self, deltas: Sequence[DeltaToolCall]) -> List[ToolCall]:
+        """Adds the tool call fragments of a chunk.
+
+        Args:
+            deltas (Sequence[DeltaToolCall]): The `tool_calls` of the chunk's delta
+
+        Returns:
+            List[ToolCall]: The calls completed by these fragments
+        """
+        completed = []
+        for delta in deltas:
+            index = delta.index if delta.index is not None else len(self._calls)
+            call = self._calls.get(index)
+            if call is None:
+                call = self._calls[index] = _PartialToolCall()
+            call.id = delta.id or call.id
+            call.type = delta.type or call.type
+            if delta.function is not None:
+                call.name += delta.function.name or ""
+                if delta.function.arguments:
+                    call.arguments.append(delta.function.arguments)
+                    complete = call.scanner.feed(delta.function.arguments)
+                    if complete and call.name and not call.done:
+                        call.done = True
+                        completed.append(call.tool_call())
+        return completed
+
+    def add_chunk(self, chunk: ChatCompletionStreamResponse) -> List[ToolCall]:
+        """Adds the tool call fragments of the tracked choice of a chunk, see `add`."""
+        completed = []
+        for choice in chunk.choices:
+            if choice.index == self.choice and choice.delta.tool_calls:
+                completed.extend(self.add(choice.delta.tool_calls))
+        return completed
+
+    def finish(self) -> List[ToolCall]:
+        """Returns the calls not completed yet, once the stream is over."""
+        completed = []
+        for _, call in sorted(self._calls.items()):
+            if not call.done:
+                call.done = True
+                completed.append(call.tool_call())
+        return completed
+
+    @property
+    def tool_calls(self) -> List[ToolCall]:
+        """All the tool calls received so far, in order, complete or not."""
+        return [call.tool_call() for _, call in sorted(self._calls.items())]
+
+
+class ToolRuntime:
+    """Runs the tool calls requested by a model, and the conversation loop around them.
+
+    Python callables, sync or async, are registered as tools. Their schemas are generated with
+    `serialize_function_to_json` and sent as the `tools` of the requests. When a response calls
+    tools, every call is executed concurrently, on a thread pool for sync functions and as tasks
+    on the event loop for async ones, and each result is appended to the conversation as a `tool`
+    message. Exceptions, invalid arguments, unknown tools and timeouts are reported to the model
+    as the content of the tool message rather than raised, so it can recover.
+
+    A sync tool that times out can't be interrupted: it keeps its worker thread until it returns,
+    but its result is discarded.
+
+    Example:
+        ```python
+        tools = ToolRuntime(timeout=10)
+
+        @tools.register
+        def get_current_weather(location: str) -> str:
+            \"\"\"Get the current weather in a given location\"\"\"
+            ...
+
+        messages = [{"role": "user", "content": "what is the weather in Paris and in Rome?"}]
+        response = tools.run(client, messages, model="shuttle-3.5")
+        ```
+    """
+
+    def __init__(
+        self,
+        functions: Sequence[Callable[..., Any]] = (),
+        timeout: Optional[float] = 30.0,
+        max_workers: int = 8,
+        max_rounds: int = 10,
+    ) -> None:
+        """
+        Args:
+            functions (Sequence[Callable]): Functions to register as tools
+            timeout (float): The default timeout of a tool call in seconds, None for no timeout
+            max_workers (int): The number of threads running sync tools
+            max_rounds (int): The maximum number of tool-calling responses `run` goes through
+        """
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_rounds = max_rounds
+        self._functions: Dict[str, Callable[..., Any]] = {}
+        self.functions: Mapping[str, Callable[..., Any]] = MappingProxyType(self._functions)
+        """The registered functions by name (read-only), e.g. as the registry of `deserialize_function_from_json`."""
+        self._timeouts: Dict[str, Optional[float]] = {}
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._tools: Optional[SerializedTools] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        for function in functions:
+            self.register(function)
+
+    def register(
+        self,
+        function: Optional[Callable[..., Any]] = None,
+        *,
+        name: Optional[str] = None,
+        timeout: Union[float, None, Literal["default"]] = "default",
+    ) -> Any:
+        """Registers a function as a tool, also usable as a decorator (`@runtime.register(timeout=5)`).
+
+        Args:
+            function (Callable): The function, sync or async
+            name (str): The name of the tool, defaults to the name of the function
+            timeout (float): The timeout of the tool's calls, defaults to the runtime's timeout
+
+        Returns:
+            Callable: The function itself, or a decorator if no function was given
+        """
+        if function is None:
+            return lambda function: self.register(function, name=name, timeout=timeout)
+
+        schema = serialize_function_to_json(function)
+        if name is not None:
+            schema["name"] = name
+        self._functions[schema["name"]] = function
+        self._schemas[schema["name"]] = schema
+        self._tools = None
+        if timeout != "default":
+            self._timeouts[schema["name"]] = timeout  # type: ignore
+        return function
+
+    def unregister(self, name: str) -> None:
+        del self._functions[name]
+        del self._schemas[name]
+        self._tools = None
+        self._timeouts.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._functions
+
+    @property
+    def tools(self) -> SerializedTools:
+        """The `tools` of a chat completion request offering the registered functions, serialized once."""
+        if self._tools is None:
+            self._tools = SerializedTools(convert_function_json_to_tool_json(s) for s in self._schemas.values())
+        return self._tools
+
+    def timeout_of(self, name: str) -> Optional[float]:
+        return self._timeouts.get(name, self.timeout)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="shuttleai-tools")
+            return self._executor
+
+    def close(self) -> None:
+        """Shuts down the thread pool of sync tools, without waiting for running calls."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def __enter__(self) -> "ToolRuntime":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _prepare(self, tool_call: ToolCall) -> Callable[[], Any]:
+        """Resolves a tool call into a call of its function with its decoded arguments."""
+        function = self._functions.get(tool_call.function.name)
+        if function is None:
+            raise KeyError(f"Unknown tool {tool_call.function.name!r}")
+        arguments = orjson.loads(tool_call.function.arguments or "{}")
+        if not isinstance(arguments, dict):
+            raise TypeError("Tool arguments must be a JSON object")
+        return lambda: function(**arguments)
+
+    def _run_sync(self, call: Callable[[], Any]) -> Any:
+        result = call()
+        if inspect.isawaitable(result):
+            return asyncio.run(_awaitable(result))
+        return result
+
+    def _submit(self, tool_call: ToolCall) -> Tuple[ToolCall, Union["Future[Any]", Exception], float]:
+        """Starts a tool call on the thread pool, returning it with its future (or error) and start time."""
+        try:
+            return tool_call, self._get_executor().submit(self._run_sync, self._prepare(tool_call)), time.monotonic()
+        except Exception as e:
+            return tool_call, e, time.monotonic()
+
+    def _result(self, submitted: Tuple[ToolCall, Union["Future[Any]", Exception], float]) -> Dict[str, Any]:
+        """Waits for a tool call started by `_submit`, until its timeout, and returns its tool message."""
+        tool_call, future, started = submitted
+        if isinstance(future, Exception):
+            return _tool_message(tool_call, _error_content(future))
+        timeout = self.timeout_of(tool_call.function.name)
+        try:
+            remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+            content = _tool_content(future.result(timeout=remaining))
+        except FutureTimeoutError:
+            future.cancel()
+            content = _error_content(ShuttleAITimeoutException(f"The tool did not return within {timeout}s"))
+        except Exception as e:
+            content = _error_content(e)
+        return _tool_message(tool_call, content)
+
+    def execute(self, tool_calls: Sequence[ToolCall]) -> List[Dict[str, Any]]:
+        """Runs tool calls concurrently on the thread pool.
+
+        Args:
+            tool_calls (Sequence[ToolCall]): The tool calls of a response message
+
+        Returns:
+            List[Dict[str, Any]]: The tool messages with the results, in the order of the calls
+        """
+        submitted = [self._submit(tool_call) for tool_call in tool_calls]
+        return [self._result(call) for call in submitted]
+
+    async def _call_async(self, tool_call: ToolCall) -> Dict[str, Any]:
+        timeout = self.timeout_of(tool_call.function.name)
+        try:
+            call = self._prepare(tool_call)
+            function = self._functions[tool_call.function.name]
+            if inspect.iscoroutinefunction(function):
+                awaitable: Awaitable[Any] = call()
+            else:
+                awaitable = asyncio.get_running_loop().run_in_executor(self._get_executor(), self._run_sync, call)
+            content = _tool_content(await asyncio.wait_for(awaitable, timeout))
+        except asyncio.TimeoutError:
+            content = _error_content(ShuttleAITimeoutException(f"The tool did not return within {timeout}s"))
+        except Exception as e:
+            content = _error_content(e)
+        return _tool_message(tool_call, content)
+
+    async def async_execute(self, tool_calls: Sequence[ToolCall]) -> List[Dict[str, Any]]:
+        """Runs tool calls concurrently as tasks, async tools on the event loop and sync ones on the thread pool.
+
+        Args:
+            tool_calls (Sequence[ToolCall]): The tool calls of a response message
+
+        Returns:
+            List[Dict[str, Any]]: The tool messages with the results, in the order of the calls
+        """
+        return list(await asyncio.gather(*(self._call_async(tool_call) for tool_call in tool_calls)))
+
+    def _request(self, messages: Any, options: Dict[str, Any]) -> Dict[str, Any]:
+        request = {"tools": self.tools, "tool_choice": "auto", **options, "messages": messages}
+        request.pop("stream", None)
+        return request
+
+    def run(
+        self,
+        client: "ShuttleAI",
+        messages: Union[List[Any], Conversation],
+        max_rounds: Optional[int] = None,
+        **options: Any,
+    ) -> ChatCompletionResponse:
+        """Sends a conversation and runs the tools it calls, until a response calls no tool.
+
+        The assistant messages and the tool messages are appended to `messages`.
+
+        Args:
+            client (ShuttleAI): The client sending the requests
+            messages (Union[List[Any], Conversation]): The conversation, extended in place
+            max_rounds (int): The maximum number of tool-calling responses, defaults to the runtime's
+            **options: Other arguments of `chat.completions.create`, e.g. `model`
+
+        Returns:
+            ChatCompletionResponse: The last response, the one without tool calls (unless the
+            rounds ran out)
+        """
+        rounds = self.max_rounds if max_rounds is None else max_rounds
+        for turn in range(rounds + 1):
+            response = client.chat.completions.create(**self._request(messages, options))
+            message = response.first_choice.message
+            if not message.tool_calls or turn == rounds:
+                return response
+            messages.append(_assistant_message(message))
+            messages.extend(self.execute(message.tool_calls))
+        raise AssertionError("unreachable")
+
+    async def async_run(
+        self,
+        client: "AsyncShuttleAI",
+        messages: Union[List[Any], Conversation],
+        max_rounds: Optional[int] = None,
+        **options: Any,
+    ) -> ChatCompletionResponse:
+        """Async version of `run`."""
+        rounds = self.max_rounds if max_rounds is None else max_rounds
+        for turn in range(rounds + 1):
+            response = await client.chat.completions.create(**self._request(messages, options))
+            message = response.first_choice.message
+            if not message.tool_calls or turn == rounds:
+                return response
+            messages.append(_assistant_message(message))
+            messages.extend(await self.async_execute(message.tool_calls))
+        raise AssertionError("unreachable")
+
+    def run_streamed(
+        self,
+        client: "ShuttleAI",
+        messages: Union[List[Any], Conversation],
+        max_rounds: Optional[int] = None,
+        on_chunk: Optional[Callable[[ChatCompletionStreamResponse], Any]] = None,
+        **options: Any,
+    ) -> ChatCompletionResponse:
+        """Streaming version of `run`: every tool call starts as soon as its arguments are complete.
+
+        Tools run while the model is still streaming the following calls, so the latency of the
+        tools overlaps with the generation. The model must support streamed tool calls.
+
+        Args:
+            client (ShuttleAI): The client sending the requests
+            messages (Union[List[Any], Conversation]): The conversation, extended in place
+            max_rounds (int): The maximum number of tool-calling responses, defaults to the runtime's
+            on_chunk (Callable): Called with every chunk of the streams, e.g. to print the content
+            **options: Other arguments of `chat.completions.create`, e.g. `model`
+
+        Returns:
+            ChatCompletionResponse: The last response, assembled from its chunks
+        """
+        from shuttleai.resources.chat.caching import StreamRecorder
+
+        rounds = self.max_rounds if max_rounds is None else max_rounds
+        for turn in range(rounds + 1):
+            recorder, calls = StreamRecorder(), ToolCallStream()
+            submitted = []
+            for chunk in client.chat.completions.create(**self._request(messages, options), stream=True):
+                recorder.add(chunk)
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                if turn < rounds:
+                    submitted.extend(self._submit(call) for call in calls.add_chunk(chunk))
+            submitted.extend(self._submit(call) for call in calls.finish())
+            response = recorder.response()
+            if response is None:
+                raise ShuttleAIException("The stream ended without any chunk")
+            if not calls.tool_calls or turn == rounds:
+                return response
+            messages.append(_assistant_message(response.first_choice.message))
+            messages.extend(self._result(call) for call in submitted)
+        raise AssertionError("unreachable")
+
+    async def async_run_streamed(
+        self,
+        client: "AsyncShuttleAI",
+        messages: Union[List[Any], Conversation],
+        max_rounds: Optional[int] = None,
+        on_chunk: Optional[Callable[[ChatCompletionStreamResponse], Any]] = None,
+        **options: Any,
+    ) -> ChatCompletionResponse:
+        """Async version of `run_streamed`."""
+        from shuttleai.resources.chat.caching import StreamRecorder
+
+        rounds = self.max_rounds if max_rounds is None else max_rounds
+        for turn in range(rounds + 1):
+            recorder, calls = StreamRecorder(), ToolCallStream()
+            tasks: List["asyncio.Task[Dict[str, Any]]"] = []
+            try:
+                async for chunk in await client.chat.completions.create(
+                    **self._request(messages, options), stream=True
+                ):
+                    recorder.add(chunk)
+                    if on_chunk is not None:
+                        on_chunk(chunk)
+                    if turn < rounds:
+                        tasks.extend(asyncio.ensure_future(self._call_async(c)) for c in calls.add_chunk(chunk))
+                tasks.extend(asyncio.ensure_future(self._call_async(call)) for call in calls.finish())
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+            response = recorder.response()
+            if response is None:
+                raise ShuttleAIException("The stream ended without any chunk")
+            if not calls.tool_calls or turn == rounds:
+                for task in tasks:
+                    task.cancel()
+                return response
+            messages.append(_assistant_message(response.first_choice.message))
+            messages.extend(await asyncio.gather(*tasks))
+        raise AssertionError("unreachable")
+
+
+async def _awaitable(awaitable: Awaitable[Any]) -> Any:
+    return await awaitable
+
+
+def _assistant_message(message: ChatResponseMessage) -> Dict[str, Any]:
+    return message.model_dump(mode="json", exclude_none=True)
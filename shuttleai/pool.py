@@ -0,0 +1,356 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from shuttleai._concurrency import ItemResult, RateLimitGate, async_call_with_retries
+from shuttleai.exceptions import ShuttleAIException
+
+Item = Tuple[int, Dict[str, Any]]
+
+
+PoolResult = ItemResult
+"""The result of a request run by a pool."""
+
+
+class WorkerMetrics(NamedTuple):
+    requests: int = 0
+    failures: int = 0
+    latency: float = 0.0
+    """The sum of the latencies of the requests, in seconds."""
+
+    cpu_time: float = 0.0
+    """The CPU time used by the worker process, in seconds."""
+
+
+class PoolMetrics:
+    """Metrics of a pool's workers, aggregated by the parent process."""
+
+    def __init__(self, workers: List[WorkerMetrics], wall_time: float) -> None:
+        self.workers = workers
+        self.wall_time = wall_time
+        self.requests = sum(worker.requests for worker in workers)
+        self.failures = sum(worker.failures for worker in workers)
+        self.cpu_time = sum(worker.cpu_time for worker in workers)
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second since the pool started."""
+        return self.requests / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return sum(worker.latency for worker in self.workers) / self.requests if self.requests else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"PoolMetrics(requests={self.requests}, failures={self.failures}, "
+            f"throughput={self.throughput:.1f}/s, mean_latency={self.mean_latency:.3f}s, cpu_time={self.cpu_time:.2f}s)"
+        )
+
+
+def _dumps(message: Any) -> bytes:
+    return pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _picklable_error(error: BaseException) -> BaseException:
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return ShuttleAIException(f"{type(error).__name__}: {error}")
+
+
+def _resolve(client: Any, method: str) -> Callable[..., Any]:
+    target = client
+    for name in method.split("."):
+        target = getattr(target, name)
+    return target  # type: ignore
+
+
+def _worker_main(
+    conn: Connection,
+    client_options: Dict[str, Any],
+    method: str,
+    handler: Optional[Callable[[Any], Any]],
+    concurrency: int,
+    retries: int,
+) -> None:
+    asyncio.run(_worker(conn, client_options, method, handler, concurrency, retries))
+
+
+async def _worker(
+    conn: Connection,
+    client_options: Dict[str, Any],
+    method: str,
+    handler: Optional[Callable[[Any], Any]],
+    concurrency: int,
+    retries: int,
+) -> None:
+    """Runs the requests sent by the parent on one event loop, sending results back in batches.
+
+    A reader thread drains the pipe from the parent and a writer thread sends the results, so the
+    event loop never blocks on IPC and the two processes can't deadlock on full pipes.
+    """
+    from shuttleai.client import AsyncShuttleAI
+
+    loop = asyncio.get_running_loop()
+    inbox: "asyncio.Queue[Any]" = asyncio.Queue()
+    outbox: "queue.Queue[Optional[bytes]]" = queue.Queue()
+
+    def read() -> None:
+        while True:
+            try:
+                message = pickle.loads(conn.recv_bytes())
+            except (EOFError, OSError):
+                message = ("close",)
+            loop.call_soon_threadsafe(inbox.put_nowait, message)
+            if message[0] == "close":
+                return
+
+    def write() -> None:
+        while (data := outbox.get()) is not None:
+            conn.send_bytes(data)
+
+    reader = threading.Thread(target=read, name="shuttleai-pool-reader", daemon=True)
+    writer = threading.Thread(target=write, name="shuttleai-pool-writer", daemon=True)
+    reader.start()
+    writer.start()
+
+    requests = failures = 0
+    latency = 0.0
+    results: List[PoolResult] = []
+    flush_scheduled = False
+
+    def metrics() -> WorkerMetrics:
+        return WorkerMetrics(requests, failures, latency, time.process_time())
+
+    def flush() -> None:
+        nonlocal results, flush_scheduled
+        flush_scheduled = False
+        outbox.put(_dumps(("results", results, metrics())))
+        results = []
+
+    semaphore = asyncio.Semaphore(concurrency)
+    gate = RateLimitGate()
+    tasks = set()
+
+    async with AsyncShuttleAI(**client_options) as client:
+        call = _resolve(client, method)
+
+        async def run(index: int, request: Dict[str, Any]) -> None:
+            nonlocal requests, failures, latency, flush_scheduled
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    response = await async_call_with_retries(call, retries=retries, gate=gate, **request)
+                    result = PoolResult(index, handler(response) if handler is not None else response)
+                except Exception as e:  # captured per request
+                    failures += 1
+                    result = PoolResult(index, None, _picklable_error(e))
+                requests += 1
+                latency += time.monotonic() - started
+            results.append(result)
+            # results completed in the same iteration of the loop are sent together
+            if not flush_scheduled:
+                flush_scheduled = True
+                loop.call_soon(flush)
+
+        while (message := await inbox.get())[0] != "close":
+            for index, request in message[1]:
+                task = asyncio.ensure_future(run(index, request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        await asyncio.sleep(0)  # run a pending flush
+
+    outbox.put(_dumps(("closed", metrics())))
+    outbox.put(None)
+    writer.join()
+
+
+class ShuttleAIPool:
+    """Runs requests across several worker processes, each with its own `AsyncShuttleAI` session.
+
+    One event loop is enough to keep thousands of requests in flight, but at high throughput it
+    becomes CPU-bound on JSON decoding, validation and the processing of responses. The pool shards
+    requests over `processes` workers, so that work runs on every core; only the requests and the
+    results (the responses, or what `handler` returns for them) cross process boundaries, pickled
+    in batches over pipes.
+
+    Every worker runs at most `concurrency` requests at once, retrying rate limits and transient
+    errors. Requests are consumed lazily: a worker is sent a chunk of `chunk_size` requests
+    whenever fewer than `concurrency` of its requests are pending.
+
+    `handler` runs in the workers, on every response; like `client_options`, it must be picklable
+    (e.g. a module-level function).
+
+    Example:
+        ```python
+        def answer(response: ChatCompletionResponse) -> str:
+            return response.first_choice.message.content
+
+        with ShuttleAIPool(processes=4, handler=answer) as pool:
+            for result in pool.imap({"messages": [...], "model": "shuttle-3.5"} for _ in range(100_000)):
+                ...
+        ```
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        method: str = "chat.completions.create",
+        handler: Optional[Callable[[Any], Any]] = None,
+        concurrency: int = 64,
+        chunk_size: int = 16,
+        retries: int = 3,
+        **client_options: Any,
+    ) -> None:
+        """
+        Args:
+            processes (int): The number of worker processes, defaults to the number of CPUs
+            method (str): The client method called with every request's keyword arguments
+            handler (Callable): Called in the worker on every response; its return value is the result
+            concurrency (int): The maximum number of requests in flight per worker
+            chunk_size (int): The number of requests sent to a worker at once
+            retries (int): The number of retries per request on retryable errors
+            **client_options: Arguments of the workers' `AsyncShuttleAI` clients, e.g. `api_key`
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.method = method
+        self.handler = handler
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.client_options = client_options
+        self._workers: List[multiprocessing.process.BaseProcess] = []
+        self._conns: List[Connection] = []
+        self._metrics: List[WorkerMetrics] = []
+        self._started = 0.0
+        self._busy = False
+
+    def __enter__(self) -> "ShuttleAIPool":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Starts the worker processes (done on first use otherwise)."""
+        if self._workers:
+            return
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.processes):
+            parent_conn, child_conn = context.Pipe()
+            worker = context.Process(
+                target=_worker_main,
+                args=(child_conn, self.client_options, self.method, self.handler, self.concurrency, self.retries),
+                daemon=True,
+            )
+            worker.start()
+            child_conn.close()
+            self._workers.append(worker)
+            self._conns.append(parent_conn)
+        self._metrics = [WorkerMetrics() for _ in self._workers]
+        self._started = time.monotonic()
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        return PoolMetrics(list(self._metrics), time.monotonic() - self._started if self._started else 0.0)
+
+    def _receive(self, conn: Connection) -> Any:
+        try:
+            return pickle.loads(conn.recv_bytes())
+        except EOFError:
+            raise ShuttleAIException("A pool worker exited unexpectedly") from None
+
+    def imap(self, requests: Iterable[Dict[str, Any]], ordered: bool = False) -> Iterator[PoolResult]:
+        """Runs requests (the keyword arguments of `method`) on the workers, yielding their results.
+
+        Results are yielded in completion order, or in input order if `ordered`, with failures
+        captured in `PoolResult.error` rather than raised.
+        """
+        if self._busy:
+            raise ShuttleAIException("The pool is already running an imap")
+        self.start()
+        self._busy = True
+        iterator = enumerate(requests)
+        pending = [0] * len(self._conns)
+        workers = {conn: worker for worker, conn in enumerate(self._conns)}
+        reorder: Dict[int, PoolResult] = {}
+        next_index = 0
+        dispatched = 0
+        max_ahead = 2 * self.concurrency * len(self._conns)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted:
+                    worker = min(range(len(pending)), key=pending.__getitem__)
+                    if pending[worker] >= self.concurrency or (ordered and dispatched - next_index >= max_ahead):
+                        break
+                    chunk: List[Item] = []
+                    for index, request in iterator:
+                        chunk.append((index, request))
+                        if len(chunk) >= self.chunk_size:
+                            break
+                    exhausted = len(chunk) < self.chunk_size
+                    if chunk:
+                        self._conns[worker].send_bytes(_dumps(("run", chunk)))
+                        pending[worker] += len(chunk)
+                        dispatched += len(chunk)
+                if not any(pending):
+                    return
+
+                for conn in wait([conn for conn, worker in workers.items() if pending[worker]]):
+                    worker = workers[conn]  # type: ignore
+                    _, results, metrics = self._receive(conn)  # type: ignore
+                    self._metrics[worker] = metrics
+                    pending[worker] -= len(results)
+                    if not ordered:
+                        yield from results
+                        continue
+                    for result in results:
+                        reorder[result.index] = result
+                    while next_index in reorder:
+                        yield reorder.pop(next_index)
+                        next_index += 1
+        finally:
+            self._busy = False
+            if any(pending):
+                # the caller stopped early: drain the requests still running so the pool stays usable
+                self._drain(pending, workers)
+
+    def _drain(self, pending: List[int], workers: Dict[Connection, int]) -> None:
+        while any(pending):
+            for conn in wait([conn for conn, worker in workers.items() if pending[worker]]):
+                _, results, metrics = self._receive(conn)  # type: ignore
+                self._metrics[workers[conn]] = metrics  # type: ignore
+                pending[workers[conn]] -= len(results)  # type: ignore
+
+    def map(self, requests: Iterable[Dict[str, Any]]) -> List[PoolResult]:
+        """Runs requests on the workers, returning their results in input order."""
+        return list(self.imap(requests, ordered=True))
+
+    def close(self) -> None:
+        """Waits for the workers to finish their requests and stops them."""
+        for worker, conn in enumerate(self._conns):
+            try:
+                conn.send_bytes(_dumps(("close",)))
+                while (message := self._receive(conn))[0] != "closed":
+                    pass
+                self._metrics[worker] = message[1]
+            except (OSError, ShuttleAIException):
+                pass
+            conn.close()
+        for process in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._workers, self._conns = [], []
@@ -0,0 +1,520 @@
+import asyncio
+import itertools
+import logging
+import math
+import re
+import time
+from concurrent.futures import Executor
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from shuttleai.client import AsyncShuttleAI
+from shuttleai.resources.etc.web_search import SEARCH_MODELS, normalize_link
+from shuttleai.schemas.etc.web_search import WebSearchResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYSTEM = (
+    "Answer the user's question using the numbered sources below, citing them like [1]. "
+    "If the sources don't contain the answer, say so.\n\n{sources}"
+)
+PAGE_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+_SKIPPED_TAGS = frozenset(("script", "style", "noscript", "template", "svg", "head", "nav", "footer", "form", "iframe"))
+_BLOCK_TAGS = frozenset(
+    ("p", "div", "br", "li", "tr", "td", "th", "section", "article", "main", "blockquote", "pre", "table", "ul", "ol")
+    + ("h1", "h2", "h3", "h4", "h5", "h6")
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title: List[str] = []
+        self.size = 0
+        self._skipped = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag == "title":
+            self._in_title = True
+        elif tag in _SKIPPED_TAGS:
+            self._skipped += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        elif tag in _SKIPPED_TAGS:
+            self._skipped = max(0, self._skipped - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title.append(data)
+        elif not self._skipped:
+            self.parts.append(data)
+            self.size += len(data)
+
+
+def extract_text(page: str, max_chars: int = 20000, content_type: str = "text/html") -> Tuple[str, str]:
+    """Returns the title and the visible text of a page, with whitespace collapsed, truncated to `max_chars`.
+
+    Parsing stops once enough text is found, so the cost of huge pages is bounded. This is a
+    module-level function so it can run in a process pool.
+    """
+    if content_type == "text/plain":
+        title, raw = "", page[: 2 * max_chars]
+    else:
+        parser = _TextExtractor()
+        for start in range(0, len(page), 1 << 16):
+            parser.feed(page[start : start + (1 << 16)])
+            if parser.size >= 2 * max_chars:  # leaves room for the whitespace collapsed below
+                break
+        title, raw = " ".join("".join(parser.title).split()), "".join(parser.parts)
+    lines = (" ".join(line.split()) for line in raw.split("\n"))
+    return title, "\n".join(line for line in lines if line)[:max_chars]
+
+
+def chunk_text(text: str, size: int = 1000) -> List[str]:
+    """Splits text into chunks of at most `size` characters, at line, then sentence, then word boundaries."""
+    pieces: List[str] = []
+    for line in text.split("\n"):
+        if len(line) <= size:
+            pieces.append(line)
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            while len(sentence) > size:
+                cut = sentence.rfind(" ", 0, size)
+                cut = cut if cut > 0 else size
+                pieces.append(sentence[:cut])
+                sentence = sentence[cut:].lstrip()
+            pieces.append(sentence)
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > size:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0  # noqa: B905
+
+
+class Source(NamedTuple):
+    index: int
+    """The number the answer cites the source by."""
+
+    title: str
+    link: str
+    text: str
+    """The text of the source given to the model: its most relevant chunks, or the search snippet."""
+
+    score: float = 0.0
+    """The similarity of the source's best chunk to the question, if chunks are ranked with embeddings."""
+
+
+class StageTimings:
+    """Latencies of the stages of an answer, in seconds since the answer started.
+
+    Stages overlap: pages are fetched while searches are still running, and the completion starts
+    as soon as the context is ready, so a stage can start before the previous one has ended.
+    """
+
+    STAGES = ("first_search", "searched", "first_page", "context_ready", "ranked", "first_token", "done")
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.stages: Dict[str, float] = {}
+        """When each stage was reached, in `STAGES` order."""
+        self.fetches: List[float] = []
+        """The duration of every page fetch."""
+        self.extractions: List[float] = []
+        """The duration of every text extraction, including the wait for a worker."""
+
+    def mark(self, stage: str) -> None:
+        """Records that a stage was reached, unless it already was."""
+        self.stages.setdefault(stage, time.monotonic() - self.started)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **{stage: self.stages[stage] for stage in self.STAGES if stage in self.stages},
+            "fetches": self.fetches,
+            "extractions": self.extractions,
+        }
+
+    def __repr__(self) -> str:
+        stages = ", ".join(f"{stage}={self.stages[stage]:.3f}s" for stage in self.STAGES if stage in self.stages)
+        mean_fetch = sum(self.fetches) / len(self.fetches) if self.fetches else 0.0
+        mean_extraction = sum(self.extractions) / len(self.extractions) if self.extractions else 0.0
+        return (
+            f"StageTimings({stages}, fetches={len(self.fetches)} x {mean_fetch:.3f}s, "
+            f"extractions={len(self.extractions)} x {mean_extraction:.3f}s)"
+        )
+
+
+class Answer(NamedTuple):
+    content: str
+    sources: List[Source]
+    timings: StageTimings
+
+
+class _Page:
+    def __init__(self, rank: int, result: WebSearchResult, title: str, chunks: List[str]) -> None:
+        self.rank = rank
+        self.result = result
+        self.title = title or result.title
+        self.chunks = chunks
+        self.vectors: List["asyncio.Future[Optional[List[float]]]"] = []
+
+
+class AnswerStream:
+    """The answer of an `AnswerPipeline` to a question, as an async iterator of the text of the answer.
+
+    `sources` are set once the context is ready, and `content` once the answer is complete;
+    `timings` are updated as the stages progress.
+    """
+
+    def __init__(self, pipeline: "AnswerPipeline", question: str, queries: Optional[Sequence[str]] = None) -> None:
+        self.pipeline = pipeline
+        self.question = question
+        self.queries = list(queries) if queries else [question]
+        self.sources: List[Source] = []
+        self.content = ""
+        self.timings = StageTimings()
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._run()
+
+    async def _run(self) -> AsyncIterator[str]:
+        pipeline = self.pipeline
+        self.sources = await pipeline._context(self.question, self.queries, self.timings)
+        context = "\n\n".join(
+            f"[{source.index}] {source.title} ({source.link})\n{source.text}" for source in self.sources
+        )
+        messages = [
+            {"role": "system", "content": pipeline.system.format(sources=context)},
+            {"role": "user", "content": self.question},
+        ]
+        options = dict(pipeline.options, model=pipeline.model) if pipeline.model else pipeline.options
+        stream = await pipeline.client.chat.completions.create(messages=messages, stream=True, **options)
+        parts: List[str] = []
+        async for chunk in stream:
+            if chunk.choices and (text := chunk.first_choice.delta.content):
+                self.timings.mark("first_token")
+                parts.append(text)
+                yield text
+        self.content = "".join(parts)
+        self.timings.mark("done")
+        logger.debug(f"Answered {self.question!r}: {self.timings}")
+
+
+class AnswerPipeline:
+    """Answers questions from web sources, with the stages of retrieval overlapped.
+
+    Rather than searching, then fetching every page, then asking the model, the stages run as a
+    pipeline:
+
+    1. Every query is searched with every model in `search_models` concurrently.
+    2. Results are fetched by `fetch_concurrency` workers as soon as a search returns them, top
+       results of every search first, with links deduplicated across searches.
+    3. The text of every page is extracted, truncated and chunked on `executor` (the default thread
+       pool, or e.g. a `ProcessPoolExecutor`), off the event loop.
+    4. With an `embedding_model`, the chunks of a page are embedded as soon as it is extracted, and
+       the context is made of the chunks most similar to the question. Otherwise it is made of
+       the first chunks of every page, in search rank order.
+    5. The streaming completion starts as soon as `min_sources` pages are extracted, all pages
+       are, or `context_timeout` has passed; the fetches still running are cancelled. Search
+       snippets stand in for the pages that couldn't be fetched.
+
+    `StageTimings` of every answer record the latency of every stage.
+
+    Example:
+        ```python
+        pipeline = AnswerPipeline(client, embedding_model="text-embedding-3-small")
+        answer = pipeline.stream("What's new in Python 3.13?")
+        async for text in answer:
+            print(text, end="")
+        print(answer.sources, answer.timings)
+        ```
+    """
+
+    def __init__(
+        self,
+        client: AsyncShuttleAI,
+        model: Optional[str] = None,
+        search_models: Sequence[str] = SEARCH_MODELS,
+        search_limit: int = 5,
+        fetch_concurrency: int = 8,
+        fetch_timeout: float = 10.0,
+        max_page_bytes: int = 2_000_000,
+        max_page_chars: int = 20000,
+        chunk_size: int = 1000,
+        context_chars: int = 8000,
+        min_sources: int = 3,
+        context_timeout: float = 5.0,
+        embedding_model: Optional[str] = None,
+        max_chunks_per_page: int = 8,
+        executor: Optional[Executor] = None,
+        system: str = DEFAULT_SYSTEM,
+        **options: Any,
+    ) -> None:
+        """
+        Args:
+            client (AsyncShuttleAI): The client of the searches, embeddings and completions
+            model (str): The chat model, the client's default if None
+            search_models (Sequence[str]): The search models every query is searched with
+            search_limit (int): The number of results per search
+            fetch_concurrency (int): The maximum number of pages fetched (or chunks embedded) at once
+            fetch_timeout (float): The timeout of a page fetch, in seconds
+            max_page_bytes (int): The maximum size of a page, the rest is not downloaded
+            max_page_chars (int): The maximum length of the text extracted from a page
+            chunk_size (int): The maximum length of a chunk of text
+            context_chars (int): The maximum length of the text of the sources given to the model
+            min_sources (int): The number of extracted pages the completion waits for
+            context_timeout (float): The maximum wait for the context, in seconds
+            embedding_model (str): The model chunks are ranked with, if any
+            max_chunks_per_page (int): The number of chunks of a page that are candidates for the context
+            executor (Executor): Where text is extracted, the event loop's default executor if None
+            system (str): The system message, with a `{sources}` placeholder
+            **options: Other arguments of `chat.completions.create`, e.g. `max_tokens`
+        """
+        self.client = client
+        self.model = model
+        self.search_models = search_models
+        self.search_limit = search_limit
+        self.fetch_concurrency = fetch_concurrency
+        self.fetch_timeout = fetch_timeout
+        self.max_page_bytes = max_page_bytes
+        self.max_page_chars = max_page_chars
+        self.chunk_size = chunk_size
+        self.context_chars = context_chars
+        self.min_sources = min_sources
+        self.context_timeout = context_timeout
+        self.embedding_model = embedding_model
+        self.max_chunks_per_page = max_chunks_per_page
+        self.executor = executor
+        self.system = system
+        self.options = options
+
+    def stream(self, question: str, queries: Optional[Sequence[str]] = None) -> AnswerStream:
+        """Answers a question, streaming the answer.
+
+        Args:
+            question (str): The question
+            queries (Sequence[str]): The search queries, the question if None
+        """
+        return AnswerStream(self, question, queries)
+
+    async def answer(self, question: str, queries: Optional[Sequence[str]] = None) -> Answer:
+        """Answers a question, returning the whole answer with its sources and timings."""
+        stream = self.stream(question, queries)
+        async for _ in stream:
+            pass
+        return Answer(stream.content, stream.sources, stream.timings)
+
+    async def _embed(self, text: str, semaphore: asyncio.Semaphore) -> Optional[List[float]]:
+        async with semaphore:
+            try:
+                response = await self.client.embeddings.create(text, model=self.embedding_model)
+                return response.data[0].embedding
+            except Exception as e:
+                logger.debug(f"Could not embed a chunk: {e}")
+                return None
+
+    async def _fetch(self, session: Any, link: str, timings: StageTimings) -> Optional[Tuple[str, str]]:
+        """Downloads a page, returning its text and content type, or None if it is not text."""
+        started = time.monotonic()
+        async with session.get(link) as response:
+            response.raise_for_status()
+            if response.content_type not in PAGE_CONTENT_TYPES:
+                return None
+            body = bytearray()
+            async for data in response.content.iter_chunked(1 << 16):
+                body += data
+                if len(body) >= self.max_page_bytes:
+                    break
+            page = body.decode(response.charset or "utf-8", errors="replace")
+        timings.fetches.append(time.monotonic() - started)
+        return page, response.content_type
+
+    async def _context(self, question: str, queries: Sequence[str], timings: StageTimings) -> List[Source]:
+        import aiohttp
+
+        from shuttleai import __version__
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+        queue: "asyncio.PriorityQueue[Tuple[float, int, Optional[WebSearchResult]]]" = asyncio.PriorityQueue()
+        order = itertools.count()
+        seen: Set[str] = set()
+        results: List[Tuple[int, WebSearchResult]] = []
+        pages: List[_Page] = []
+        ready = asyncio.Event()
+        question_vector = (
+            asyncio.ensure_future(self._embed(question, semaphore)) if self.embedding_model is not None else None
+        )
+
+        async def search(query: str, model: str) -> None:
+            response = await self.client.web.search(query, self.search_limit, model)
+            timings.mark("first_search")
+            ranked = [result for result in response.data if isinstance(result, WebSearchResult)]
+            for rank, result in enumerate(ranked):
+                if (key := normalize_link(result.link)) not in seen:
+                    seen.add(key)
+                    results.append((rank, result))
+                    queue.put_nowait((rank, next(order), result))
+
+        async def search_all() -> None:
+            outcomes = await asyncio.gather(
+                *(search(query, model) for query in queries for model in self.search_models), return_exceptions=True
+            )
+            timings.mark("searched")
+            errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+            for _ in range(self.fetch_concurrency):
+                queue.put_nowait((math.inf, next(order), None))
+            if errors and len(errors) == len(outcomes):
+                raise errors[0]
+
+        async def fetch_worker(session: aiohttp.ClientSession) -> None:
+            while (item := await queue.get())[2] is not None:
+                rank, _, result = item
+                try:
+                    fetched = await self._fetch(session, result.link, timings)  # type: ignore
+                except (aiohttp.ClientError, asyncio.TimeoutError, LookupError, ValueError) as e:
+                    logger.debug(f"Could not fetch {result.link}: {e}")  # type: ignore
+                    continue
+                if fetched is None:
+                    continue
+                timings.mark("first_page")
+                started = time.monotonic()
+                title, text = await loop.run_in_executor(
+                    self.executor, extract_text, fetched[0], self.max_page_chars, fetched[1]
+                )
+                timings.extractions.append(time.monotonic() - started)
+                if not text:
+                    continue
+                chunks = chunk_text(text, self.chunk_size)[: self.max_chunks_per_page]
+                page = _Page(int(rank), result, title, chunks)  # type: ignore
+                if self.embedding_model is not None:
+                    # ranking overlaps with the fetches of the other pages
+                    page.vectors = [asyncio.ensure_future(self._embed(chunk, semaphore)) for chunk in page.chunks]
+                pages.append(page)
+                if len(pages) >= self.min_sources:
+                    ready.set()
+
+        headers = {"User-Agent": f"shuttleai-python/{__version__}"}
+        timeout = aiohttp.ClientTimeout(total=self.fetch_timeout)
+        async with aiohttp.ClientSession(headers=headers, timeout=timeout) as session:
+            searcher = asyncio.ensure_future(search_all())
+            workers = [asyncio.ensure_future(fetch_worker(session)) for _ in range(self.fetch_concurrency)]
+            waiter = asyncio.ensure_future(ready.wait())
+            finished = asyncio.gather(searcher, *workers)
+            try:
+                await asyncio.wait(
+                    {waiter, finished}, timeout=self.context_timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if searcher.done() and searcher.exception() is not None and not results:
+                    raise searcher.exception()  # type: ignore
+            finally:
+                for task in (waiter, finished, searcher, *workers):
+                    task.cancel()
+                await asyncio.gather(finished, return_exceptions=True)
+        timings.mark("context_ready")
+
+        try:
+            sources = await self._select(pages, question_vector)
+        finally:
+            for vector in (question_vector, *(vector for page in pages for vector in page.vectors)):
+                if vector is not None:
+                    vector.cancel()
+        timings.mark("ranked")
+        # search snippets stand in for the pages that couldn't be fetched in time
+        fetched_links = {source.link for source in sources}
+        for _, result in sorted(results, key=lambda item: item[0]):
+            if len(sources) >= self.min_sources:
+                break
+            if result.link not in fetched_links and result.snippet:
+                sources.append(Source(len(sources) + 1, result.title, result.link, result.snippet))
+        return sources
+
+    async def _select(
+        self, pages: List[_Page], question_vector: Optional["asyncio.Future[Optional[List[float]]]"]
+    ) -> List[Source]:
+        """Picks the chunks of the context, most relevant first, within `context_chars`."""
+        pages = sorted(pages, key=lambda page: page.rank)
+        # without embeddings, the first chunks of every page come first, in search rank order
+        candidates = [
+            (-float(chunk_index), page_index, chunk_index)
+            for page_index, page in enumerate(pages)
+            for chunk_index in range(len(page.chunks))
+        ]
+        query = await question_vector if question_vector is not None else None
+        if query is not None:
+            await asyncio.gather(*(vector for page in pages for vector in page.vectors))
+            scores = [
+                (_cosine(query, vector.result()) if vector.result() is not None else -1.0, page_index, chunk_index)  # type: ignore
+                for page_index, page in enumerate(pages)
+                for chunk_index, vector in enumerate(page.vectors)
+            ]
+            if any(score > -1.0 for score, _, _ in scores):
+                candidates = scores
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+
+        chosen: Dict[int, List[int]] = {}
+        scores_by_page: Dict[int, float] = {}
+        size = 0
+        for score, page_index, chunk_index in candidates:
+            length = len(pages[page_index].chunks[chunk_index])
+            if size and size + length > self.context_chars:
+                continue
+            size += length
+            chosen.setdefault(page_index, []).append(chunk_index)
+            scores_by_page.setdefault(page_index, score)
+
+        sources: List[Source] = []
+        for page_index in sorted(chosen, key=lambda index: -scores_by_page[index] if query is not None else index):
+            page = pages[page_index]
+            text = "\n".join(page.chunks[chunk_index] for chunk_index in sorted(chosen[page_index]))
+            score = scores_by_page[page_index] if query is not None else 0.0
+            sources.append(Source(len(sources) + 1, page.title, page.result.link, text, score))
+        return sources
+
+
+def answer_question(
+    question: str,
+    queries: Optional[Sequence[str]] = None,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    **options: Any,
+) -> Answer:
+    """Answers a question from web sources (see `AnswerPipeline`) with a new async client.
+
+    Args:
+        question (str): The question
+        queries (Sequence[str]): The search queries, the question if None
+        api_key (str): The API key, defaults to the SHUTTLEAI_API_KEY environment variable
+        base_url (str): The API base URL, defaults to the SHUTTLEAI_API_BASE environment variable
+        **options: Options of `AnswerPipeline`
+
+    Returns:
+        Answer: The answer, with its sources and the latencies of its stages
+    """
+
+    async def main() -> Answer:
+        async with AsyncShuttleAI(api_key=api_key, base_url=base_url) as client:
+            return await AnswerPipeline(client, **options).answer(question, queries)
+
+    return asyncio.run(main())
@@ -0,0 +1,285 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import pydantic_core
+
+from shuttleai.cache import CacheBackend, MemoryCache, cache_key
+from shuttleai.conversation import message_dicts
+from shuttleai.helpers import ToolCallStream
+from shuttleai.schemas.chat.completions import (
+    ChatCompletionResponse,
+    ChatCompletionResponseChoice,
+    ChatCompletionResponseStreamChoice,
+    ChatCompletionStreamResponse,
+    ChatResponseMessage,
+    DeltaFunctionCall,
+    DeltaMessage,
+    DeltaToolCall,
+    ToolCall,
+)
+from shuttleai.schemas.common import UsageInfo
+
+Vector = List[float]
+
+
+def _normalize(vector: Sequence[float]) -> Vector:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class ResponseCache:
+    """Cache of chat completion responses, in front of `chat.completions.create`.
+
+    Requests are keyed by a hash of the fully built request body (without `stream`), so streamed and
+    non-streamed requests share entries: cached responses are replayed to streaming requests as
+    synthetic chunk streams. Entries are stored in `backend` (in memory by default, see
+    `SQLiteCache` for a persistent one) and expire after `ttl` seconds.
+
+    In `semantic` mode, a miss falls back to the most similar cached request that differs only in
+    the content of its last message, if the cosine similarity of their embeddings reaches
+    `similarity_threshold`. Embeddings are requested from the embeddings endpoint; the similarity
+    index is kept in memory.
+
+    Example:
+        ```python
+        client = ShuttleAI(response_cache=ResponseCache(SQLiteCache("responses.db"), ttl=86400))
+        ```
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = 3600.0,
+        semantic: bool = False,
+        similarity_threshold: float = 0.95,
+        embedding_model: str = "text-embedding-3-small",
+        max_vectors: int = 1000,
+    ) -> None:
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+        self.max_vectors = max_vectors
+        self._lock = threading.Lock()
+        self._vectors: Dict[str, "OrderedDict[str, Vector]"] = {}
+
+    @staticmethod
+    def key_request(attempts: Sequence[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Returns the request a routed call is cached under.
+
+        Calls routed over several models are keyed by the set of models rather than the one that
+        ended up serving them, which depends on the models' health at the time.
+        """
+        request = attempts[0][1]
+        if len(attempts) > 1:
+            request = dict(request, model=sorted(model for model, _ in attempts))
+        return request
+
+    def key(self, request: Dict[str, Any]) -> str:
+        # messages of a `Conversation` are pre-serialized; keying by their dicts gives them the key of a list
+        rest = {k: v for k, v in request.items() if k not in ("stream", "messages")}
+        rest["messages"] = message_dicts(request.get("messages") or [])
+        return cache_key("chat", rest)
+
+    def get(self, request: Dict[str, Any]) -> Optional[ChatCompletionResponse]:
+        return self._load(self.key(request))
+
+    def _load(self, key: str) -> Optional[ChatCompletionResponse]:
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        try:
+            return ChatCompletionResponse.model_validate_json(value)
+        except pydantic_core.ValidationError:
+            self.backend.delete(key)
+            return None
+
+    def set(self, request: Dict[str, Any], response: ChatCompletionResponse, vector: Optional[Vector] = None) -> None:
+        """Stores a response, and indexes the embedding of its request in semantic mode."""
+        key = self.key(request)
+        self.backend.set(key, response.model_dump_json(exclude_none=True).encode(), self.ttl)
+        query = self.semantic_query(request) if vector is not None else None
+        if query is None or vector is None:
+            return
+        with self._lock:
+            vectors = self._vectors.setdefault(query[0], OrderedDict())
+            vectors[key] = _normalize(vector)
+            vectors.move_to_end(key)
+            while len(vectors) > self.max_vectors:
+                vectors.popitem(last=False)
+
+    def semantic_query(self, request: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Returns the similarity bucket of a request and the text to embed, if it can be matched semantically.
+
+        Only requests ending with a plain-text user message are matched; the bucket is the rest of
+        the request, which has to be identical.
+        """
+        if not self.semantic:
+            return None
+        messages = message_dicts(request.get("messages") or [])
+        last = messages[-1] if messages else None
+        if not isinstance(last, dict) or last.get("role") != "user" or not isinstance(last.get("content"), str):
+            return None
+        rest = {k: v for k, v in request.items() if k not in ("stream", "messages")}
+        rest["messages"] = messages[:-1]
+        return cache_key("chat-semantic", rest), last["content"]
+
+    def find_similar(self, bucket: str, vector: Vector) -> Optional[ChatCompletionResponse]:
+        """Returns the cached response of the most similar request in a bucket, if similar enough."""
+        query = _normalize(vector)
+        with self._lock:
+            candidates = list(self._vectors.get(bucket, {}).items())
+        best_key, best_similarity = None, self.similarity_threshold
+        for key, cached in candidates:
+            similarity = sum(a * b for a, b in zip(query, cached))  # noqa: B905
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+        if best_key is None:
+            return None
+        response = self._load(best_key)
+        if response is None:
+            with self._lock:
+                self._vectors.get(bucket, OrderedDict()).pop(best_key, None)
+        return response
+
+    def record_stream(
+        self, chunks: Iterable[ChatCompletionStreamResponse], request: Dict[str, Any], vector: Optional[Vector] = None
+    ) -> Iterator[ChatCompletionStreamResponse]:
+        """Passes a stream through, caching the assembled response once the stream has been fully consumed."""
+        recorder = StreamRecorder()
+        for chunk in chunks:
+            recorder.add(chunk)
+            yield chunk
+        response = recorder.response()
+        if response is not None:
+            self.set(request, response, vector)
+
+    async def async_record_stream(
+        self,
+        chunks: AsyncIterator[ChatCompletionStreamResponse],
+        request: Dict[str, Any],
+        vector: Optional[Vector] = None,
+    ) -> AsyncIterator[ChatCompletionStreamResponse]:
+        """Async version of `record_stream`."""
+        recorder = StreamRecorder()
+        async for chunk in chunks:
+            recorder.add(chunk)
+            yield chunk
+        response = recorder.response()
+        if response is not None:
+            self.set(request, response, vector)
+
+
+class StreamRecorder:
+    """Assembles the chunks of a streamed chat completion into a complete response."""
+
+    def __init__(self) -> None:
+        self._id: Optional[str] = None
+        self._model: Optional[str] = None
+        self._created: Optional[int] = None
+        self._usage: Optional[UsageInfo] = None
+        self._roles: Dict[int, str] = {}
+        self._content: Dict[int, List[str]] = {}
+        self._tool_calls: Dict[int, ToolCallStream] = {}
+        self._finish_reasons: Dict[int, Any] = {}
+
+    def add(self, chunk: ChatCompletionStreamResponse) -> None:
+        self._id = self._id or chunk.id
+        self._model = self._model or chunk.model
+        self._created = self._created or chunk.created
+        self._usage = chunk.usage or self._usage
+        for choice in chunk.choices:
+            index = choice.index
+            self._content.setdefault(index, [])
+            if choice.delta.role:
+                self._roles[index] = choice.delta.role
+            if choice.delta.content:
+                self._content[index].append(choice.delta.content)
+            if choice.delta.tool_calls:
+                self._tool_calls.setdefault(index, ToolCallStream(index)).add(choice.delta.tool_calls)
+            if choice.finish_reason is not None:
+                self._finish_reasons[index] = choice.finish_reason
+
+    def response(self) -> Optional[ChatCompletionResponse]:
+        """Returns the assembled response, or None if no chunk was received."""
+        if self._id is None or self._model is None:
+            return None
+        return ChatCompletionResponse(
+            id=self._id,
+            object="chat.completion",
+            created=self._created or int(time.time()),
+            model=self._model,
+            choices=[
+                ChatCompletionResponseChoice(
+                    index=index,
+                    message=ChatResponseMessage(
+                        role=self._roles.get(index, "assistant"),
+                        content="".join(content) if content or index not in self._tool_calls else None,
+                        tool_calls=self._tool_calls[index].tool_calls if index in self._tool_calls else None,
+                    ),
+                    finish_reason=self._finish_reasons.get(index),
+                )
+                for index, content in sorted(self._content.items())
+            ],
+            usage=self._usage or UsageInfo(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+        )
+
+
+def _delta_tool_calls(tool_calls: Optional[List[ToolCall]]) -> Optional[List[DeltaToolCall]]:
+    if tool_calls is None:
+        return None
+    return [
+        DeltaToolCall(
+            index=index,
+            id=tool_call.id,
+            type=tool_call.type,
+            function=DeltaFunctionCall(name=tool_call.function.name, arguments=tool_call.function.arguments),
+        )
+        for index, tool_call in enumerate(tool_calls)
+    ]
+
+
+def replay_stream(response: ChatCompletionResponse) -> List[ChatCompletionStreamResponse]:
+    """Turns a complete response into the chunks of an equivalent stream: the messages, then their finish reasons."""
+    common = {
+        "id": response.id,
+        "model": response.model,
+        "created": response.created,
+        "object": "chat.completion.chunk",
+    }
+    return [
+        ChatCompletionStreamResponse(
+            **common,
+            choices=[
+                ChatCompletionResponseStreamChoice(
+                    index=choice.index,
+                    delta=DeltaMessage(
+                        role=choice.message.role,
+                        content=choice.message.content,
+                        tool_calls=_delta_tool_calls(choice.message.tool_calls),
+                    ),
+                    finish_reason=None,
+                )
+                for choice in response.choices
+            ],
+        ),
+        ChatCompletionStreamResponse(
+            **common,
+            choices=[
+                ChatCompletionResponseStreamChoice(
+                    index=choice.index, delta=DeltaMessage(), finish_reason=choice.finish_reason
+                )
+                for choice in response.choices
+            ],
+            usage=response.usage,
+        ),
+    ]
+
+
+async def async_replay_stream(response: ChatCompletionResponse) -> AsyncIterator[ChatCompletionStreamResponse]:
+    for chunk in replay_stream(response):
+        yield chunk
@@ -1,20 +1,30 @@
-from functools import cached_property
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, partial
 from typing import (
     Any,
     AsyncIterable,
+    AsyncIterator,
     Dict,
     Generic,
     Iterable,
+    Iterator,
     List,
     Literal,
     Optional,
+    Tuple,
     Type,
     TypeVar,
     Union,
     overload,
 )
 
+from shuttleai._concurrency import RETRYABLE_EXCEPTIONS
 from shuttleai.client.base import ClientBase
+from shuttleai.conversation import Conversation
+from shuttleai.resources.chat.caching import ResponseCache, async_replay_stream, replay_stream
+from shuttleai.resources.chat.hedging import HedgePolicy, async_hedged_call, hedged_call
+from shuttleai.resources.chat.routing import ModelSpec, RoutingStrategy, routed_requests
 from shuttleai.resources.common import AsyncResource, SyncResource, T
 from shuttleai.schemas.chat.completions import (
     ChatCompletionResponse,
@@ -25,11 +35,18 @@ from shuttleai.schemas.chat.completions import (
 
 
 class AsyncCompletions(AsyncResource):
+    hedge_policy: HedgePolicy
+    """The policy (and shared budget) used by `create(..., hedge=True)`"""
+
+    def __init__(self, client: ClientBase) -> None:
+        super().__init__(client)
+        self.hedge_policy = HedgePolicy()
+
     @overload
     async def create(  # type: ignore
         self,
-        messages: Union[List[ChatMessage], List[Dict[str, Any]]],
-        model: Optional[str] = None,
+        messages: Union[List[ChatMessage], List[Dict[str, Any]], Conversation],
+        model: ModelSpec = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
@@ -38,13 +55,16 @@ class AsyncCompletions(AsyncResource):
         top_p: Optional[float] = None,
         tool_choice: Optional[Union[str, ToolChoice]] = None,
         stream: Literal[False] = False,
+        routing: Optional[RoutingStrategy] = None,
+        hedge: Union[bool, HedgePolicy] = False,
+        cache: bool = True,
     ) -> ChatCompletionResponse: ...
 
     @overload
     async def create(
         self,
-        messages: Union[List[ChatMessage], List[Dict[str, Any]]],
-        model: Optional[str] = None,
+        messages: Union[List[ChatMessage], List[Dict[str, Any]], Conversation],
+        model: ModelSpec = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
@@ -53,12 +73,15 @@ class AsyncCompletions(AsyncResource):
         top_p: Optional[float] = None,
         tool_choice: Optional[Union[str, ToolChoice]] = None,
         stream: Literal[True] = True,
+        routing: Optional[RoutingStrategy] = None,
+        hedge: Union[bool, HedgePolicy] = False,
+        cache: bool = True,
     ) -> AsyncIterable[ChatCompletionStreamResponse]: ...
 
     async def create(
         self,
-        messages: Union[List[ChatMessage], List[Dict[str, Any]]],
-        model: Optional[str] = None,
+        messages: Union[List[ChatMessage], List[Dict[str, Any]], Conversation],
+        model: ModelSpec = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
@@ -67,35 +90,160 @@ class AsyncCompletions(AsyncResource):
         top_p: Optional[float] = None,
         tool_choice: Optional[Union[str, ToolChoice]] = None,
         stream: bool = False,
+        routing: Optional[RoutingStrategy] = None,
+        hedge: Union[bool, HedgePolicy] = False,
+        cache: bool = True,
     ) -> Union[ChatCompletionResponse, AsyncIterable[ChatCompletionStreamResponse]]:
-        request = self._client._make_chat_request(
-            messages,
+        """Creates a chat completion.
+
+        `model` may also be a list of equivalent models, or a mapping of models to weights. The
+        request is then sent to the best one according to `routing` and fails over to the next one
+        on connection errors, rate limits and server errors. See `candidate_models`.
+
+        With `hedge` (True for the default policy, or a `HedgePolicy`), slow non-streaming requests
+        are duplicated after a delay, by default the model's observed p95 latency, and the first
+        response wins.
+
+        If the client has a `response_cache`, responses are served from and stored in it, unless
+        `cache` is False. If it has a `context_window`, histories too long for the model are
+        trimmed or summarized first.
+        """
+        if self._client.context_window is not None:
+            messages = await self._client.context_window.async_fit(self._client, messages, model)
+
+        attempts = routed_requests(
+            self._client,
             model,
-            image=image,
-            internet=internet,
-            tools=tools,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            top_p=top_p,
-            stream=stream,
-            tool_choice=tool_choice,
+            routing,
+            lambda candidate: self._client._make_chat_request(
+                messages,
+                candidate,
+                image=image,
+                internet=internet,
+                tools=tools,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                stream=stream,
+                tool_choice=tool_choice,
+            ),
         )
 
+        response_cache = self._client.response_cache if cache else None
+        if response_cache is None:
+            return await self._dispatch(attempts, stream, hedge)
+        return await self._create_cached(response_cache, attempts, stream, hedge)
+
+    async def _dispatch(
+        self, attempts: List[Tuple[str, Dict[str, Any]]], stream: bool, hedge: Union[bool, HedgePolicy]
+    ) -> Union[ChatCompletionResponse, AsyncIterator[ChatCompletionStreamResponse]]:
+        if stream:
+            if hedge:
+                raise ValueError("Hedging is only supported for non-streaming requests")
+            return self._stream_with_failover(attempts)
+        if hedge:
+            policy = hedge if isinstance(hedge, HedgePolicy) else self.hedge_policy
+            # every leg of a hedged call bypasses request coalescing (see `async_hedged_call`)
+            send = partial(self._send, coalesce=False)
+            return await async_hedged_call(attempts, send, self._client.model_health, policy)
+        return await self._create_with_failover(attempts)
+
+    async def _create_cached(
+        self,
+        response_cache: ResponseCache,
+        attempts: List[Tuple[str, Dict[str, Any]]],
+        stream: bool,
+        hedge: Union[bool, HedgePolicy],
+    ) -> Union[ChatCompletionResponse, AsyncIterator[ChatCompletionStreamResponse]]:
+        request = response_cache.key_request(attempts)
+        cached = response_cache.get(request)
+        vector = None
+        if cached is None and (query := response_cache.semantic_query(request)) is not None:
+            embedding = await self._client.embeddings.create(query[1], model=response_cache.embedding_model)  # type: ignore
+            vector = embedding.data[0].embedding
+            cached = response_cache.find_similar(query[0], vector)
+        if cached is not None:
+            return async_replay_stream(cached) if stream else cached
+
+        response = await self._dispatch(attempts, stream, hedge)
+        if isinstance(response, ChatCompletionResponse):
+            response_cache.set(request, response, vector)
+            return response
+        return response_cache.async_record_stream(response, request, vector)
+
+    async def _send(self, request: Dict[str, Any], coalesce: bool = True) -> ChatCompletionResponse:
         return await self.handle_request(  # type: ignore
             method="post",
             endpoint="/chat/completions",
             request_data=request,
-            response_cls=ChatCompletionStreamResponse if stream else ChatCompletionResponse,  # type: ignore
-            stream=stream,
+            response_cls=ChatCompletionResponse,
+            coalesce=coalesce,
         )
 
+    async def _create_with_failover(self, attempts: List[Tuple[str, Dict[str, Any]]]) -> ChatCompletionResponse:
+        health = self._client.model_health
+        last_error: Optional[Exception] = None
+        for model, request in attempts:
+            start = time.monotonic()
+            try:
+                response = await self._send(request)
+            except RETRYABLE_EXCEPTIONS as e:
+                health.record_failure(model)
+                self._client._logger.warning(f"Chat completion with model {model} failed: {e}")
+                last_error = e
+                continue
+            health.record_success(model, time.monotonic() - start)
+            return response
+        assert last_error is not None
+        raise last_error
+
+    async def _stream_with_failover(
+        self, attempts: List[Tuple[str, Dict[str, Any]]]
+    ) -> AsyncIterator[ChatCompletionStreamResponse]:
+        # streams can only fail over until their first chunk has been received
+        health = self._client.model_health
+        last_error: Optional[Exception] = None
+        for model, request in attempts:
+            start = time.monotonic()
+            chunks = await self.handle_request(
+                method="post",
+                endpoint="/chat/completions",
+                request_data=request,
+                response_cls=ChatCompletionStreamResponse,
+                stream=True,
+            )
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                health.record_success(model, time.monotonic() - start)
+                return
+            except RETRYABLE_EXCEPTIONS as e:
+                health.record_failure(model)
+                self._client._logger.warning(f"Chat completion with model {model} failed: {e}")
+                last_error = e
+                continue
+            health.record_success(model, time.monotonic() - start)
+            yield first
+            async for chunk in chunks:
+                yield chunk
+            return
+        assert last_error is not None
+        raise last_error
+
 
 class SyncCompletions(SyncResource):
+    hedge_policy: HedgePolicy
+    """The policy (and shared budget) used by `create(..., hedge=True)`"""
+
+    def __init__(self, client: ClientBase) -> None:
+        super().__init__(client)
+        self.hedge_policy = HedgePolicy()
+
     @overload
     def create(  # type: ignore
         self,
-        messages: Union[List[ChatMessage], List[Dict[str, Any]]],
-        model: Optional[str] = None,
+        messages: Union[List[ChatMessage], List[Dict[str, Any]], Conversation],
+        model: ModelSpec = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
@@ -104,13 +252,16 @@ class SyncCompletions(SyncResource):
         top_p: Optional[float] = None,
         tool_choice: Optional[Union[str, ToolChoice]] = None,
         stream: Literal[False] = False,
+        routing: Optional[RoutingStrategy] = None,
+        hedge: Union[bool, HedgePolicy] = False,
+        cache: bool = True,
     ) -> ChatCompletionResponse: ...
 
     @overload
     def create(
         self,
-        messages: Union[List[ChatMessage], List[Dict[str, Any]]],
-        model: Optional[str] = None,
+        messages: Union[List[ChatMessage], List[Dict[str, Any]], Conversation],
+        model: ModelSpec = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
@@ -119,12 +270,15 @@ class SyncCompletions(SyncResource):
         top_p: Optional[float] = None,
         tool_choice: Optional[Union[str, ToolChoice]] = None,
         stream: Literal[True] = True,
+        routing: Optional[RoutingStrategy] = None,
+        hedge: Union[bool, HedgePolicy] = False,
+        cache: bool = True,
     ) -> Iterable[ChatCompletionStreamResponse]: ...
 
     def create(
         self,
-        messages: Union[List[ChatMessage], List[Dict[str, Any]]],
-        model: Optional[str] = None,
+        messages: Union[List[ChatMessage], List[Dict[str, Any]], Conversation],
+        model: ModelSpec = None,
         image: Optional[str] = None,
         internet: Optional[str] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
@@ -133,28 +287,149 @@ class SyncCompletions(SyncResource):
         top_p: Optional[float] = None,
         tool_choice: Optional[Union[str, ToolChoice]] = None,
         stream: bool = False,
+        routing: Optional[RoutingStrategy] = None,
+        hedge: Union[bool, HedgePolicy] = False,
+        cache: bool = True,
     ) -> Union[ChatCompletionResponse, Iterable[ChatCompletionStreamResponse]]:
-        request = self._client._make_chat_request(
-            messages,
+        """Creates a chat completion.
+
+        `model` may also be a list of equivalent models, or a mapping of models to weights. The
+        request is then sent to the best one according to `routing` and fails over to the next one
+        on connection errors, rate limits and server errors. See `candidate_models`.
+
+        With `hedge` (True for the default policy, or a `HedgePolicy`), slow non-streaming requests
+        are duplicated after a delay, by default the model's observed p95 latency, and the first
+        response wins.
+
+        If the client has a `response_cache`, responses are served from and stored in it, unless
+        `cache` is False. If it has a `context_window`, histories too long for the model are
+        trimmed or summarized first.
+        """
+        if self._client.context_window is not None:
+            messages = self._client.context_window.fit(self._client, messages, model)
+
+        attempts = routed_requests(
+            self._client,
             model,
-            image=image,
-            internet=internet,
-            tools=tools,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            top_p=top_p,
-            stream=stream,
-            tool_choice=tool_choice,
+            routing,
+            lambda candidate: self._client._make_chat_request(
+                messages,
+                candidate,
+                image=image,
+                internet=internet,
+                tools=tools,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                stream=stream,
+                tool_choice=tool_choice,
+            ),
         )
 
+        response_cache = self._client.response_cache if cache else None
+        if response_cache is None:
+            return self._dispatch(attempts, stream, hedge)
+        return self._create_cached(response_cache, attempts, stream, hedge)
+
+    def _dispatch(
+        self, attempts: List[Tuple[str, Dict[str, Any]]], stream: bool, hedge: Union[bool, HedgePolicy]
+    ) -> Union[ChatCompletionResponse, Iterator[ChatCompletionStreamResponse]]:
+        if stream:
+            if hedge:
+                raise ValueError("Hedging is only supported for non-streaming requests")
+            return self._stream_with_failover(attempts)
+        if hedge:
+            policy = hedge if isinstance(hedge, HedgePolicy) else self.hedge_policy
+            # every leg of a hedged call bypasses request coalescing (see `hedged_call`)
+            send = partial(self._send, coalesce=False)
+            return hedged_call(attempts, send, self._client.model_health, policy, self._hedge_executor)
+        return self._create_with_failover(attempts)
+
+    def _create_cached(
+        self,
+        response_cache: ResponseCache,
+        attempts: List[Tuple[str, Dict[str, Any]]],
+        stream: bool,
+        hedge: Union[bool, HedgePolicy],
+    ) -> Union[ChatCompletionResponse, Iterator[ChatCompletionStreamResponse]]:
+        request = response_cache.key_request(attempts)
+        cached = response_cache.get(request)
+        vector = None
+        if cached is None and (query := response_cache.semantic_query(request)) is not None:
+            embedding = self._client.embeddings.create(query[1], model=response_cache.embedding_model)  # type: ignore
+            vector = embedding.data[0].embedding
+            cached = response_cache.find_similar(query[0], vector)
+        if cached is not None:
+            return iter(replay_stream(cached)) if stream else cached
+
+        response = self._dispatch(attempts, stream, hedge)
+        if isinstance(response, ChatCompletionResponse):
+            response_cache.set(request, response, vector)
+            return response
+        return response_cache.record_stream(response, request, vector)
+
+    @cached_property
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=32, thread_name_prefix="shuttleai-hedge")
+
+    def _send(self, request: Dict[str, Any], coalesce: bool = True) -> ChatCompletionResponse:
         return self.handle_request(  # type: ignore
             method="post",
             endpoint="/chat/completions",
             request_data=request,
-            response_cls=ChatCompletionStreamResponse if stream else ChatCompletionResponse,  # type: ignore
-            stream=stream,
+            response_cls=ChatCompletionResponse,
+            coalesce=coalesce,
         )
 
+    def _create_with_failover(self, attempts: List[Tuple[str, Dict[str, Any]]]) -> ChatCompletionResponse:
+        health = self._client.model_health
+        last_error: Optional[Exception] = None
+        for model, request in attempts:
+            start = time.monotonic()
+            try:
+                response = self._send(request)
+            except RETRYABLE_EXCEPTIONS as e:
+                health.record_failure(model)
+                self._client._logger.warning(f"Chat completion with model {model} failed: {e}")
+                last_error = e
+                continue
+            health.record_success(model, time.monotonic() - start)
+            return response
+        assert last_error is not None
+        raise last_error
+
+    def _stream_with_failover(
+        self, attempts: List[Tuple[str, Dict[str, Any]]]
+    ) -> Iterator[ChatCompletionStreamResponse]:
+        # streams can only fail over until their first chunk has been received
+        health = self._client.model_health
+        last_error: Optional[Exception] = None
+        for model, request in attempts:
+            start = time.monotonic()
+            chunks = self.handle_request(
+                method="post",
+                endpoint="/chat/completions",
+                request_data=request,
+                response_cls=ChatCompletionStreamResponse,
+                stream=True,
+            )
+            try:
+                first = next(chunks)
+            except StopIteration:
+                health.record_success(model, time.monotonic() - start)
+                return
+            except RETRYABLE_EXCEPTIONS as e:
+                health.record_failure(model)
+                self._client._logger.warning(f"Chat completion with model {model} failed: {e}")
+                last_error = e
+                continue
+            health.record_success(model, time.monotonic() - start)
+            yield first
+            yield from chunks
+            return
+        assert last_error is not None
+        raise last_error
+
 
 CompletionsType = TypeVar("CompletionsType", SyncCompletions, AsyncCompletions)
 
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from shuttleai._concurrency import RETRYABLE_EXCEPTIONS
+from shuttleai.client.health import ModelHealth
+
+R = TypeVar("R")
+
+Attempt = Tuple[str, Dict[str, Any]]
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """When and how often to hedge (duplicate) slow non-streaming requests.
+
+    If a request has not finished after `delay` seconds, a duplicate is sent and whichever
+    finishes first successfully wins; the others are cancelled. Without a fixed `delay`, the
+    model's observed `percentile` latency is used once `min_samples` requests were measured, so
+    only the slowest few percent of requests are hedged.
+
+    Hedges are paid from a budget: every request earns `budget` hedges (e.g. 0.1 for at most ~10%
+    extra requests), and at most `burst` hedges can be saved up. One policy (and thus one budget)
+    is shared by all requests that use it.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        default_delay: float = 2.0,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        max_hedges: int = 1,
+        switch_models: bool = True,
+        budget: float = 0.1,
+        burst: float = 5.0,
+    ) -> None:
+        """
+        Args:
+            delay (float): A fixed delay before hedging, instead of the observed latency percentile
+            percentile (float): The latency percentile (0-1) of the model after which to hedge
+            default_delay (float): The delay used until `min_samples` latencies were observed
+            min_delay (float): The lower bound of the hedging delay
+            min_samples (int): How many latencies of a model to observe before trusting its percentile
+            max_hedges (int): The maximum number of duplicates per request
+            switch_models (bool): Send hedges to the next routed model instead of the same one, if any
+            budget (float): The hedges earned per request
+            burst (float): The maximum number of hedges that can be saved up
+        """
+        self.delay = delay
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.switch_models = switch_models
+        self.budget = budget
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, health: ModelHealth, model: str) -> float:
+        """Returns how long to wait for a request to a model before hedging it."""
+        if self.delay is not None:
+            return self.delay
+        if health.samples(model) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, health.percentile(model, self.percentile) or self.default_delay)
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_spend(self) -> bool:
+        """Takes one hedge from the budget. Returns False if the budget is exhausted."""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class _HedgeState:
+    """Which attempt to launch next, shared by the sync and async runners."""
+
+    def __init__(self, attempts: List[Attempt], policy: HedgePolicy) -> None:
+        self.attempts = attempts
+        self.policy = policy
+        self.next_index = 1
+        self.hedges = 0
+
+    def failover(self) -> Optional[Attempt]:
+        if self.next_index >= len(self.attempts):
+            return None
+        self.next_index += 1
+        return self.attempts[self.next_index - 1]
+
+    def hedge(self) -> Optional[Attempt]:
+        if self.hedges >= self.policy.max_hedges:
+            return None
+        if not self.policy.try_spend():
+            self.hedges = self.policy.max_hedges  # no budget left; don't check again for this request
+            return None
+        self.hedges += 1
+        if self.policy.switch_models and self.next_index < len(self.attempts):
+            return self.failover()
+        return self.attempts[0]
+
+
+async def async_hedged_call(
+    attempts: List[Attempt],
+    send: Callable[[Dict[str, Any]], Awaitable[R]],
+    health: ModelHealth,
+    policy: HedgePolicy,
+) -> R:
+    """Sends the first attempt, hedging it after the policy's delay and failing over on errors.
+
+    `send` must not coalesce identical in-flight requests: a same-model hedge would join the request
+    it duplicates, and cancelling a shared (shielded) request would not stop it, so the hedge budget
+    would undercount the load in flight. The first successful response is returned and every other
+    in-flight request is cancelled.
+    """
+    policy.earn()
+    state = _HedgeState(attempts, policy)
+    tasks: Dict["asyncio.Task[R]", Tuple[str, float]] = {}
+
+    def launch(attempt: Attempt) -> None:
+        model, request = attempt
+        tasks[asyncio.ensure_future(send(request))] = (model, time.monotonic())
+
+    launch(attempts[0])
+    delay: Optional[float] = policy.hedge_delay(health, attempts[0][0])
+    last_error: Optional[BaseException] = None
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                hedge = state.hedge()
+                if hedge is None:
+                    delay = None
+                else:
+                    logger.debug(f"Hedging request to {attempts[0][0]} with {hedge[0]}")
+                    launch(hedge)
+                continue
+
+            for task in done:
+                model, started = tasks.pop(task)
+                error = task.exception()
+                if error is None:
+                    health.record_success(model, time.monotonic() - started)
+                    return task.result()
+                if not isinstance(error, RETRYABLE_EXCEPTIONS):
+                    raise error
+                health.record_failure(model)
+                logger.warning(f"Chat completion with model {model} failed: {error}")
+                last_error = error
+                if not tasks and (attempt := state.failover()) is not None:
+                    launch(attempt)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    assert last_error is not None
+    raise last_error
+
+
+def hedged_call(
+    attempts: List[Attempt],
+    send: Callable[[Dict[str, Any]], R],
+    health: ModelHealth,
+    policy: HedgePolicy,
+    executor: ThreadPoolExecutor,
+) -> R:
+    """Thread pool version of :func:`async_hedged_call`.
+
+    Requests that lose the race cannot be interrupted; they finish in the background and their
+    results are discarded.
+    """
+    policy.earn()
+    state = _HedgeState(attempts, policy)
+    futures: Dict["Future[R]", Tuple[str, float]] = {}
+
+    def launch(attempt: Attempt) -> None:
+        model, request = attempt
+        futures[executor.submit(send, request)] = (model, time.monotonic())
+
+    launch(attempts[0])
+    delay: Optional[float] = policy.hedge_delay(health, attempts[0][0])
+    last_error: Optional[BaseException] = None
+    try:
+        while futures:
+            done: Set["Future[R]"]
+            done, _ = wait(futures, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                hedge = state.hedge()
+                if hedge is None:
+                    delay = None
+                else:
+                    logger.debug(f"Hedging request to {attempts[0][0]} with {hedge[0]}")
+                    launch(hedge)
+                continue
+
+            for future in done:
+                model, started = futures.pop(future)
+                error = future.exception()
+                if error is None:
+                    health.record_success(model, time.monotonic() - started)
+                    return future.result()
+                if not isinstance(error, RETRYABLE_EXCEPTIONS):
+                    raise error
+                health.record_failure(model)
+                logger.warning(f"Chat completion with model {model} failed: {error}")
+                last_error = error
+                if not futures and (attempt := state.failover()) is not None:
+                    launch(attempt)
+    finally:
+        for future in futures:
+            future.cancel()
+
+    assert last_error is not None
+    raise last_error
@@ -0,0 +1,60 @@
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
+
+from shuttleai.client.base import ClientBase
+from shuttleai.exceptions import ShuttleAIInvalidRequestException
+
+ModelSpec = Union[str, Sequence[str], Mapping[str, float], None]
+"""A single model, an ordered list of equivalent models, or a mapping of models to relative weights."""
+
+RoutingStrategy = Literal["fastest", "ordered", "weighted"]
+
+
+def candidate_models(client: ClientBase, model: ModelSpec, routing: Optional[RoutingStrategy] = None) -> List[str]:
+    """Returns the models to try for a request, best first.
+
+    Aliases (proxies) of the same backend are collapsed into the first one given, so a failing
+    backend is not retried under another name. Lists default to `fastest` routing and mappings
+    to `weighted` routing; see `ModelHealth.rank`.
+    """
+    if model is None or isinstance(model, str):
+        return [model or client._default_chat_model]
+
+    weights = dict(model) if isinstance(model, Mapping) else None
+    backends = set()
+    models = []
+    for candidate in model:
+        backend = client.model_catalog.canonical_id(candidate)
+        if backend not in backends:
+            backends.add(backend)
+            models.append(candidate)
+    if not models:
+        raise ValueError("At least one model is required")
+
+    return client.model_health.rank(models, routing or ("weighted" if weights else "fastest"), weights)
+
+
+def routed_requests(
+    client: ClientBase,
+    model: ModelSpec,
+    routing: Optional[RoutingStrategy],
+    build: Callable[[str], Dict[str, Any]],
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Builds the request for every candidate model, in the order they should be tried.
+
+    Models the request is invalid for (e.g. under maintenance, or lacking a capability the request
+    needs) are skipped. If no model is left, the reasons are raised.
+    """
+    candidates = candidate_models(client, model, routing)
+    if len(candidates) == 1:
+        return [(candidates[0], build(candidates[0]))]
+
+    attempts = []
+    issues = []
+    for candidate in candidates:
+        try:
+            attempts.append((candidate, build(candidate)))
+        except ShuttleAIInvalidRequestException as e:
+            issues.append(str(e))
+    if not attempts:
+        raise ShuttleAIInvalidRequestException(f"No model can serve the request: {' | '.join(issues)}")
+    return attempts
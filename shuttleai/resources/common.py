@@ -1,7 +1,9 @@
-from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterator, Type, TypeVar
+from functools import partial
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterator, Optional, Type, TypeVar
 
 from pydantic import BaseModel
 
+from shuttleai.cache import cache_key
 from shuttleai.client.base import ClientBase
 from shuttleai.exceptions import ShuttleAIException
 
@@ -12,6 +14,18 @@ class BaseResource:
     def __init__(self, client: ClientBase):
         self._client = client
 
+    def _coalesce_key(
+        self, method: str, endpoint: str, request_data: Dict[str, Any] | None, stream: bool, coalesce: bool = True
+    ) -> Optional[str]:
+        """Returns the key identical requests are coalesced under, if the client coalesces the endpoint.
+
+        Requests made with `coalesce=False` (e.g. hedges, which must not join the request they duplicate)
+        are never coalesced.
+        """
+        if not coalesce or endpoint not in self._client.coalesce_endpoints:
+            return None
+        return cache_key("request", [method, endpoint, stream, request_data])
+
 
 class SyncResource(BaseResource):
     def _stream_response(
@@ -32,8 +46,26 @@ class SyncResource(BaseResource):
         request_data: Dict[str, Any] | None,
         response_cls: Type[BaseModel],
         stream: bool = False,
+        coalesce: bool = True,
     ) -> Any:
         # assert issubclass(response_cls, BaseModel)
+        key = self._coalesce_key(method, endpoint, request_data, stream, coalesce)
+        if key is not None:
+            # concurrent identical requests share one upstream request (and its parsed response)
+            send = partial(self._send_request, method, endpoint, request_data, response_cls, stream)
+            if stream:
+                return self._client._singleflight.stream(key, send)  # type: ignore
+            return self._client._singleflight.do(key, send)  # type: ignore
+        return self._send_request(method, endpoint, request_data, response_cls, stream)
+
+    def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        request_data: Dict[str, Any] | None,
+        response_cls: Type[BaseModel],
+        stream: bool = False,
+    ) -> Any:
         response = self._client._request(  # type: ignore
             method=method,
             json=request_data,
@@ -67,15 +99,33 @@ class AsyncResource(BaseResource):
         request_data: Dict[str, Any] | None,
         response_cls: Type[BaseModel],
         stream: bool = False,
+        coalesce: bool = True,
     ) -> Any:
         assert issubclass(response_cls, BaseModel)
-        response = self._client._request(  # type: ignore
+        key = self._coalesce_key(method, endpoint, request_data, stream, coalesce)
+        if key is not None:
+            # concurrent identical requests share one upstream request (and its parsed response)
+            if stream:
+                return self._client._singleflight.stream(  # type: ignore
+                    key, lambda: self._stream_response(self._open(method, endpoint, request_data, True), response_cls)
+                )
+            return await self._client._singleflight.do(  # type: ignore
+                key,
+                lambda: self._no_stream_response(self._open(method, endpoint, request_data, False), response_cls),
+            )
+
+        response = self._open(method, endpoint, request_data, stream)
+        if stream:
+            return self._stream_response(response, response_cls)
+        else:
+            return await self._no_stream_response(response, response_cls)
+
+    def _open(
+        self, method: str, endpoint: str, request_data: Dict[str, Any] | None, stream: bool
+    ) -> AsyncIterator[Dict[str, Any]]:
+        return self._client._request(  # type: ignore
             method=method,
             json=request_data,
             path=endpoint,
             stream=stream,
         )
-        if stream:
-            return self._stream_response(response, response_cls)
-        else:
-            return await self._no_stream_response(response, response_cls)
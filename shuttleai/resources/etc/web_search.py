@@ -1,7 +1,113 @@
-from typing import Literal, Optional, Union
+import asyncio
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
 
+import pydantic_core
+
+from shuttleai._concurrency import bounded_map
+from shuttleai.cache import CacheBackend, MemoryCache, cache_key
 from shuttleai.resources.common import AsyncResource, SyncResource
-from shuttleai.schemas.etc.web_search import WebSearchResponse
+from shuttleai.schemas.etc.web_search import RankedWebSearchResult, WebSearchResponse, WebSearchResult
+
+SEARCH_MODELS = ("search-ddg", "search-google")
+RANK_CONSTANT = 60
+"""The `k` of reciprocal rank fusion, which scores a result `1 / (k + rank)` per search that found it."""
+
+Search = Tuple[str, str]
+"""A query and the model it is searched with."""
+
+
+class SearchCache:
+    """Cache of web search responses, in front of `web.search` and `web.search_many`.
+
+    Searches are keyed by model, normalized query and limit, so near-duplicate queries (differing
+    in case, whitespace or trailing punctuation) share entries. Entries are stored in `backend`
+    (in memory by default, see `SQLiteCache` for a persistent one) and expire after `ttl` seconds.
+
+    Example:
+        ```python
+        client = ShuttleAI(search_cache=SearchCache(SQLiteCache("searches.db"), ttl=86400))
+        ```
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: Optional[float] = 3600.0) -> None:
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttl = ttl
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        return " ".join(query.casefold().split()).strip("?!.,;: ")
+
+    def key(self, model: Optional[str], query: str, limit: int) -> str:
+        return cache_key("web-search", [model, self.normalize_query(query), limit])
+
+    def get(self, model: Optional[str], query: str, limit: int) -> Optional[WebSearchResponse]:
+        key = self.key(model, query, limit)
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        try:
+            return WebSearchResponse.model_validate_json(value)
+        except pydantic_core.ValidationError:
+            self.backend.delete(key)
+            return None
+
+    def set(self, model: Optional[str], query: str, limit: int, response: WebSearchResponse) -> None:
+        self.backend.set(self.key(model, query, limit), response.model_dump_json().encode(), self.ttl)
+
+
+def normalize_link(link: str) -> str:
+    """The key links are deduplicated by: the scheme, `www.`, fragments and trailing slashes are ignored."""
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+def _searches(queries: Iterable[str], models: Sequence[str]) -> List[Search]:
+    """The searches of queries over models, without the queries that normalize to the same one."""
+    unique: Dict[str, str] = {}
+    for query in queries:
+        unique.setdefault(SearchCache.normalize_query(query), query)
+    return [(query, model) for query in unique.values() for model in models]
+
+
+def merge_search_results(
+    searches: Sequence[Search],
+    responses: Sequence[Union[WebSearchResponse, BaseException]],
+    max_results: Optional[int] = None,
+) -> List[RankedWebSearchResult]:
+    """Merges the results of searches into one list, deduplicated by link and ranked by reciprocal rank fusion.
+
+    Failed searches (exceptions in `responses`) are skipped, unless they all failed: the first error
+    is raised then. Image results are ignored.
+    """
+    errors = [response for response in responses if isinstance(response, BaseException)]
+    if errors and len(errors) == len(responses):
+        raise errors[0]
+
+    merged: Dict[str, RankedWebSearchResult] = {}
+    for (query, model), response in zip(searches, responses):  # noqa: B905
+        if isinstance(response, BaseException):
+            continue
+        results = [result for result in response.data if isinstance(result, WebSearchResult)]
+        for rank, result in enumerate(results, 1):
+            score = 1 / (RANK_CONSTANT + rank)
+            ranked = merged.get(key := normalize_link(result.link))
+            if ranked is None:
+                merged[key] = RankedWebSearchResult(
+                    **result.model_dump(), score=score, queries=[query], models=[response.model or model]
+                )
+                continue
+            ranked.score += score
+            if query not in ranked.queries:
+                ranked.queries.append(query)
+            if (response.model or model) not in ranked.models:
+                ranked.models.append(response.model or model)
+            if len(result.snippet) > len(ranked.snippet):
+                ranked.snippet = result.snippet
+    ranked_results = sorted(merged.values(), key=lambda result: result.score, reverse=True)
+    return ranked_results[:max_results]
 
 
 class AsyncWeb(AsyncResource):
@@ -10,14 +116,60 @@ class AsyncWeb(AsyncResource):
         query: str,
         limit: int = 3,
         model: Optional[Union[str, Literal["search-ddg", "search-google"]]] = "search-ddg",
+        cache: bool = True,
     ) -> WebSearchResponse:
+        """Searches the web.
+
+        If the client has a `search_cache`, responses are served from and stored in it, unless
+        `cache` is False.
+        """
+        search_cache = self._client.search_cache if cache else None
+        if search_cache is not None and (cached := search_cache.get(model, query, limit)) is not None:
+            return cached
         request = {"query": query, "limit": limit, "model": model}
-        return await self.handle_request(  # type: ignore
+        response: WebSearchResponse = await self.handle_request(  # type: ignore
             method="post",
             endpoint="/web-search",
             request_data=request,
             response_cls=WebSearchResponse,
         )
+        if search_cache is not None:
+            search_cache.set(model, query, limit, response)
+        return response
+
+    async def search_many(
+        self,
+        queries: Iterable[str],
+        limit: int = 3,
+        models: Sequence[str] = SEARCH_MODELS,
+        concurrency: int = 8,
+        max_results: Optional[int] = None,
+        cache: bool = True,
+    ) -> List[RankedWebSearchResult]:
+        """Searches the web for several queries with several models concurrently, merging the results.
+
+        Queries that only differ in case, whitespace or trailing punctuation are searched once.
+        Results are deduplicated by link and ranked by reciprocal rank fusion, so the results found
+        by several searches, and ranked high by them, come first. Searches that fail are skipped,
+        unless they all fail.
+
+        Args:
+            queries (Iterable[str]): The queries
+            limit (int): The number of results per search
+            models (Sequence[str]): The search models every query is searched with
+            concurrency (int): The maximum number of searches in flight
+            max_results (int): The maximum number of results returned, all of them if None
+            cache (bool): Whether the client's `search_cache` is used
+        """
+        searches = _searches(queries, models)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search(query: str, model: str) -> WebSearchResponse:
+            async with semaphore:
+                return await self.search(query, limit, model, cache)
+
+        responses = await asyncio.gather(*(search(query, model) for query, model in searches), return_exceptions=True)
+        return merge_search_results(searches, responses, max_results)
 
 
 class Web(SyncResource):
@@ -26,11 +178,56 @@ class Web(SyncResource):
         query: str,
         limit: int = 3,
         model: Optional[Union[str, Literal["search-ddg", "search-google"]]] = "search-ddg",
+        cache: bool = True,
     ) -> WebSearchResponse:
+        """Searches the web.
+
+        If the client has a `search_cache`, responses are served from and stored in it, unless
+        `cache` is False.
+        """
+        search_cache = self._client.search_cache if cache else None
+        if search_cache is not None and (cached := search_cache.get(model, query, limit)) is not None:
+            return cached
         request = {"query": query, "limit": limit, "model": model}
-        return self.handle_request(  # type: ignore
+        response: WebSearchResponse = self.handle_request(  # type: ignore
             method="post",
             endpoint="/web-search",
             request_data=request,
             response_cls=WebSearchResponse,
         )
+        if search_cache is not None:
+            search_cache.set(model, query, limit, response)
+        return response
+
+    def search_many(
+        self,
+        queries: Iterable[str],
+        limit: int = 3,
+        models: Sequence[str] = SEARCH_MODELS,
+        concurrency: int = 8,
+        max_results: Optional[int] = None,
+        cache: bool = True,
+    ) -> List[RankedWebSearchResult]:
+        """Searches the web for several queries with several models concurrently, merging the results.
+
+        Queries that only differ in case, whitespace or trailing punctuation are searched once.
+        Results are deduplicated by link and ranked by reciprocal rank fusion, so the results found
+        by several searches, and ranked high by them, come first. Searches that fail are skipped,
+        unless they all fail.
+
+        Args:
+            queries (Iterable[str]): The queries
+            limit (int): The number of results per search
+            models (Sequence[str]): The search models every query is searched with
+            concurrency (int): The maximum number of searches in flight, on a thread pool
+            max_results (int): The maximum number of results returned, all of them if None
+            cache (bool): Whether the client's `search_cache` is used
+        """
+        searches = _searches(queries, models)
+        responses: List[Union[WebSearchResponse, BaseException]] = []
+        for _, future in bounded_map(
+            lambda search: self.search(search[0], limit, search[1], cache), searches, concurrency=concurrency
+        ):
+            error = future.exception()
+            responses.append(error if error is not None else future.result())
+        return merge_search_results(searches, responses, max_results)
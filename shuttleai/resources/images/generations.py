@@ -1,9 +1,28 @@
+import os
 from functools import cached_property
-from typing import Generic, Optional, Type, TypeVar
-
+from typing import AsyncIterator, Generic, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar
+from urllib.parse import urlparse
+
+from shuttleai._concurrency import (
+    RateLimitGate,
+    async_bounded_map,
+    async_call_with_retries,
+    bounded_map,
+    call_with_retries,
+)
 from shuttleai.client.base import ClientBase
 from shuttleai.resources.common import AsyncResource, SyncResource, T
-from shuttleai.schemas.images.generations import ImagesGenerationResponse
+from shuttleai.schemas.images.generations import ImagesBatchResult, ImagesGenerationResponse
+
+
+def _image_downloads(download_dir: str, index: int, response: ImagesGenerationResponse) -> List[Tuple[str, str]]:
+    """Builds the ``(url, path)`` pairs for every image in a response, named ``<index>[_<n>].<ext>``."""
+    downloads = []
+    for n, image in enumerate(response.data):
+        ext = os.path.splitext(urlparse(image.url).path)[1] or ".png"
+        name = f"{index}{ext}" if len(response.data) == 1 else f"{index}_{n}{ext}"
+        downloads.append((image.url, os.path.join(download_dir, name)))
+    return downloads
 
 
 class AsyncGenerations(AsyncResource):
@@ -24,6 +43,56 @@ class AsyncGenerations(AsyncResource):
             response_cls=ImagesGenerationResponse,
         )
 
+    async def generate_many(
+        self,
+        prompts: Iterable[str],
+        model: Optional[str] = None,
+        concurrency: int = 8,
+        ordered: bool = True,
+        retries: int = 3,
+        download_dir: Optional[str] = None,
+    ) -> AsyncIterator[ImagesBatchResult]:
+        """Generate images for many prompts concurrently.
+
+        Prompts are consumed lazily and at most `concurrency` generations (plus their downloads)
+        are in flight at once. Rate limits and transient server errors are retried with backoff,
+        and a 429 pauses every worker until the advertised `Retry-After` has passed.
+
+        Args:
+            prompts: The prompts to generate images from
+            model: The model to use for image generation
+            concurrency: The maximum number of generations in flight (default: 8)
+            ordered: Yield results in input order instead of completion order (default: True)
+            retries: The number of retries per prompt on retryable errors (default: 3)
+            download_dir: If given, each image is downloaded into this directory as soon as it is generated
+
+        Yields:
+            ImagesBatchResult: The result for each prompt. A prompt that still fails after its retries
+                does not stop the others: its result carries the `error` instead
+        """
+        gate = RateLimitGate()
+        indexed = enumerate(prompts)
+        if download_dir:
+            os.makedirs(download_dir, exist_ok=True)
+
+        async def run(item: tuple) -> ImagesBatchResult:
+            index, prompt = item
+            result = ImagesBatchResult(index=index, prompt=prompt)
+            try:
+                result.response = await async_call_with_retries(
+                    self.generate, prompt, model, retries=retries, gate=gate
+                )
+                if download_dir:
+                    for url, path in _image_downloads(download_dir, index, result.response):
+                        await async_call_with_retries(self._client._download, url, path, retries=retries)  # type: ignore
+                        result.paths.append(path)
+            except Exception as e:
+                result.error = e
+            return result
+
+        async for _, task in async_bounded_map(run, indexed, concurrency=concurrency, ordered=ordered):
+            yield task.result()
+
 
 class SyncGenerations(SyncResource):
     def generate(
@@ -43,6 +112,56 @@ class SyncGenerations(SyncResource):
             response_cls=ImagesGenerationResponse,
         )
 
+    def generate_many(
+        self,
+        prompts: Iterable[str],
+        model: Optional[str] = None,
+        concurrency: int = 8,
+        ordered: bool = True,
+        retries: int = 3,
+        download_dir: Optional[str] = None,
+    ) -> Iterator[ImagesBatchResult]:
+        """Generate images for many prompts concurrently on a thread pool.
+
+        Prompts are consumed lazily and at most `concurrency` generations (plus their downloads)
+        are in flight at once, all sharing the client's connection pool. Rate limits and transient
+        server errors are retried with backoff, and a 429 pauses every worker until the advertised
+        `Retry-After` has passed.
+
+        Args:
+            prompts: The prompts to generate images from
+            model: The model to use for image generation
+            concurrency: The maximum number of generations in flight (default: 8)
+            ordered: Yield results in input order instead of completion order (default: True)
+            retries: The number of retries per prompt on retryable errors (default: 3)
+            download_dir: If given, each image is downloaded into this directory as soon as it is generated
+
+        Yields:
+            ImagesBatchResult: The result for each prompt. A prompt that still fails after its retries
+                does not stop the others: its result carries the `error` instead
+        """
+        gate = RateLimitGate()
+        indexed = enumerate(prompts)
+        if download_dir:
+            os.makedirs(download_dir, exist_ok=True)
+
+        def run(item: tuple) -> ImagesBatchResult:
+            index, prompt = item
+            result = ImagesBatchResult(index=index, prompt=prompt)
+            try:
+                response = call_with_retries(self.generate, prompt, model, retries=retries, gate=gate)
+                result.response = response
+                if download_dir:
+                    for url, path in _image_downloads(download_dir, index, response):
+                        call_with_retries(self._client._download, url, path, retries=retries)  # type: ignore
+                        result.paths.append(path)
+            except Exception as e:
+                result.error = e
+            return result
+
+        for _, future in bounded_map(run, indexed, concurrency=concurrency, ordered=ordered):
+            yield future.result()
+
 
 GenerationsType = TypeVar("GenerationsType", SyncGenerations, AsyncGenerations)
 
@@ -1,10 +1,47 @@
+import asyncio
+import os
+import threading
+import time
 from functools import cached_property
-from typing import Generic, Optional, Type, TypeVar, cast
+from typing import AsyncIterator, Callable, Dict, Generic, Iterable, Iterator, Mapping, Optional, Type, TypeVar, cast
 
+from aiofiles import open as aopen
+
+from shuttleai._concurrency import async_call_with_retries, call_with_retries
 from shuttleai.client.base import ClientBase
+from shuttleai.exceptions import ShuttleAIAPIException, ShuttleAIException, ShuttleAITimeoutException
 from shuttleai.resources.common import AsyncResource, SyncResource, T
+from shuttleai.resources.video.jobs import AsyncJobTracker, JobCallback, JobTracker, next_poll_delay
 from shuttleai.schemas.video.generations import VideoGenerationResponse, VideoJobResponse
 
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def _video_content_path(generation_id: str) -> str:
+    return f"/video/generations/{generation_id}/content/video"
+
+
+def _range_headers(offset: int) -> Optional[Dict[str, str]]:
+    return {"Range": f"bytes={offset}-"} if offset else None
+
+
+def _content_total(headers: Mapping[str, str], offset: int) -> Optional[int]:
+    """Reads the full size of the content from `Content-Range` (range responses) or `Content-Length`."""
+    content_range = headers.get("Content-Range")
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    length = headers.get("Content-Length")
+    return int(length) + offset if length and length.isdigit() else None
+
+
+def _check_job(job: VideoJobResponse) -> bool:
+    """Returns whether the job is done, raising if it failed."""
+    if job.has_failed:
+        raise ShuttleAIException(f"Video generation job {job.id} failed")
+    return job.is_completed
+
 
 class AsyncGenerations(AsyncResource):
     async def generate(
@@ -57,6 +94,7 @@ class AsyncGenerations(AsyncResource):
         """
         response = await self.handle_request(
             method="get",
+            request_data=None,
             endpoint=f"/video/generations/jobs/{job_id}",
             response_cls=VideoJobResponse,
         )
@@ -68,17 +106,253 @@ class AsyncGenerations(AsyncResource):
         Args:
             generation_id: The ID of the generated video
 
+        Note:
+            The whole video is held in memory. Prefer `iter_video_content` or `save_video_content`
+            for anything but short clips.
+
         Returns:
             bytes: The video content as bytes
         """
-        response = await self._client._raw_request(
+        content: bytes = await self._client._raw_request(  # type: ignore
             method="get",
             json=None,
-            path=f"/video/generations/{generation_id}/content/video",
+            path=_video_content_path(generation_id),
             accept_header="application/octet-stream",
         )
+        return content
+
+    async def iter_video_content(
+        self, generation_id: str, chunk_size: int = 65536, offset: int = 0
+    ) -> AsyncIterator[bytes]:
+        """Stream the video content in chunks.
+
+        Args:
+            generation_id: The ID of the generated video
+            chunk_size: The maximum size of each chunk in bytes (default: 65536)
+            offset: The byte offset to start from, requested with an HTTP range (default: 0)
+
+        Yields:
+            bytes: The next chunk of the video
+        """
+        async with self._client._stream_raw(  # type: ignore
+            "get", _video_content_path(generation_id), headers=_range_headers(offset)
+        ) as response:
+            skip = offset if response.status != 206 else 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+                yield chunk
+
+    async def save_video_content(
+        self,
+        generation_id: str,
+        path: str,
+        chunk_size: int = 65536,
+        resume: bool = True,
+        progress: Optional[ProgressCallback] = None,
+        retries: int = 3,
+    ) -> int:
+        """Stream the video content to a file with constant memory use.
+
+        The video is written incrementally to `<path>.part`, which is renamed to `path` once complete.
+        If an earlier download was interrupted, it resumes from the end of the partial file with a
+        range request. Rate limits, transient server errors and connection errors are retried with
+        backoff, each retry resuming from the partial file.
+
+        Args:
+            generation_id: The ID of the generated video
+            path: The path to save the video to
+            chunk_size: The size of the chunks written to disk (default: 65536)
+            resume: Whether to resume from an existing partial download (default: True)
+            progress: A callback invoked with (bytes written, total bytes or None) after every chunk
+            retries: The number of retries on retryable errors (default: 3)
+
+        Returns:
+            int: The size of the saved video in bytes
+        """
+        first_attempt = True
+
+        async def save() -> int:
+            nonlocal first_attempt
+            resume_attempt, first_attempt = resume or not first_attempt, False
+            return await self._save_video_content(generation_id, path, chunk_size, resume_attempt, progress)
+
+        return await async_call_with_retries(save, retries=retries)
+
+    async def _save_video_content(
+        self, generation_id: str, path: str, chunk_size: int, resume: bool, progress: Optional[ProgressCallback]
+    ) -> int:
+        part_path = f"{path}.part"
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+        written = offset
+        try:
+            async with self._client._stream_raw(  # type: ignore
+                "get", _video_content_path(generation_id), headers=_range_headers(offset)
+            ) as response:
+                if response.status != 206:
+                    offset = written = 0
+                total = _content_total(response.headers, offset)
+                async with aopen(part_path, "ab" if offset else "wb") as file:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        await file.write(chunk)
+                        written += len(chunk)
+                        if progress:
+                            progress(written, total)
+        except ShuttleAIAPIException as e:
+            if e.http_status != 416:
+                raise
+            # range not satisfiable: the partial file already holds the whole video
+        os.replace(part_path, path)
+        return written
+
+    async def wait(
+        self,
+        job_id: str,
+        timeout: Optional[float] = 600.0,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        cancel_event: Optional[asyncio.Event] = None,
+        on_status: Optional[Callable[[VideoJobResponse], None]] = None,
+    ) -> VideoJobResponse:
+        """Wait for a video generation job to finish.
+
+        Polling adapts to the job's status: queued jobs are polled rarely, running jobs often, and the
+        interval backs off while the status does not change. The wait can be aborted by cancelling the
+        awaiting task or by setting `cancel_event`.
+
+        Args:
+            job_id: The ID of the video generation job
+            timeout: The overall deadline in seconds, or None to wait forever (default: 600)
+            poll_interval: The base polling interval in seconds (default: 1)
+            max_poll_interval: The maximum polling interval in seconds (default: 30)
+            cancel_event: An event that aborts the wait when set
+            on_status: A callback invoked with every polled job status
+
+        Returns:
+            VideoJobResponse: The succeeded job
+
+        Raises:
+            ShuttleAIException: If the job failed or the wait was cancelled
+            ShuttleAITimeoutException: If the job did not finish before the deadline
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        last_status = None
+        unchanged_polls = 0
+        while True:
+            job = await self.get_job_status(job_id)
+            if on_status:
+                on_status(job)
+            if _check_job(job):
+                return job
+
+            unchanged_polls = unchanged_polls + 1 if job.status == last_status else 0
+            last_status = job.status
+            delay = next_poll_delay(job.status, unchanged_polls, poll_interval, max_poll_interval)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ShuttleAITimeoutException(f"Video generation job {job_id} did not finish within {timeout}s")
+                delay = min(delay, remaining)
+
+            if cancel_event is None:
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(cancel_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    raise ShuttleAIException(f"Waiting for video generation job {job_id} was cancelled")
+
+    async def generate_and_wait(
+        self,
+        prompt: str,
+        model: str = "sora",
+        width: int = 480,
+        height: int = 480,
+        n_seconds: int = 5,
+        path: Optional[str] = None,
+        timeout: Optional[float] = 600.0,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        cancel_event: Optional[asyncio.Event] = None,
+        on_status: Optional[Callable[[VideoJobResponse], None]] = None,
+    ) -> VideoJobResponse:
+        """Create a video generation job and wait for it to finish.
+
+        Args:
+            prompt: The prompt to generate the video from
+            model: The model to use for video generation (default: "sora")
+            width: The width of the video in pixels (default: 480)
+            height: The height of the video in pixels (default: 480)
+            n_seconds: The duration of the video in seconds (default: 5)
+            path: If given, the first video is downloaded here as soon as the job succeeds
+            timeout: The overall deadline in seconds, or None to wait forever (default: 600)
+            poll_interval: The base polling interval in seconds (default: 1)
+            max_poll_interval: The maximum polling interval in seconds (default: 30)
+            cancel_event: An event that aborts the wait when set
+            on_status: A callback invoked with every polled job status
+
+        Returns:
+            VideoJobResponse: The succeeded job
+        """
+        created = await self.generate(prompt, model=model, width=width, height=height, n_seconds=n_seconds)
+        job = await self.wait(
+            created.id,
+            timeout=timeout,
+            poll_interval=poll_interval,
+            max_poll_interval=max_poll_interval,
+            cancel_event=cancel_event,
+            on_status=on_status,
+        )
+        if path:
+            video = job.first_video
+            if not video:
+                raise ShuttleAIException(f"Video generation job {job.id} succeeded without a video")
+            await self.save_video_content(video.id, path)
+        return job
+
+    def track(
+        self,
+        job_ids: Iterable[str] = (),
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+        slot: float = 1.0,
+        max_requests_per_second: float = 10.0,
+        on_complete: Optional[JobCallback] = None,
+        on_failed: Optional[JobCallback] = None,
+        max_poll_errors: int = 5,
+    ) -> AsyncJobTracker:
+        """Track many video generation jobs from one polling scheduler.
 
-        return await response.read()
+        Args:
+            job_ids: The IDs of the jobs to track (more can be added with `tracker.add`)
+            poll_interval: The base polling interval in seconds (default: 1)
+            max_poll_interval: The maximum polling interval in seconds (default: 60)
+            slot: The width in seconds of the time slots polls are grouped into (default: 1)
+            max_requests_per_second: The upper bound on status requests per second (default: 10)
+            on_complete: A callback invoked with every succeeded job
+            on_failed: A callback invoked with every failed job, including the jobs that could not be polled
+            max_poll_errors: The number of transient poll errors in a row after which a job is given up as
+                failed (default: 5). Other errors, such as an unknown job, fail it at once
+
+        Returns:
+            AsyncJobTracker: A tracker yielding jobs as they finish with `async for`
+        """
+        return AsyncJobTracker(
+            self,
+            job_ids,
+            poll_interval=poll_interval,
+            max_poll_interval=max_poll_interval,
+            slot=slot,
+            max_requests_per_second=max_requests_per_second,
+            on_complete=on_complete,
+            on_failed=on_failed,
+            max_poll_errors=max_poll_errors,
+        )
 
 
 class SyncGenerations(SyncResource):
@@ -143,16 +417,246 @@ class SyncGenerations(SyncResource):
         Args:
             generation_id: The ID of the generated video
 
+        Note:
+            The whole video is held in memory. Prefer `iter_video_content` or `save_video_content`
+            for anything but short clips.
+
         Returns:
             bytes: The video content as bytes
         """
-        response = self._client._raw_request(
+        content: bytes = self._client._raw_request(  # type: ignore
             method="get",
             json=None,
-            path=f"/video/generations/{generation_id}/content/video",
+            path=_video_content_path(generation_id),
             accept_header="application/octet-stream",
         )
-        return response.read()
+        return content
+
+    def iter_video_content(self, generation_id: str, chunk_size: int = 65536, offset: int = 0) -> Iterator[bytes]:
+        """Stream the video content in chunks.
+
+        Args:
+            generation_id: The ID of the generated video
+            chunk_size: The maximum size of each chunk in bytes (default: 65536)
+            offset: The byte offset to start from, requested with an HTTP range (default: 0)
+
+        Yields:
+            bytes: The next chunk of the video
+        """
+        with self._client._stream_raw(  # type: ignore
+            "get", _video_content_path(generation_id), headers=_range_headers(offset)
+        ) as response:
+            skip = offset if response.status_code != 206 else 0
+            for chunk in response.iter_bytes(chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+                yield chunk
+
+    def save_video_content(
+        self,
+        generation_id: str,
+        path: str,
+        chunk_size: int = 65536,
+        resume: bool = True,
+        progress: Optional[ProgressCallback] = None,
+        retries: int = 3,
+    ) -> int:
+        """Stream the video content to a file with constant memory use.
+
+        The video is written incrementally to `<path>.part`, which is renamed to `path` once complete.
+        If an earlier download was interrupted, it resumes from the end of the partial file with a
+        range request. Rate limits, transient server errors and connection errors are retried with
+        backoff, each retry resuming from the partial file.
+
+        Args:
+            generation_id: The ID of the generated video
+            path: The path to save the video to
+            chunk_size: The size of the chunks written to disk (default: 65536)
+            resume: Whether to resume from an existing partial download (default: True)
+            progress: A callback invoked with (bytes written, total bytes or None) after every chunk
+            retries: The number of retries on retryable errors (default: 3)
+
+        Returns:
+            int: The size of the saved video in bytes
+        """
+        first_attempt = True
+
+        def save() -> int:
+            nonlocal first_attempt
+            resume_attempt, first_attempt = resume or not first_attempt, False
+            return self._save_video_content(generation_id, path, chunk_size, resume_attempt, progress)
+
+        return call_with_retries(save, retries=retries)
+
+    def _save_video_content(
+        self, generation_id: str, path: str, chunk_size: int, resume: bool, progress: Optional[ProgressCallback]
+    ) -> int:
+        part_path = f"{path}.part"
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+        written = offset
+        try:
+            with self._client._stream_raw(  # type: ignore
+                "get", _video_content_path(generation_id), headers=_range_headers(offset)
+            ) as response:
+                if response.status_code != 206:
+                    offset = written = 0
+                total = _content_total(response.headers, offset)
+                with open(part_path, "ab" if offset else "wb") as file:
+                    for chunk in response.iter_bytes(chunk_size):
+                        file.write(chunk)
+                        written += len(chunk)
+                        if progress:
+                            progress(written, total)
+        except ShuttleAIAPIException as e:
+            if e.http_status != 416:
+                raise
+            # range not satisfiable: the partial file already holds the whole video
+        os.replace(part_path, path)
+        return written
+
+    def wait(
+        self,
+        job_id: str,
+        timeout: Optional[float] = 600.0,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        cancel_event: Optional[threading.Event] = None,
+        on_status: Optional[Callable[[VideoJobResponse], None]] = None,
+    ) -> VideoJobResponse:
+        """Wait for a video generation job to finish.
+
+        Polling adapts to the job's status: queued jobs are polled rarely, running jobs often, and the
+        interval backs off while the status does not change. Setting `cancel_event` (e.g. from another
+        thread) aborts the wait immediately.
+
+        Args:
+            job_id: The ID of the video generation job
+            timeout: The overall deadline in seconds, or None to wait forever (default: 600)
+            poll_interval: The base polling interval in seconds (default: 1)
+            max_poll_interval: The maximum polling interval in seconds (default: 30)
+            cancel_event: An event that aborts the wait when set
+            on_status: A callback invoked with every polled job status
+
+        Returns:
+            VideoJobResponse: The succeeded job
+
+        Raises:
+            ShuttleAIException: If the job failed or the wait was cancelled
+            ShuttleAITimeoutException: If the job did not finish before the deadline
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        last_status = None
+        unchanged_polls = 0
+        while True:
+            job = self.get_job_status(job_id)
+            if on_status:
+                on_status(job)
+            if _check_job(job):
+                return job
+
+            unchanged_polls = unchanged_polls + 1 if job.status == last_status else 0
+            last_status = job.status
+            delay = next_poll_delay(job.status, unchanged_polls, poll_interval, max_poll_interval)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ShuttleAITimeoutException(f"Video generation job {job_id} did not finish within {timeout}s")
+                delay = min(delay, remaining)
+
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                raise ShuttleAIException(f"Waiting for video generation job {job_id} was cancelled")
+
+    def generate_and_wait(
+        self,
+        prompt: str,
+        model: str = "sora",
+        width: int = 480,
+        height: int = 480,
+        n_seconds: int = 5,
+        path: Optional[str] = None,
+        timeout: Optional[float] = 600.0,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        cancel_event: Optional[threading.Event] = None,
+        on_status: Optional[Callable[[VideoJobResponse], None]] = None,
+    ) -> VideoJobResponse:
+        """Create a video generation job and wait for it to finish.
+
+        Args:
+            prompt: The prompt to generate the video from
+            model: The model to use for video generation (default: "sora")
+            width: The width of the video in pixels (default: 480)
+            height: The height of the video in pixels (default: 480)
+            n_seconds: The duration of the video in seconds (default: 5)
+            path: If given, the first video is downloaded here as soon as the job succeeds
+            timeout: The overall deadline in seconds, or None to wait forever (default: 600)
+            poll_interval: The base polling interval in seconds (default: 1)
+            max_poll_interval: The maximum polling interval in seconds (default: 30)
+            cancel_event: An event that aborts the wait when set
+            on_status: A callback invoked with every polled job status
+
+        Returns:
+            VideoJobResponse: The succeeded job
+        """
+        created = self.generate(prompt, model=model, width=width, height=height, n_seconds=n_seconds)
+        job = self.wait(
+            created.id,
+            timeout=timeout,
+            poll_interval=poll_interval,
+            max_poll_interval=max_poll_interval,
+            cancel_event=cancel_event,
+            on_status=on_status,
+        )
+        if path:
+            video = job.first_video
+            if not video:
+                raise ShuttleAIException(f"Video generation job {job.id} succeeded without a video")
+            self.save_video_content(video.id, path)
+        return job
+
+    def track(
+        self,
+        job_ids: Iterable[str] = (),
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+        slot: float = 1.0,
+        max_requests_per_second: float = 10.0,
+        on_complete: Optional[JobCallback] = None,
+        on_failed: Optional[JobCallback] = None,
+        max_poll_errors: int = 5,
+    ) -> JobTracker:
+        """Track many video generation jobs from one polling scheduler.
+
+        Args:
+            job_ids: The IDs of the jobs to track (more can be added with `tracker.add`)
+            poll_interval: The base polling interval in seconds (default: 1)
+            max_poll_interval: The maximum polling interval in seconds (default: 60)
+            slot: The width in seconds of the time slots polls are grouped into (default: 1)
+            max_requests_per_second: The upper bound on status requests per second (default: 10)
+            on_complete: A callback invoked with every succeeded job
+            on_failed: A callback invoked with every failed job, including the jobs that could not be polled
+            max_poll_errors: The number of transient poll errors in a row after which a job is given up as
+                failed (default: 5). Other errors, such as an unknown job, fail it at once
+
+        Returns:
+            JobTracker: A tracker yielding jobs as they finish when iterated
+        """
+        return JobTracker(
+            self,
+            job_ids,
+            poll_interval=poll_interval,
+            max_poll_interval=max_poll_interval,
+            slot=slot,
+            max_requests_per_second=max_requests_per_second,
+            on_complete=on_complete,
+            on_failed=on_failed,
+            max_poll_errors=max_poll_errors,
+        )
 
 
 GenerationsType = TypeVar("GenerationsType", SyncGenerations, AsyncGenerations)
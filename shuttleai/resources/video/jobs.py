@@ -0,0 +1,390 @@
+import asyncio
+import heapq
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from shuttleai._concurrency import RETRYABLE_EXCEPTIONS
+from shuttleai.exceptions import ShuttleAIException
+from shuttleai.schemas.video.generations import VideoJobResponse
+
+if TYPE_CHECKING:
+    from shuttleai.resources.video.generations import AsyncGenerations, SyncGenerations
+
+# How much slower than `poll_interval` to poll a job in each status. Queued jobs can sit for minutes,
+# while running jobs are close to finishing, so they are polled the most often.
+_STATUS_POLL_FACTORS = {
+    "queued": 4.0,
+    "preprocessing": 2.0,
+    "processing": 1.0,
+    "running": 1.0,
+    "unknown": 4.0,
+}
+_POLL_BACKOFF = 1.5
+
+JobCallback = Callable[[VideoJobResponse], None]
+PollResult = Union[VideoJobResponse, ShuttleAIException]
+
+
+def next_poll_delay(status: str, unchanged_polls: int, poll_interval: float, max_poll_interval: float) -> float:
+    """Returns how long to wait before polling a job again.
+
+    The delay depends on the job's status and grows geometrically for every poll that saw the
+    same status, so jobs stuck in a status are polled less and less. A status transition resets
+    the backoff. Used by the job trackers and by `video.generations.wait`.
+    """
+    base = poll_interval * _STATUS_POLL_FACTORS.get(status, 1.0)
+    return min(max_poll_interval, base * _POLL_BACKOFF**unchanged_polls)
+
+
+class _TrackedJob:
+    __slots__ = ("job_id", "status", "unchanged_polls", "poll_errors", "next_poll_at")
+
+    def __init__(self, job_id: str, next_poll_at: float) -> None:
+        self.job_id = job_id
+        self.status: Optional[str] = None
+        self.unchanged_polls = 0
+        self.poll_errors = 0
+        self.next_poll_at = next_poll_at
+
+
+class _JobSchedule:
+    """Decides which jobs to poll when, independent of how the polls are performed.
+
+    Poll times are rounded up to a multiple of `slot`, so jobs that become due at nearly the same
+    time are polled together in one wakeup, and at most `max_polls_per_slot` jobs are polled per
+    slot. Jobs that do not fit stay due and are polled first in the next slot.
+    """
+
+    def __init__(self, poll_interval: float, max_poll_interval: float, slot: float, max_polls_per_slot: int) -> None:
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.slot = slot
+        self.max_polls_per_slot = max_polls_per_slot
+        self._jobs: Dict[str, _TrackedJob] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._not_before = 0.0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _align(self, t: float) -> float:
+        return math.ceil(t / self.slot) * self.slot
+
+    def _push(self, job: _TrackedJob) -> None:
+        heapq.heappush(self._heap, (job.next_poll_at, job.job_id))
+
+    def add(self, job_id: str, now: float) -> None:
+        if job_id not in self._jobs:
+            job = _TrackedJob(job_id, self._align(now))
+            self._jobs[job_id] = job
+            self._push(job)
+
+    def discard(self, job_id: str) -> None:
+        # heap entries of removed jobs are skipped lazily
+        self._jobs.pop(job_id, None)
+
+    def _earliest(self) -> Optional[float]:
+        while self._heap:
+            at, job_id = self._heap[0]
+            job = self._jobs.get(job_id)
+            if job is not None and job.next_poll_at == at:
+                return at
+            heapq.heappop(self._heap)
+        return None
+
+    def next_wakeup(self) -> Optional[float]:
+        """Returns when the next batch of polls is due, never earlier than the next unused slot."""
+        earliest = self._earliest()
+        return max(earliest, self._not_before) if earliest is not None else None
+
+    def due(self, now: float) -> List[str]:
+        """Pops the jobs to poll now, at most `max_polls_per_slot`, and closes the current slot."""
+        if now < self._not_before:
+            return []
+        due: List[str] = []
+        while len(due) < self.max_polls_per_slot and (at := self._earliest()) is not None and at <= now:
+            _, job_id = heapq.heappop(self._heap)
+            due.append(job_id)
+        if due:
+            self._not_before = math.floor(now / self.slot) * self.slot + self.slot
+        return due
+
+    def poll_errors(self, job_id: str) -> int:
+        """The number of consecutive failed polls of a job."""
+        job = self._jobs.get(job_id)
+        return job.poll_errors if job is not None else 0
+
+    def reschedule(self, job_id: str, status: Optional[str], now: float) -> None:
+        """Schedules the next poll of a job given the status it was just seen in (None on a failed poll)."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.poll_errors = job.poll_errors + 1 if status is None else 0
+        if status is not None and status != job.status:
+            job.status = status
+            job.unchanged_polls = 0
+        else:
+            job.unchanged_polls += 1
+        delay = next_poll_delay(
+            job.status or "unknown", job.unchanged_polls, self.poll_interval, self.max_poll_interval
+        )
+        job.next_poll_at = self._align(now + delay)
+        self._push(job)
+
+
+class _BaseJobTracker:
+    def __init__(
+        self,
+        job_ids: Iterable[str] = (),
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+        slot: float = 1.0,
+        max_requests_per_second: float = 10.0,
+        on_complete: Optional[JobCallback] = None,
+        on_failed: Optional[JobCallback] = None,
+        max_poll_errors: int = 5,
+    ) -> None:
+        if slot <= 0 or max_requests_per_second <= 0:
+            raise ValueError("slot and max_requests_per_second must be positive")
+        self._max_poll_errors = max_poll_errors
+        self._schedule = _JobSchedule(
+            poll_interval,
+            max_poll_interval,
+            slot,
+            max(1, int(max_requests_per_second * slot)),
+        )
+        self._on_complete = on_complete
+        self._on_failed = on_failed
+        now = time.monotonic()
+        for job_id in job_ids:
+            self._schedule.add(job_id, now)
+
+    def __len__(self) -> int:
+        return len(self._schedule)
+
+    def _handle(self, job_id: str, result: PollResult, now: float) -> Optional[VideoJobResponse]:
+        """Records a poll result, returning the job if it has finished.
+
+        Transient poll errors (rate limits, server and connection errors) are retried with backoff, up
+        to `max_poll_errors` in a row. Any other error, or one too many, finishes the job as failed,
+        with the error in `job.error`.
+        """
+        if isinstance(result, ShuttleAIException):
+            if (
+                isinstance(result, RETRYABLE_EXCEPTIONS)
+                and self._schedule.poll_errors(job_id) + 1 < self._max_poll_errors
+            ):
+                self._schedule.reschedule(job_id, None, now)
+                return None
+            job = VideoJobResponse(id=job_id, status="failed", error=str(result))
+        else:
+            job = result
+        if job.is_completed or job.has_failed:
+            self._schedule.discard(job_id)
+            callback = self._on_complete if job.is_completed else self._on_failed
+            if callback:
+                callback(job)
+            return job
+        self._schedule.reschedule(job_id, job.status, now)
+        return None
+
+
+class AsyncJobTracker(_BaseJobTracker):
+    """Tracks many video generation jobs from a single polling scheduler.
+
+    Polls are grouped into shared time slots and capped at `max_requests_per_second`, so the request
+    rate stays bounded no matter how many jobs are tracked. Each job is polled according to its
+    status, and jobs that stay in the same status (e.g. long queues) are polled less and less often.
+
+    Finished jobs (succeeded or failed) are delivered through `async for` and/or the `on_complete`
+    and `on_failed` callbacks. Jobs that cannot be polled (e.g. unknown jobs, or too many transient
+    errors in a row) are delivered as failed, with the error in `job.error`. Iteration ends once no
+    tracked jobs are left; more jobs can be added while iterating.
+
+    Example:
+        ```python
+        tracker = client.video.generations.track(job_ids)
+        async for job in tracker:
+            print(job.id, job.status)
+        ```
+    """
+
+    def __init__(
+        self,
+        generations: "AsyncGenerations",
+        job_ids: Iterable[str] = (),
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+        slot: float = 1.0,
+        max_requests_per_second: float = 10.0,
+        on_complete: Optional[JobCallback] = None,
+        on_failed: Optional[JobCallback] = None,
+        max_poll_errors: int = 5,
+    ) -> None:
+        super().__init__(
+            job_ids,
+            poll_interval,
+            max_poll_interval,
+            slot,
+            max_requests_per_second,
+            on_complete,
+            on_failed,
+            max_poll_errors,
+        )
+        self._generations = generations
+        self._wakeup = asyncio.Event()
+
+    def add(self, job_id: str) -> None:
+        """Start tracking a job."""
+        self._schedule.add(job_id, time.monotonic())
+        self._wakeup.set()
+
+    def remove(self, job_id: str) -> None:
+        """Stop tracking a job."""
+        self._schedule.discard(job_id)
+
+    async def _poll(self, job_id: str) -> PollResult:
+        try:
+            return await self._generations.get_job_status(job_id)
+        except ShuttleAIException as e:
+            return e
+
+    def __aiter__(self) -> AsyncIterator[VideoJobResponse]:
+        return self.completions()
+
+    async def completions(self) -> AsyncIterator[VideoJobResponse]:
+        """Yields jobs as they finish until no tracked jobs are left."""
+        while len(self._schedule):
+            self._wakeup.clear()
+            wakeup = self._schedule.next_wakeup()
+            delay = wakeup - time.monotonic() if wakeup is not None else self._schedule.slot
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            due = self._schedule.due(time.monotonic())
+            jobs = await asyncio.gather(*(self._poll(job_id) for job_id in due))
+            now = time.monotonic()
+            for job_id, job in zip(due, jobs):  # noqa: B905
+                finished = self._handle(job_id, job, now)
+                if finished is not None:
+                    yield finished
+
+    async def run(self) -> List[VideoJobResponse]:
+        """Polls until every tracked job has finished, returning the finished jobs."""
+        return [job async for job in self.completions()]
+
+
+class JobTracker(_BaseJobTracker):
+    """Tracks many video generation jobs from a single polling scheduler.
+
+    Polls are grouped into shared time slots and capped at `max_requests_per_second`, so the request
+    rate stays bounded no matter how many jobs are tracked. The polls of a slot run concurrently on a
+    thread pool sharing the client's connection pool. Each job is polled according to its status, and
+    jobs that stay in the same status (e.g. long queues) are polled less and less often.
+
+    Finished jobs (succeeded or failed) are delivered by iterating the tracker and/or through the
+    `on_complete` and `on_failed` callbacks. Jobs that cannot be polled (e.g. unknown jobs, or too many
+    transient errors in a row) are delivered as failed, with the error in `job.error`. Iteration ends
+    once no tracked jobs are left; jobs can be added from other threads while iterating.
+
+    Example:
+        ```python
+        for job in client.video.generations.track(job_ids):
+            print(job.id, job.status)
+        ```
+    """
+
+    def __init__(
+        self,
+        generations: "SyncGenerations",
+        job_ids: Iterable[str] = (),
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 60.0,
+        slot: float = 1.0,
+        max_requests_per_second: float = 10.0,
+        on_complete: Optional[JobCallback] = None,
+        on_failed: Optional[JobCallback] = None,
+        max_poll_errors: int = 5,
+        max_workers: int = 8,
+    ) -> None:
+        super().__init__(
+            job_ids,
+            poll_interval,
+            max_poll_interval,
+            slot,
+            max_requests_per_second,
+            on_complete,
+            on_failed,
+            max_poll_errors,
+        )
+        self._generations = generations
+        self._max_workers = max_workers
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+
+    def add(self, job_id: str) -> None:
+        """Start tracking a job."""
+        with self._lock:
+            self._schedule.add(job_id, time.monotonic())
+        self._wakeup.set()
+
+    def remove(self, job_id: str) -> None:
+        """Stop tracking a job."""
+        with self._lock:
+            self._schedule.discard(job_id)
+
+    def _poll(self, job_id: str) -> PollResult:
+        try:
+            return self._generations.get_job_status(job_id)
+        except ShuttleAIException as e:
+            return e
+
+    def __iter__(self) -> Iterator[VideoJobResponse]:
+        return self.completions()
+
+    def completions(self) -> Iterator[VideoJobResponse]:
+        """Yields jobs as they finish until no tracked jobs are left."""
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="shuttleai-video") as pool:
+            while True:
+                with self._lock:
+                    if not len(self._schedule):
+                        return
+                    self._wakeup.clear()
+                    wakeup = self._schedule.next_wakeup()
+                    delay = wakeup - time.monotonic() if wakeup is not None else self._schedule.slot
+                    if delay <= 0:
+                        due = self._schedule.due(time.monotonic())
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+
+                jobs = list(pool.map(self._poll, due))
+                now = time.monotonic()
+                finished = []
+                with self._lock:
+                    for job_id, job in zip(due, jobs):  # noqa: B905
+                        if (done := self._handle(job_id, job, now)) is not None:
+                            finished.append(done)
+                yield from finished
+
+    def run(self) -> List[VideoJobResponse]:
+        """Polls until every tracked job has finished, returning the finished jobs."""
+        return list(self.completions())
@@ -34,6 +34,25 @@ class ToolCall(BaseModel):
     function: FunctionCall
 
 
+class DeltaFunctionCall(BaseModel):
+    name: Optional[str] = None
+    arguments: Optional[str] = None
+    """A fragment of the arguments, to be concatenated with the fragments of the following chunks."""
+
+
+class DeltaToolCall(BaseModel):
+    """A fragment of a tool call in a streamed response.
+
+    The first fragment of a call carries its `id`, `type` and function name; the following ones
+    (with the same `index`) carry more of its arguments.
+    """
+
+    index: Optional[int] = None
+    id: Optional[str] = None
+    type: Optional[ToolType] = None
+    function: Optional[DeltaFunctionCall] = None
+
+
 class ToolChoice(str, Enum):
     auto: str = "auto"
     none: str = "none"
@@ -68,7 +87,7 @@ class ChatResponseMessage(BaseModel):
 class DeltaMessage(BaseModel):
     role: Optional[str] = None
     content: Optional[str] = None
-    tool_calls: Optional[List[ToolCall]] = None
+    tool_calls: Optional[List[DeltaToolCall]] = None
 
 
 class FinishReason(str, Enum):
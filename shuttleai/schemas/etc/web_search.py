@@ -14,6 +14,17 @@ class WebSearchResult(BaseModel):
     """The snippet of the search result."""
 
 
+class RankedWebSearchResult(WebSearchResult):
+    score: float
+    """The reciprocal rank fusion score of the result over the searches that found it."""
+
+    queries: List[str]
+    """The queries that found the result."""
+
+    models: List[str]
+    """The search models that found the result."""
+
+
 class WebSearchImageResult(BaseModel):
     title: str
     """The title of the image search result."""
@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Image(BaseModel):
@@ -53,3 +53,26 @@ class ImagesGenerationResponse(BaseModel):
     @property
     def first_image(self) -> Image:
         return self.data[0]
+
+
+class ImagesBatchResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    """The position of the prompt in the input iterable."""
+
+    prompt: str
+    """The prompt the images were generated from."""
+
+    response: Optional[ImagesGenerationResponse] = None
+    """The image generation response for the prompt, None if the generation failed."""
+
+    paths: List[str] = []
+    """The files the images were downloaded to (only when a download directory was given)."""
+
+    error: Optional[BaseException] = None
+    """The error the prompt failed with after its retries, in generating or downloading its images."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import List, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from shuttleai.schemas.models.capabilities import Capabilities
 
@@ -67,10 +67,12 @@ class ProxyCard(BaseModel):
     proxy_to: str
     """The model ID that the proxy points to."""
 
+    _parent: Optional[BaseModelCard] = PrivateAttr(default=None)
+
     @property
     def parent(self) -> BaseModelCard | str:
-        """The parent model card that the proxy points to."""
-        return f"tmp-{self.proxy_to}"
+        """The model card that the proxy (transitively) points to, or `proxy_to` if it is unresolved."""
+        return self._parent if self._parent is not None else self.proxy_to
 
     @parent.setter
     def parent(self, value: BaseModelCard) -> None:
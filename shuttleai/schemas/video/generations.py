@@ -72,6 +72,9 @@ class VideoJobResponse(BaseModel):
     generations: Optional[List[VideoGeneration]] = None
     """The list of generated videos (only present when status is 'succeeded')."""
 
+    error: Optional[str] = None
+    """Why the job failed, if known. Set by job trackers for the jobs they stopped polling after an error."""
+
     @property
     def first_video(self) -> Optional[VideoGeneration]:
         """Get the first generated video."""
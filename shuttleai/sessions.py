@@ -0,0 +1,387 @@
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import IO, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+import orjson
+
+from shuttleai.exceptions import ShuttleAIException
+
+FSYNC_POLICIES = ("always", "interval", "never")
+EXPORT_FORMATS = ("json", "jsonl", "txt", "yaml")
+
+_POP_RECORD_PREFIX = b'{"pop":'
+
+
+def new_session_id() -> str:
+    """Returns a new session id; ids sort by creation time."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+class SessionInfo(NamedTuple):
+    id: str
+    created: float
+    updated: float
+    """When the last message was written (the creation time if there is none)."""
+
+    metadata: Dict[str, Any]
+    title: str = ""
+    """The start of the first user message."""
+
+
+def _title(messages: Iterable[Dict[str, Any]], length: int = 60) -> str:
+    for message in messages:
+        if message.get("role") == "user" and isinstance(message.get("content"), str):
+            title = " ".join(message["content"].split())
+            return title if len(title) <= length else title[: length - 1] + "…"
+    return ""
+
+
+def export_messages(messages: Iterable[Dict[str, Any]], file: IO[str], format: str = "json") -> None:
+    """Writes messages to a text file one at a time, so a transcript is never held in memory whole.
+
+    Args:
+        messages (Iterable[Dict]): The messages, e.g. `SessionStore.iter_messages(session_id)`
+        file (IO[str]): The file to write to
+        format (str): One of `json` (an indented array), `jsonl`, `txt` or `yaml` (a list)
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format {format!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    if format == "json":
+        separator = "[\n"
+        for message in messages:
+            text = orjson.dumps(message, option=orjson.OPT_INDENT_2).decode()
+            file.write(separator + "  " + text.replace("\n", "\n  "))
+            separator = ",\n"
+        file.write("[]\n" if separator == "[\n" else "\n]\n")
+    elif format == "jsonl":
+        for message in messages:
+            file.write(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE).decode())
+    elif format == "txt":
+        for message in messages:
+            file.write(f"{message['role'].capitalize()}: {message.get('content') or ''}\n\n")
+    else:
+        import yaml
+
+        # the one-item lists of the messages concatenate into the list of all of them
+        for message in messages:
+            yaml.dump([message], file, default_flow_style=False, allow_unicode=True)
+
+
+class SessionStore(ABC):
+    """Append-only storage for chat sessions.
+
+    Every message is written when it is produced rather than with the whole history, so a session
+    survives a crash and can be resumed by id. Messages are never rewritten, and dropping the last
+    message of a session leaves the others untouched.
+
+    Stores must be safe to use from several threads.
+    """
+
+    def __init__(self, fsync: str = "interval", fsync_interval: float = 1.0) -> None:
+        """
+        Args:
+            fsync (str): When writes are flushed to disk: `always` (after every message), `interval`
+                (at most once per `fsync_interval` seconds) or `never` (left to the OS)
+            fsync_interval (float): The interval of the `interval` policy, in seconds
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy {fsync!r}, expected one of {', '.join(FSYNC_POLICIES)}")
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+    def __enter__(self) -> "SessionStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @abstractmethod
+    def create(self, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Starts a session, returning its id. `metadata` (e.g. the model) is stored with it."""
+
+    @abstractmethod
+    def append(self, session_id: str, message: Dict[str, Any]) -> None:
+        """Writes a message at the end of a session."""
+
+    @abstractmethod
+    def pop(self, session_id: str) -> None:
+        """Drops the last message of a session."""
+
+    @abstractmethod
+    def iter_messages(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        """Reads the messages of a session lazily, in order."""
+
+    @abstractmethod
+    def info(self, session_id: str) -> SessionInfo:
+        """Returns a session's metadata, raising a `ShuttleAIException` if there is no such session."""
+
+    @abstractmethod
+    def ids(self) -> List[str]:
+        """Returns the ids of the sessions, newest first."""
+
+    def sessions(self, limit: Optional[int] = None) -> List[SessionInfo]:
+        """Returns the newest sessions, newest first."""
+        return [self.info(session_id) for session_id in self.ids()[:limit]]
+
+    def latest(self) -> Optional[str]:
+        """Returns the id of the newest session, if there is one."""
+        ids = self.ids()
+        return ids[0] if ids else None
+
+    def resolve(self, session_id: str) -> str:
+        """Returns the id of the session whose id is, or uniquely starts with, `session_id`."""
+        ids = self.ids()
+        if session_id in ids:
+            return session_id
+        matches = [candidate for candidate in ids if candidate.startswith(session_id)]
+        if len(matches) != 1:
+            problem = "No session" if not matches else f"{len(matches)} sessions"
+            raise ShuttleAIException(f"{problem} matching {session_id!r}")
+        return matches[0]
+
+    def messages(self, session_id: str) -> List[Dict[str, Any]]:
+        return list(self.iter_messages(session_id))
+
+    def export(self, session_id: str, file: IO[str], format: str = "json") -> None:
+        """Writes the messages of a session to a text file, streaming them from the store."""
+        export_messages(self.iter_messages(session_id), file, format)
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flushes pending writes to disk and releases the store's files."""
+
+
+class JSONLSessionStore(SessionStore):
+    """Stores every session in its own JSON Lines file in a directory, `<id>.jsonl`.
+
+    The first line of a file describes the session and every following line records a message, or
+    that the last message was dropped. A line torn by a crash is skipped when the session is read.
+    """
+
+    def __init__(self, directory: str, fsync: str = "interval", fsync_interval: float = 1.0) -> None:
+        """
+        Args:
+            directory (str): The directory of the session files, created if needed
+            fsync (str): When writes are flushed to disk: `always` (after every message), `interval`
+                (at most once per `fsync_interval` seconds) or `never` (left to the OS)
+            fsync_interval (float): The interval of the `interval` policy, in seconds
+        """
+        super().__init__(fsync, fsync_interval)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files: Dict[str, IO[bytes]] = {}
+        self._synced_at: Dict[str, float] = {}
+
+    def _path(self, session_id: str) -> str:
+        if not session_id or os.sep in session_id or session_id.startswith("."):
+            raise ShuttleAIException(f"Invalid session id {session_id!r}")
+        return os.path.join(self.directory, f"{session_id}.jsonl")
+
+    def _file(self, session_id: str) -> IO[bytes]:
+        file = self._files.get(session_id)
+        if file is None:
+            path = self._path(session_id)
+            if not os.path.exists(path):
+                raise ShuttleAIException(f"No session {session_id!r}")
+            # unbuffered: every record is written with a single write
+            file = open(path, "ab", buffering=0)
+            if file.tell():
+                with open(path, "rb") as reader:
+                    reader.seek(-1, os.SEEK_END)
+                    if reader.read(1) != b"\n":  # a record torn by a crash
+                        file.write(b"\n")
+            self._files[session_id] = file
+            self._synced_at[session_id] = time.monotonic()
+        return file
+
+    def _write(self, session_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            file = self._file(session_id)
+            file.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+            now = time.monotonic()
+            if self.fsync == "always" or (
+                self.fsync == "interval" and now - self._synced_at[session_id] >= self.fsync_interval
+            ):
+                os.fsync(file.fileno())
+                self._synced_at[session_id] = now
+
+    def create(self, metadata: Optional[Dict[str, Any]] = None) -> str:
+        session_id = new_session_id()
+        header = {"session": session_id, "created": time.time(), "metadata": metadata or {}}
+        with open(self._path(session_id), "xb") as file:
+            file.write(orjson.dumps(header, option=orjson.OPT_APPEND_NEWLINE))
+            if self.fsync == "always":
+                os.fsync(file.fileno())
+        return session_id
+
+    def append(self, session_id: str, message: Dict[str, Any]) -> None:
+        self._write(session_id, {"time": time.time(), "message": message})
+
+    def pop(self, session_id: str) -> None:
+        self._write(session_id, {"pop": True, "time": time.time()})
+
+    def _lines(self, session_id: str) -> Iterator[bytes]:
+        try:
+            with open(self._path(session_id), "rb") as file:
+                next(file, None)  # the header
+                yield from file
+        except FileNotFoundError:
+            raise ShuttleAIException(f"No session {session_id!r}") from None
+
+    def _dropped(self, session_id: str) -> Set[int]:
+        """The indices of the message records that were dropped, found without decoding the messages."""
+        live: List[int] = []
+        dropped: Set[int] = set()
+        index = 0
+        for line in self._lines(session_id):
+            if line.startswith(_POP_RECORD_PREFIX):
+                if live:
+                    dropped.add(live.pop())
+            elif line.strip():
+                live.append(index)
+                index += 1
+        return dropped
+
+    @staticmethod
+    def _message(line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            return orjson.loads(line)["message"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):  # a record torn by a crash, or a pop
+            return None
+
+    def iter_messages(self, session_id: str) -> Iterator[Dict[str, Any]]:
+        dropped = self._dropped(session_id)
+        index = 0
+        for line in self._lines(session_id):
+            if line.startswith(_POP_RECORD_PREFIX) or not line.strip():
+                continue
+            if index not in dropped and (message := self._message(line)) is not None:
+                yield message
+            index += 1
+
+    def info(self, session_id: str) -> SessionInfo:
+        path = self._path(session_id)
+        try:
+            with open(path, "rb") as file:
+                header = orjson.loads(file.readline())
+            updated = os.path.getmtime(path)
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            raise ShuttleAIException(f"No session {session_id!r}") from None
+        # the title is read from the first lines only, disregarding dropped messages
+        messages = (self._message(line) or {} for line in self._lines(session_id))
+        return SessionInfo(session_id, header["created"], updated, header.get("metadata", {}), _title(messages))
+
+    def ids(self) -> List[str]:
+        names = [name for name in os.listdir(self.directory) if name.endswith(".jsonl")]
+        return sorted((name[: -len(".jsonl")] for name in names), reverse=True)
+
+    def close(self) -> None:
+        with self._lock:
+            for file in self._files.values():
+                if self.fsync != "never":
+                    os.fsync(file.fileno())
+                file.close()
+            self._files.clear()
+
+
+class SQLiteSessionStore(SessionStore):
+    """Stores the sessions in a SQLite database, one row per message.
+
+    The fsync policy maps to SQLite's `synchronous` setting: `always` is `FULL`, `interval` is
+    `NORMAL` (the write-ahead log is synced on checkpoints) and `never` is `OFF`.
+    """
+
+    def __init__(self, path: str, fsync: str = "interval", fsync_interval: float = 1.0) -> None:
+        """
+        Args:
+            path (str): The database file, created if needed
+            fsync (str): When writes are flushed to disk: `always`, `interval` or `never`
+            fsync_interval (float): Unused, the write-ahead log is synced on checkpoints
+        """
+        import sqlite3
+
+        super().__init__(fsync, fsync_interval)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={dict(always='FULL', interval='NORMAL', never='OFF')[fsync]}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, created REAL NOT NULL, metadata BLOB NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages (session_id TEXT NOT NULL, seq INTEGER NOT NULL, "
+            "time REAL NOT NULL, message BLOB NOT NULL, PRIMARY KEY (session_id, seq))"
+        )
+
+    def create(self, metadata: Optional[Dict[str, Any]] = None) -> str:
+        session_id = new_session_id()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO sessions (id, created, metadata) VALUES (?, ?, ?)",
+                (session_id, time.time(), orjson.dumps(metadata or {})),
+            )
+        return session_id
+
+    def _check(self, session_id: str) -> None:
+        if self._db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+            raise ShuttleAIException(f"No session {session_id!r}")
+
+    def append(self, session_id: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self._check(session_id)
+            self._db.execute(
+                "INSERT INTO messages (session_id, seq, time, message) SELECT ?, COALESCE(MAX(seq) + 1, 0), ?, ? "
+                "FROM messages WHERE session_id = ?",
+                (session_id, time.time(), orjson.dumps(message), session_id),
+            )
+
+    def pop(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM messages WHERE session_id = ? AND seq = "
+                "(SELECT MAX(seq) FROM messages WHERE session_id = ?)",
+                (session_id, session_id),
+            )
+
+    def iter_messages(self, session_id: str, chunk_size: int = 256) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            self._check(session_id)
+        seq = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT seq, message FROM messages WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (session_id, seq, chunk_size),
+                ).fetchall()
+            for _, message in rows:
+                yield orjson.loads(message)
+            if len(rows) < chunk_size:
+                return
+            seq = rows[-1][0]
+
+    def info(self, session_id: str) -> SessionInfo:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT created, metadata, (SELECT MAX(time) FROM messages WHERE session_id = id) "
+                "FROM sessions WHERE id = ?",
+                (session_id,),
+            ).fetchone()
+        if row is None:
+            raise ShuttleAIException(f"No session {session_id!r}")
+        created, metadata, updated = row
+        return SessionInfo(
+            session_id, created, updated or created, orjson.loads(metadata), _title(self.iter_messages(session_id))
+        )
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT id FROM sessions ORDER BY id DESC")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
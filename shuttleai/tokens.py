@@ -0,0 +1,597 @@
+import base64
+import hashlib
+import logging
+import marshal
+import os
+import re
+import struct
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import orjson
+
+from shuttleai.schemas.chat.completions import Function
+
+if TYPE_CHECKING:
+    from shuttleai.client.catalog import ModelCatalog
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD_TOKENS = 3
+"""Tokens every message costs on top of its content (role and separators)."""
+
+REPLY_OVERHEAD_TOKENS = 3
+"""Tokens every request costs to prime the reply of the assistant."""
+
+TOOLS_OVERHEAD_TOKENS = 12
+"""Tokens a request with tools costs on top of the tool definitions."""
+
+TOOL_CALL_OVERHEAD_TOKENS = 3
+"""Tokens every tool call of an assistant message costs on top of its name and arguments."""
+
+LOW_DETAIL_IMAGE_TOKENS = 85
+"""Tokens of a low detail image, and the base cost of a high detail one."""
+
+IMAGE_TILE_TOKENS = 170
+"""Tokens of every 512px tile of a high detail image."""
+
+DEFAULT_IMAGE_SIZE = (1024, 1024)
+"""The size assumed for images whose size can't be read locally (remote URLs)."""
+
+DEFAULT_ENCODING = "o200k_base"
+
+ENCODING_URLS = {
+    "o200k_base": "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken",
+    "cl100k_base": "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken",
+}
+DOWNLOAD_TIMEOUT = 30.0
+"""The timeout in seconds of merge table downloads."""
+
+# The pre-tokenizer patterns of the encodings need \p{...} classes, only supported by the `regex` package.
+# Without it, letters and numbers are matched with the closest `re` classes, which splits text the same
+# way for nearly all inputs.
+_PATTERNS = {
+    "o200k_base": "|".join(
+        [
+            r"[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?",
+            r"[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?",
+            r"\p{N}{1,3}",
+            r" ?[^\s\p{L}\p{N}]+[\r\n/]*",
+            r"\s*[\r\n]+",
+            r"\s+(?!\S)",
+            r"\s+",
+        ]
+    ),
+    "cl100k_base": (
+        r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|"
+        r"\s+(?!\S)|\s+"
+    ),
+}
+_FALLBACK_PATTERN = (
+    r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|(?:[^\r\n\w]|_)?[^\W\d_]+|\d{1,3}| ?(?:[^\s\w]|_)+[\r\n/]*|\s*[\r\n]+|"
+    r"\s+(?!\S)|\s+"
+)
+
+_APPROXIMATE_PIECE = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+
+
+@lru_cache(maxsize=65536)
+def approximate_tokens(text: str) -> int:
+    """Estimates the number of tokens of a text without a tokenizer.
+
+    Text is split like the pre-tokenizers of BPE tokenizers (words, numbers of up to three digits,
+    punctuation runs). Words cost a token per ~6 characters, ASCII punctuation one per two characters
+    and other scripts one per character, which slightly overestimates typical BPE counts. Results
+    are memoized, so repeated messages are only counted once.
+    """
+    total = 0
+    for piece in _APPROXIMATE_PIECE.findall(text):
+        stripped = piece.lstrip(" ")
+        if not stripped or stripped.isspace():
+            total += 1
+        elif stripped.isascii():
+            if stripped.isalpha():
+                total += 1 + (len(stripped) - 1) // 6
+            else:
+                total += (len(stripped) + 1) // 2
+        else:
+            total += len(stripped)
+    return total
+
+
+class Tokenizer(ABC):
+    """Counts the tokens of texts for one encoding."""
+
+    name: str
+
+    @abstractmethod
+    def count(self, text: str) -> int: ...
+
+
+class ApproximateTokenizer(Tokenizer):
+    """Estimates token counts with `approximate_tokens`, without any merge table."""
+
+    name = "approximate"
+
+    def count(self, text: str) -> int:
+        return approximate_tokens(text)
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Counts tokens with the `tiktoken` package, if installed."""
+
+    def __init__(self, name: str) -> None:
+        import tiktoken
+
+        self.name = name
+        self._encoding = tiktoken.get_encoding(name)
+
+    def encode(self, text: str) -> List[int]:
+        return self._encoding.encode(text, disallowed_special=())
+
+    def count(self, text: str) -> int:
+        return len(self.encode(text))
+
+
+class BPETokenizer(Tokenizer):
+    """Pure Python byte-level BPE tokenizer, compatible with the tiktoken encodings.
+
+    The merge table (token bytes to rank) is loaded on first use by `load_ranks`. Texts are split
+    with the encoding's pre-tokenizer pattern and the merged tokens of every piece are cached, so
+    common words are only merged once per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        load_ranks: Optional[Callable[[], Dict[bytes, int]]] = None,
+        cache_size: int = 1 << 16,
+    ) -> None:
+        """
+        Args:
+            name (str): The name of the encoding, e.g. "o200k_base"
+            load_ranks (Callable): Returns the merge table; defaults to `load_ranks_file(name)`
+            cache_size (int): The maximum number of pieces whose tokens are cached
+        """
+        self.name = name
+        self.cache_size = cache_size
+        self._load_ranks = load_ranks or (lambda: load_ranks_file(name))
+        self._ranks: Optional[Dict[bytes, int]] = None
+        self._pattern = _compile_pattern(name)
+        self._pieces: Dict[bytes, Tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ranks(self) -> Dict[bytes, int]:
+        return self._ranks if self._ranks is not None else self.load()
+
+    def load(self) -> Dict[bytes, int]:
+        """Loads the merge table now rather than on first use, returning it."""
+        with self._lock:
+            if self._ranks is None:
+                self._ranks = self._load_ranks()
+            return self._ranks
+
+    def _merge(self, piece: bytes) -> Tuple[int, ...]:
+        ranks = self.ranks
+        rank = ranks.get(piece)
+        if rank is not None:
+            return (rank,)
+        parts = [piece[i : i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best_index, best_rank = -1, None
+            for i in range(len(parts) - 1):
+                rank = ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_index, best_rank = i, rank
+            if best_rank is None:
+                break
+            parts[best_index : best_index + 2] = [parts[best_index] + parts[best_index + 1]]
+        return tuple(ranks[part] for part in parts)
+
+    def _encode_piece(self, piece: bytes) -> Tuple[int, ...]:
+        tokens = self._pieces.get(piece)
+        if tokens is None:
+            tokens = self._merge(piece)
+            if len(self._pieces) >= self.cache_size:
+                self._pieces.clear()
+            self._pieces[piece] = tokens
+        return tokens
+
+    def encode(self, text: str) -> List[int]:
+        tokens: List[int] = []
+        for piece in self._pattern.findall(text):
+            tokens.extend(self._encode_piece(piece.encode("utf-8", "surrogatepass")))
+        return tokens
+
+    def count(self, text: str) -> int:
+        return sum(
+            len(self._encode_piece(piece.encode("utf-8", "surrogatepass"))) for piece in self._pattern.findall(text)
+        )
+
+
+def _compile_pattern(name: str) -> Any:
+    pattern = _PATTERNS.get(name)
+    if pattern is not None:
+        try:
+            import regex
+
+            return regex.compile(pattern)
+        except ImportError:
+            pass
+    return re.compile(_FALLBACK_PATTERN)
+
+
+def tokenizer_dir() -> str:
+    """The directory of merge tables, `SHUTTLEAI_TOKENIZER_DIR` or ~/.cache/shuttleai/tokenizers."""
+    return os.environ.get("SHUTTLEAI_TOKENIZER_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "shuttleai", "tokenizers"
+    )
+
+
+def parse_ranks(data: bytes) -> Dict[bytes, int]:
+    """Parses a merge table in the tiktoken format: a base64 token and its rank per line."""
+    ranks = {}
+    for line in data.splitlines():
+        if line:
+            token, rank = line.split()
+            ranks[base64.b64decode(token)] = int(rank)
+    return ranks
+
+
+def load_ranks_file(name: str, download: bool = False) -> Dict[bytes, int]:
+    """Loads the merge table of an encoding from the tokenizer directory.
+
+    Tables are stored precompiled (marshalled), which loads several times faster than parsing the
+    tiktoken file. A missing table is compiled from `<name>.tiktoken` in the directory, downloaded
+    first from `ENCODING_URLS` if needed and `download` is True (raising `OSError` otherwise).
+    """
+    directory = tokenizer_dir()
+    compiled_path = os.path.join(directory, f"{name}.marshal")
+    try:
+        with open(compiled_path, "rb") as file:
+            return marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    source_path = os.path.join(directory, f"{name}.tiktoken")
+    try:
+        with open(source_path, "rb") as file:
+            data = file.read()
+    except OSError:
+        if not download or name not in ENCODING_URLS:
+            raise
+        import httpx
+
+        logger.info(f"Downloading the {name} merge table")
+        response = httpx.get(ENCODING_URLS[name], timeout=DOWNLOAD_TIMEOUT, follow_redirects=True)
+        response.raise_for_status()
+        data = response.content
+
+    ranks = parse_ranks(data)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{compiled_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            marshal.dump(ranks, file)
+        os.replace(tmp_path, compiled_path)
+    except OSError as e:
+        logger.warning(f"Could not save the compiled {name} merge table: {e}")
+    return ranks
+
+
+def encoding_for_model(model: Optional[str]) -> str:
+    """Returns the encoding used to count the tokens of a model.
+
+    Models of other providers use their own tokenizers; their counts are estimated with the closest
+    OpenAI encoding.
+    """
+    name = (model or "").lower()
+    if name.startswith(("gpt-4o", "gpt-4.1", "o1", "o3", "o4", "gpt-5")):
+        return "o200k_base"
+    if name.startswith(("gpt-4", "gpt-3.5", "text-embedding")):
+        return "cl100k_base"
+    return DEFAULT_ENCODING
+
+
+_APPROXIMATE = ApproximateTokenizer()
+_tokenizers: Dict[str, Tokenizer] = {ApproximateTokenizer.name: _APPROXIMATE}
+_tokenizers_lock = threading.Lock()
+_downloads: Dict[str, threading.Thread] = {}
+_missing: Set[str] = set()
+
+
+def get_tokenizer(encoding: str = DEFAULT_ENCODING, download: bool = False) -> Tokenizer:
+    """Returns the tokenizer of an encoding, shared by the whole process.
+
+    `tiktoken` is used if installed, else the pure Python `BPETokenizer`. Nothing is downloaded
+    unless asked for: an encoding that is not in their cache directories yet is counted with
+    `ApproximateTokenizer`, until it is fetched with `download` (or with `download=True`, which
+    fetches it in the background). If it can't be loaded at all, counts keep being approximated.
+    """
+    tokenizer = _tokenizers.get(encoding)
+    if tokenizer is not None:
+        return tokenizer
+    if not download and encoding in _missing:
+        return _APPROXIMATE
+    with _tokenizers_lock:
+        if encoding not in _tokenizers:
+            created = _create_tokenizer(encoding, download)
+            if created is None:
+                return _APPROXIMATE
+            _tokenizers[encoding] = created
+        return _tokenizers[encoding]
+
+
+def download(encoding: str = DEFAULT_ENCODING) -> Tokenizer:
+    """Downloads the merge table of an encoding (if not cached yet), so its tokens are counted exactly.
+
+    Tables are fetched from `ENCODING_URLS` (by `tiktoken` if installed) and cached on disk, so this
+    is only needed once per machine. Blocks until the table is loaded; other threads keep counting
+    meanwhile.
+
+    Example:
+        ```python
+        from shuttleai import tokens
+
+        tokens.download("o200k_base")
+        tokens.count_tokens("Hello world!", model="gpt-4o")
+        ```
+    """
+    tokenizer: Tokenizer
+    try:
+        tokenizer = TiktokenTokenizer(encoding)
+    except ImportError:
+        ranks = load_ranks_file(encoding, download=True)
+        tokenizer = BPETokenizer(encoding, lambda: ranks)
+        tokenizer.load()
+    with _tokenizers_lock:
+        _tokenizers[encoding] = tokenizer
+        _missing.discard(encoding)
+    return tokenizer
+
+
+def _tiktoken_cached(encoding: str) -> bool:
+    """Whether `tiktoken` can create an encoding without downloading it (from its cache directory)."""
+    url = ENCODING_URLS.get(encoding)
+    if url is None:
+        return False
+    if "TIKTOKEN_CACHE_DIR" in os.environ:
+        cache_dir = os.environ["TIKTOKEN_CACHE_DIR"]
+    else:
+        cache_dir = os.environ.get("DATA_GYM_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    return bool(cache_dir) and os.path.exists(os.path.join(cache_dir, hashlib.sha1(url.encode()).hexdigest()))
+
+
+def _has_tiktoken() -> bool:
+    try:
+        import tiktoken  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _start_download(encoding: str) -> None:
+    if encoding not in _downloads:
+        _downloads[encoding] = threading.Thread(
+            target=_download_tokenizer, args=(encoding,), name="shuttleai-tokenizer", daemon=True
+        )
+        _downloads[encoding].start()
+
+
+def _needs_download(encoding: str, download: bool) -> None:
+    if download:
+        _start_download(encoding)
+    else:
+        _missing.add(encoding)
+
+
+def _create_tokenizer(encoding: str, download: bool = False) -> Optional[Tokenizer]:
+    """Creates the tokenizer of an encoding from local files, None if it has to be downloaded first."""
+    if _has_tiktoken():
+        if not _tiktoken_cached(encoding):
+            _needs_download(encoding, download)  # tiktoken downloads encodings synchronously
+            return None
+        try:
+            return TiktokenTokenizer(encoding)
+        except Exception:  # e.g. a corrupted cache
+            pass
+    tokenizer = BPETokenizer(encoding)
+    try:
+        tokenizer.load()
+    except OSError as e:
+        if encoding not in ENCODING_URLS:
+            logger.warning(f"Could not load the {encoding} merge table ({e}); token counts are approximated")
+            return _APPROXIMATE
+        _needs_download(encoding, download)
+        return None
+    except Exception as e:
+        logger.warning(f"Could not load the {encoding} merge table ({e}); token counts are approximated")
+        return _APPROXIMATE
+    return tokenizer
+
+
+def _download_tokenizer(encoding: str) -> None:
+    """Downloads an encoding without holding the tokenizers lock, approximating it for good if that fails."""
+    try:
+        download(encoding)
+    except Exception as e:
+        logger.warning(f"Could not download the {encoding} merge table ({e}); token counts are approximated")
+        with _tokenizers_lock:
+            _tokenizers[encoding] = _APPROXIMATE
+    finally:
+        with _tokenizers_lock:
+            _downloads.pop(encoding, None)
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Counts the tokens of a text for a model."""
+    return get_tokenizer(encoding_for_model(model)).count(text)
+
+
+def image_size(url: str) -> Optional[Tuple[int, int]]:
+    """Reads the size of a PNG, GIF, JPEG or WebP image from a base64 data URL, without decoding it."""
+    if not url.startswith("data:") or ";base64," not in url:
+        return None
+    encoded = url.split(";base64,", 1)[1]
+    head = base64.b64decode(encoded[:64], validate=False)
+    try:
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            if head[12:16] == b"VP8X":
+                return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+            if head[12:16] == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return 1 + (bits & 0x3FFF), 1 + ((bits >> 14) & 0x3FFF)
+            if head[12:16] == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_size(base64.b64decode(encoded[: 1 << 16], validate=False))
+    except struct.error:
+        pass
+    return None
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    index = 2
+    while index + 9 < len(data):
+        if data[index] != 0xFF:
+            return None
+        marker = data[index + 1]
+        if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+            height, width = struct.unpack(">HH", data[index + 5 : index + 9])
+            return width, height
+        index += 2 + struct.unpack(">H", data[index + 2 : index + 4])[0]
+    return None
+
+
+def image_tokens(width: int, height: int, detail: str = "auto") -> int:
+    """Returns the tokens of an image input: a fixed cost at low detail, else a cost per 512px tile.
+
+    High detail images are first scaled to fit 2048x2048, then so their shortest side is at most 768px.
+    """
+    if detail == "low":
+        return LOW_DETAIL_IMAGE_TOKENS
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = -(-int(width) // 512) * -(-int(height) // 512)
+    return LOW_DETAIL_IMAGE_TOKENS + IMAGE_TILE_TOKENS * tiles
+
+
+def _image_part_tokens(part: Dict[str, Any]) -> int:
+    image_url = part.get("image_url") or ""
+    if isinstance(image_url, dict):
+        url, detail = image_url.get("url", ""), image_url.get("detail", "auto")
+    else:
+        url, detail = image_url, "auto"
+    width, height = image_size(url) or DEFAULT_IMAGE_SIZE
+    return image_tokens(width, height, detail)
+
+
+def _content_tokens(content: Any, tokenizer: Tokenizer) -> int:
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return tokenizer.count(content)
+    total = 0
+    for part in content:
+        part = part if isinstance(part, dict) else part.model_dump()
+        if part.get("type") == "image_url":
+            total += _image_part_tokens(part)
+        else:
+            total += tokenizer.count(str(part.get("text", "")))
+    return total
+
+
+def message_tokens(message: Any, tokenizer: Optional[Tokenizer] = None) -> int:
+    """Counts the tokens of a message (a dict or a `ChatMessage`), approximately without a tokenizer."""
+    tokenizer = tokenizer or _APPROXIMATE
+    if not isinstance(message, dict):
+        message = message.model_dump(exclude_none=True)
+    total = MESSAGE_OVERHEAD_TOKENS + _content_tokens(message.get("content"), tokenizer)
+    if message.get("name"):
+        total += 1 + tokenizer.count(message["name"])
+    for tool_call in message.get("tool_calls") or ():
+        function = tool_call.get("function") or {}
+        total += TOOL_CALL_OVERHEAD_TOKENS
+        total += tokenizer.count(function.get("name", "")) + tokenizer.count(function.get("arguments", ""))
+    return total
+
+
+def messages_tokens(messages: Iterable[Any], tokenizer: Optional[Tokenizer] = None) -> int:
+    """Counts the tokens of a list of messages, as sent in a chat request."""
+    return REPLY_OVERHEAD_TOKENS + sum(message_tokens(message, tokenizer) for message in messages)
+
+
+def tools_tokens(tools: Sequence[Any], tokenizer: Optional[Tokenizer] = None) -> int:
+    """Counts the tokens of the tool definitions of a request (tool dicts, or `Function`s)."""
+    if not tools:
+        return 0
+    tokenizer = tokenizer or _APPROXIMATE
+    total = TOOLS_OVERHEAD_TOKENS
+    for tool in tools:
+        function = tool.get("function", tool) if isinstance(tool, dict) else tool
+        if isinstance(function, Function):
+            function = function.model_dump(exclude_none=True)
+        total += tokenizer.count(function.get("name", "")) + tokenizer.count(function.get("description") or "")
+        total += tokenizer.count(orjson.dumps(function.get("parameters") or {}).decode())
+    return total
+
+
+class CostEstimate(NamedTuple):
+    prompt_tokens: int
+    """The tokens of the request: its messages and tools."""
+
+    completion_tokens: int
+    """The tokens the response may use at most (`max_tokens`, else 0)."""
+
+    request_multiplier: float
+    """The cost multiplier of the model, 1.0 if it isn't in the catalog."""
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self) -> float:
+        """The estimated cost, in the unit of `usage.total_tokens` weighted by the model's multiplier."""
+        return self.total_tokens * self.request_multiplier
+
+
+def estimate_cost(
+    catalog: Optional["ModelCatalog"],
+    model: str,
+    messages: Iterable[Any],
+    tools: Optional[Sequence[Any]] = None,
+    max_tokens: Optional[int] = None,
+    tokenizer: Optional[Tokenizer] = None,
+) -> CostEstimate:
+    """Estimates the cost of a chat request before sending it.
+
+    Args:
+        catalog (ModelCatalog): The model catalog to read the multiplier of the model from, e.g. `client.model_catalog`
+        model (str): The model of the request
+        messages (list): The messages of the request
+        tools (list): The tools of the request
+        max_tokens (int): The maximum number of tokens of the response
+        tokenizer (Tokenizer): The tokenizer to count with; defaults to the one of the model's encoding
+
+    Returns:
+        CostEstimate: The token counts and cost
+    """
+    tokenizer = tokenizer or get_tokenizer(encoding_for_model(model))
+    multiplier = catalog.request_multiplier(model) if catalog is not None else None
+    return CostEstimate(
+        prompt_tokens=messages_tokens(messages, tokenizer) + tools_tokens(tools or (), tokenizer),
+        completion_tokens=max_tokens or 0,
+        request_multiplier=multiplier if multiplier is not None else 1.0,
+    )
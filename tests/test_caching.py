@@ -0,0 +1,14 @@
+from shuttleai import ShuttleAI
+from shuttleai.conversation import Conversation
+from shuttleai.resources.chat.caching import ResponseCache
+
+
+def test_conversation_and_list_requests_share_a_key() -> None:
+    client = ShuttleAI(api_key="test", validate_requests=False)
+    cache = ResponseCache()
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "hi"}]
+
+    for history in (messages[1:], messages):
+        from_list = client._make_chat_request([dict(message) for message in history], "shuttle-3.5")
+        from_conversation = client._make_chat_request(Conversation(history), "shuttle-3.5")
+        assert cache.key(from_list) == cache.key(from_conversation)